@@ -0,0 +1,214 @@
+"""
+Cached, validated loading of the YAML configuration files.
+
+load_config(path) parses a file once with the LibYAML C loader (falling
+back to the pure-Python loader), validates it and caches the result. Later
+calls only stat() the file: an unchanged mtime/size returns the cached
+snapshot, and a touched file whose content hash is unchanged is not
+re-parsed either.
+
+In a multi-person config.yaml every device section (config[person][device])
+is a ConfigSection: a plain dict that also records the file and key path it
+came from, so a device handed its section knows where its settings live (the
+Interferometer keeps its calibration under that key path in a separate
+calibration file; config.yaml itself is only edited by hand). Treat
+snapshots as read-only; they are shared by every caller.
+"""
+import os
+import hashlib
+import threading
+import yaml
+
+try:
+    SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    SafeLoader = yaml.SafeLoader  # PyYAML built without LibYAML
+
+NUMBER = (int, float)
+NONE = type(None)
+
+# Device section schemas. A type (or tuple of types) is an isinstance check,
+# a dict is a nested mapping whose keys are required unless prefixed with '?',
+# and '*' applies to every key not listed explicitly.
+SCHEMAS = {
+    "Interferometer": {
+        "Interferometers": {"*": {"VSrcCh": int, "?V": NUMBER, "?IntName": str,
+                                  "?Phase0Voltage": NUMBER, "?Phase90Voltage": NUMBER,
+                                  "?Phase180Voltage": NUMBER, "?Phase270Voltage": NUMBER,
+                                  "?Fit": dict}},
+        "LADAqs": {"*": {"com_port": (str, NONE)}},
+        "?Connection": {"*": (list, NONE)},
+    },
+    "Optical Switch": {
+        "com_port": (str, NONE),
+        "*": (bool, int, str, NONE),
+    },
+    "Time Tagger": {
+        "Channels": {"*": {"ChannelID": int, "TriggerLevel": NUMBER, "Deadtime": NUMBER, "DelayTime": NUMBER}},
+        "DataAcquisitionTime": NUMBER,
+    },
+}
+
+
+class ConfigError(ValueError):
+    """Raised when a config file does not match the schema; lists every problem found."""
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = problems
+        super().__init__(f"Invalid config {path}:\n  " + "\n  ".join(problems))
+
+
+class ConfigSection(dict):
+    """A device's config section plus where it lives (source file, key path)."""
+    def __init__(self, data, source=None, key_path=()):
+        super().__init__(data)
+        self.source = source
+        self.key_path = tuple(key_path)
+
+
+class ConfigSnapshot(dict):
+    """Parsed contents of one config file with its mtime, size and content digest."""
+    def __init__(self, data, path, mtime_ns, size, digest):
+        super().__init__(data)
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.validated = False
+
+    def section(self, *keys):
+        """Return the nested section at keys (e.g. "Alice", "Time Tagger"), or None."""
+        node = self
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return None
+            node = node[key]
+        return node
+
+
+def _type_name(expected):
+    if isinstance(expected, tuple):
+        return " or ".join(t.__name__ if t is not NONE else "null" for t in expected)
+    return expected.__name__
+
+
+def validate(data, schema, where=""):
+    """Return a list of 'path: problem' strings for data checked against schema."""
+    if not isinstance(schema, dict):
+        # bool is an int subclass; don't let True pass as a number
+        if isinstance(data, bool) and not (schema is bool or (isinstance(schema, tuple) and bool in schema)):
+            return [f"{where}: expected {_type_name(schema)}, got bool"]
+        if not isinstance(data, schema):
+            return [f"{where}: expected {_type_name(schema)}, got {type(data).__name__}"]
+        return []
+    if not isinstance(data, dict):
+        return [f"{where}: expected a mapping, got {type(data).__name__}"]
+
+    problems = []
+    listed = set()
+    for key, subschema in schema.items():
+        if key == '*':
+            continue
+        optional = key.startswith('?')
+        name = key[1:] if optional else key
+        listed.add(name)
+        if name not in data:
+            if not optional:
+                problems.append(f"{where}/{name}: missing")
+            continue
+        problems += validate(data[name], subschema, f"{where}/{name}")
+    if '*' in schema:
+        for name, value in data.items():
+            if name not in listed:
+                problems += validate(value, schema['*'], f"{where}/{name}")
+    return problems
+
+
+def validate_config(data):
+    """Validate every person's device sections of a multi-person config against SCHEMAS."""
+    problems = []
+    if not isinstance(data, dict):
+        return ["/: expected a mapping"]
+    for person, devices in data.items():
+        if not isinstance(devices, dict):
+            continue
+        for device_type, section in devices.items():
+            schema = SCHEMAS.get(device_type)
+            if schema is not None:
+                problems += validate(section, schema, f"{person}/{device_type}")
+    return problems
+
+
+def diff_config(old, new, where=()):
+    """
+    Return the leaf-level differences between two configs as a list of
+    (key_path, old_value, new_value); a missing key reads as None.
+    """
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [] if old == new else [(where, old, new)]
+    changes = []
+    for key in list(old) + [key for key in new if key not in old]:
+        if key not in new:
+            changes.append((where + (key,), old[key], None))
+        elif key not in old:
+            changes.append((where + (key,), None, new[key]))
+        else:
+            changes += diff_config(old[key], new[key], where + (key,))
+    return changes
+
+
+def _wrap_sections(data, path):
+    """Turn config[person][device] dicts into ConfigSections that know their origin."""
+    if not isinstance(data, dict):
+        return data
+    for person, devices in data.items():
+        if isinstance(devices, dict):
+            for device_type, section in devices.items():
+                if isinstance(section, dict) and device_type in SCHEMAS:
+                    devices[device_type] = ConfigSection(section, source=path, key_path=(person, device_type))
+    return data
+
+
+_cache = {}                 # absolute path -> ConfigSnapshot
+_cache_lock = threading.Lock()
+
+
+def load_config(path, validate_schema=True):
+    """
+    Return the ConfigSnapshot for a YAML file, re-parsing only if it changed.
+
+    Raises ConfigError if validate_schema is True and a device section does
+    not match SCHEMAS.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _cache_lock:
+        snapshot = _cache.get(path)
+    if snapshot is None or (snapshot.mtime_ns, snapshot.size) != (stat.st_mtime_ns, stat.st_size):
+        with open(path, 'rb') as file:
+            raw = file.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if snapshot is not None and snapshot.digest == digest:
+            # touched but not changed: keep the parsed snapshot
+            snapshot.mtime_ns, snapshot.size = stat.st_mtime_ns, stat.st_size
+        else:
+            data = yaml.load(raw, Loader=SafeLoader) or {}
+            snapshot = ConfigSnapshot(_wrap_sections(data, path), path, stat.st_mtime_ns, stat.st_size, digest)
+            with _cache_lock:
+                _cache[path] = snapshot
+
+    if validate_schema and not snapshot.validated:
+        problems = validate_config(snapshot)
+        if problems:
+            raise ConfigError(path, problems)
+        snapshot.validated = True
+    return snapshot
+
+
+def clear_cache(path=None):
+    """Drop the cached snapshot of one file, or of all files."""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
@@ -0,0 +1,113 @@
+"""
+Hot reload of config.yaml into running devices.
+
+ConfigWatcher polls the config file (a stat() per poll, see ConfigService),
+diffs a changed file against the config the devices are running with and
+hands each changed device section, with the section as it was before, to the
+device's apply_config(section, previous). Drivers apply only what was edited
+in the file over their open connections (TT.TTChangeParams for a trigger
+level, one pipelined OpticalSwitchDriver.OSWAll batch for the switches,
+calibration into InterferometerParams, ...), so state the process changed
+itself is not reverted, and return what they could not apply live, which is
+reported as needing a restart.
+
+    persons = assign_persons_from_config(load_config(config_path))
+    watcher = ConfigWatcher(config_path, persons)
+    watcher.start()          # or call watcher.poll() between measurements
+"""
+import threading
+import yaml
+import ConfigService
+
+
+class ConfigWatcher:
+    def __init__(self, config_path, persons, interval=1.0):
+        """
+        Args:
+            config_path: config.yaml the persons' devices were created from
+            persons: Person objects from assign_persons_from_config
+            interval: Seconds between polls of the file when started
+        """
+        self.config_path = config_path
+        self.persons = {person.name: person for person in persons}
+        self.interval = interval
+        self.snapshot = ConfigService.load_config(config_path)   # config the devices are running with
+        self._last_error = None
+        self._poll_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """
+        Check the file once and apply any changes.
+
+        Returns {(person, device_type): [changes not applied]} for every device
+        section that changed (empty if the file did not change). An invalid
+        or half-written file is reported once and the running config is kept.
+        """
+        with self._poll_lock:
+            try:
+                snapshot = ConfigService.load_config(self.config_path)
+            except (ConfigService.ConfigError, yaml.YAMLError, OSError) as e:
+                if str(e) != self._last_error:
+                    print(f"Config reload skipped, keeping the running config: {e}")
+                    self._last_error = str(e)
+                return {}
+            self._last_error = None
+            if snapshot is self.snapshot:
+                return {}
+
+            changed = {}
+            for key_path, _, _ in ConfigService.diff_config(self.snapshot, snapshot):
+                changed.setdefault(key_path[:2], None)
+
+            results = {}
+            for key in changed:
+                if len(key) < 2:
+                    results[key] = [f"person {key[0]} added or removed"]
+                    continue
+                person_name, device_type = key
+                person = self.persons.get(person_name)
+                section = snapshot.section(person_name, device_type)
+                if person is None or device_type not in person:
+                    results[key] = ["device added" if section is not None else "parameter of an unused device changed"]
+                elif section is None:
+                    results[key] = ["device removed"]
+                elif not hasattr(person[device_type], 'apply_config'):
+                    results[key] = ["device does not support live reload"]
+                else:
+                    try:
+                        results[key] = person[device_type].apply_config(section, self.snapshot.section(person_name, device_type))
+                    except Exception as e:
+                        results[key] = [f"error applying changes: {e}"]
+            self.snapshot = snapshot
+
+        for key, not_applied in results.items():
+            if not_applied:
+                print(f"{'/'.join(key)}: restart needed for {'; '.join(not_applied)}")
+        return results
+
+    def start(self):
+        """Poll the file every interval seconds in a background thread."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error while reloading config: {e}")
@@ -0,0 +1,142 @@
+"""
+Registry mapping config.yaml device keys to device factories.
+
+Each device type is registered once with its factory and metadata:
+
+    register_device("Power Meter", "ThorlabsPMFunctions:PowerMeter",
+                    capabilities=("power",), timeout=10, kwargs=True)
+
+    @register_device("My Device", capabilities=("counting",))
+    def make_my_device(params):
+        return MyDevice(**params)
+
+A factory given as "module:attribute" is only imported when the first device
+of that type is created. Installed packages can add device types through the
+"entanglement_automation.devices" entry point group (name = YAML key,
+value = "module:attribute"); they are discovered once, on first lookup.
+"""
+import importlib
+import threading
+
+ENTRY_POINT_GROUP = "entanglement_automation.devices"
+DEFAULT_TIMEOUT = 30
+
+
+class DeviceSpec:
+    """Factory and metadata of one device type."""
+    def __init__(self, key, factory, capabilities=(), timeout=DEFAULT_TIMEOUT, depends_on=(), kwargs=False, attribute=None):
+        """
+        Args:
+            key: Device key as used in config.yaml (e.g. "Optical Switch")
+            factory: Callable or "module:attribute" string, called with the
+                device's config section
+            capabilities: Names of what the device can do (e.g. "switching")
+            timeout: Seconds its constructor may take at startup
+            depends_on: Device keys that must be up first on the same person
+            kwargs: If True the config section is passed as keyword arguments
+            attribute: Person attribute name (default: key in snake_case)
+        """
+        self.key = key
+        self._factory = factory
+        self.capabilities = frozenset(capabilities)
+        self.timeout = timeout
+        self.depends_on = tuple(depends_on)
+        self.kwargs = kwargs
+        self.attribute = attribute or key.strip().lower().replace(' ', '_').replace('-', '_')
+        self._lock = threading.Lock()
+
+    @property
+    def factory(self):
+        """The factory callable, importing its module on first use."""
+        if isinstance(self._factory, str):
+            with self._lock:
+                if isinstance(self._factory, str):
+                    module_name, _, attribute = self._factory.partition(':')
+                    target = importlib.import_module(module_name)
+                    for name in attribute.split('.'):   # allows "module:Class.classmethod"
+                        target = getattr(target, name)
+                    self._factory = target
+        return self._factory
+
+    def create(self, params):
+        if self.kwargs and isinstance(params, dict):
+            return self.factory(**params)
+        return self.factory(params)
+
+    def __repr__(self):
+        return f"<DeviceSpec {self.key!r} capabilities={sorted(self.capabilities)}>"
+
+
+_registry = {}         # YAML key -> DeviceSpec
+_by_attribute = {}     # Person attribute name -> YAML key
+_plugins_loaded = False
+_registry_lock = threading.RLock()
+
+
+def register_device(key, factory=None, **metadata):
+    """
+    Register a device type; usable as a call or as a decorator on a class or
+    factory function. Re-registering a key replaces it.
+    """
+    def register(target):
+        spec = DeviceSpec(key, target, **metadata)
+        with _registry_lock:
+            old = _registry.get(key)
+            if old is not None:
+                _by_attribute.pop(old.attribute, None)
+            _registry[key] = spec
+            _by_attribute[spec.attribute] = key
+        return target
+
+    if factory is None:
+        return register
+    register(factory)
+    return _registry[key]
+
+
+def load_plugins():
+    """Register device types advertised by installed packages (once)."""
+    global _plugins_loaded
+    with _registry_lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        try:
+            from importlib.metadata import entry_points
+            eps = entry_points()
+            group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, [])
+        except Exception as e:
+            print(f"Could not read device plugins: {e}")
+            return
+        for ep in group:
+            if ep.name not in _registry:
+                register_device(ep.name, ep.value)
+
+
+def get_device_spec(key):
+    """Return the DeviceSpec for a config key, or None if the key is not a device."""
+    spec = _registry.get(key)
+    if spec is None and not _plugins_loaded:
+        load_plugins()
+        spec = _registry.get(key)
+    return spec
+
+
+def key_for_attribute(attribute):
+    """Return the config key registered under a Person attribute name, or None."""
+    return _by_attribute.get(attribute)
+
+
+def registered_devices():
+    load_plugins()
+    return dict(_registry)
+
+
+# Built-in device types
+register_device("Interferometer", "Interferometer_v4_20250425:Interferometer", capabilities=("phase_control",), timeout=30)
+register_device("Optical Switch", "OpticalSwitch:OpticalSwitchDriver.from_config", capabilities=("switching",), timeout=10)
+register_device("Time Tagger", "TimeTaggerFunctions:TT", capabilities=("counting", "timing", "histogram"), timeout=30)
+register_device("Power Meter", "ThorlabsPMFunctions:PowerMeter", capabilities=("power",), timeout=10, kwargs=True)
+register_device("SHG", "SHGScanTEC_v2:SHGController", capabilities=("temperature_control",), timeout=10, kwargs=True)
+register_device("Laser", "PPCL_Bare_Bones:LaserControl", capabilities=("light_source",), timeout=30, kwargs=True)
+register_device("Yokogawa", "yoAQ2212:yoAQ2212_frame_controller", capabilities=("light_source",), timeout=30, kwargs=True)
@@ -1,15 +1,46 @@
+import copy
 import yaml
 import numpy as np
 import time
 import os
-import matplotlib.pyplot as plt
+import stat
+import atexit
+import weakref
+import tempfile
+import threading
 
-from LADaq_v1 import LADAqBoard
-from supportingfunctions import SupportFunc
+try:
+    from LADaq_v1 import LADAqBoard
+except ImportError:
+    LADAqBoard = None  # LADAq driver not installed, only Interferometer(simulator=...) works
+from ConfigService import load_config
+
+_file_locks = {}                  # calibration file -> lock, shared by every Interferometer writing it
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(filename):
+    with _file_locks_guard:
+        return _file_locks.setdefault(os.path.abspath(filename), threading.RLock())
+
+
+def _flush_if_alive(ref):
+    # atexit / flush-timer callback holding only a weak reference, so neither
+    # keeps an Interferometer alive
+    interferometer = ref()
+    if interferometer is not None:
+        interferometer.flush()
+
+
+def calibration_file(config_file):
+    """Calibration file kept next to a shared config file: config.yaml -> config_calibration.yaml."""
+    return os.path.splitext(config_file)[0] + '_calibration.yaml'
 
 
 class InterferometerParams:
-    def __init__(self, params):
+    def __init__(self, params, label=None, LADAqName=None):
+        self.label = label            # key in Interferometer.Interferometers (e.g. 'IntE')
+        self.LADAqName = LADAqName    # LADAq board this interferometer is wired to
         self.IntName = params.get('IntName')
         self.Out1 = params.get('Out1')
         self.Out2 = params.get('Out2')
@@ -23,23 +54,230 @@ class InterferometerParams:
         self.Phase270power = params.get('Phase270power')
         self.V = params.get('V')
         self.VSrcCh = params.get('VSrcCh')
+        self.Fit = params.get('Fit')  # FringeFit.to_dict() from the last characterization, if any
+
+
+class FringeFit:
+    """
+    Sinusoidal fringe model P(V) = offset + amplitude * cos(2*pi*x/period + phase).
+
+    x is the voltage for a 'linear' phase response, or the voltage squared for
+    a 'quadratic' (thermal, phase proportional to heater power) response.
+    Phase 0 is the power maximum and the model phase increases with voltage,
+    so 0 -> 90 -> 180 (minimum) -> 270 follow the same order as the
+    Phase0/90/180/270 calibration fields.
+    """
+    def __init__(self, offset, amplitude, period, phase, rss=0.0, r_squared=None, response='linear'):
+        self.offset = offset
+        self.amplitude = amplitude
+        self.period = period
+        self.phase = phase
+        self.rss = rss
+        self.r_squared = r_squared
+        self.response = response
+
+    @property
+    def visibility(self):
+        return self.amplitude / self.offset if self.offset else 0.0
+
+    def _x(self, voltages):
+        voltages = np.asarray(voltages, dtype=float)
+        return voltages ** 2 if self.response == 'quadratic' else voltages
+
+    def _v(self, x):
+        return np.sqrt(np.clip(x, 0, None)) if self.response == 'quadratic' else x
+
+    def predict(self, voltages):
+        return self.offset + self.amplitude * np.cos(2 * np.pi * self._x(voltages) / self.period + self.phase)
+
+    def slope(self, voltages):
+        """Return dP/dV of the model."""
+        voltages = np.asarray(voltages, dtype=float)
+        dx_dv = 2 * voltages if self.response == 'quadratic' else np.ones_like(voltages)
+        theta = 2 * np.pi * self._x(voltages) / self.period + self.phase
+        return -self.amplitude * np.sin(theta) * 2 * np.pi / self.period * dx_dv
+
+    def voltage_window(self, voltage, phase_deg):
+        """Voltages phase_deg of fringe phase below and above voltage (the low end may be < 0 V for a linear response)."""
+        dx = abs(self.period) * phase_deg / 360
+        x = float(self._x(voltage))
+        return float(self._v(x - dx)), float(self._v(x + dx))
+
+    def voltages_for_phase(self, phase_deg, voltage_range):
+        """Return every voltage inside voltage_range where the fringe sits at phase_deg."""
+        x_lo, x_hi = self._x([min(voltage_range), max(voltage_range)])
+        theta = np.deg2rad(phase_deg)
+        n_lo = np.ceil(((2 * np.pi * x_lo / self.period + self.phase) - theta) / (2 * np.pi))
+        n_hi = np.floor(((2 * np.pi * x_hi / self.period + self.phase) - theta) / (2 * np.pi))
+        n = np.arange(n_lo, n_hi + 1)
+        return self._v((theta + 2 * np.pi * n - self.phase) * self.period / (2 * np.pi))
+
+    def phase_points(self, voltage_range, near=None):
+        """
+        Return {0: V0, 90: V90, 180: V180, 270: V270} for one full fringe
+        (maximum, then increasing phase) inside voltage_range, or None if no
+        complete cycle fits. The first cycle is used unless near is given, in
+        which case the cycle whose maximum is closest to near is preferred.
+        """
+        candidates = self.voltages_for_phase(0, voltage_range)
+        if near is not None:
+            candidates = candidates[np.argsort(np.abs(candidates - near), kind='stable')]
+        for v0 in candidates:
+            points = {0: float(v0)}
+            for phase in (90, 180, 270):
+                later = self.voltages_for_phase(phase, (v0, max(voltage_range)))
+                if later.size == 0:
+                    break
+                points[phase] = float(later[0])
+            if len(points) == 4:
+                return points
+        return None
+
+    def to_dict(self):
+        return {
+            'offset': float(self.offset),
+            'amplitude': float(self.amplitude),
+            'period': float(self.period),
+            'phase': float(self.phase),
+            'response': self.response,
+            'r_squared': float(self.r_squared) if self.r_squared is not None else None,
+            'visibility': float(self.visibility),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(offset=data['offset'], amplitude=data['amplitude'], period=data['period'],
+                   phase=data['phase'], r_squared=data.get('r_squared'), response=data.get('response', 'linear'))
+
+
+def fit_fringe(voltages, powers, response='linear', n_periods=64, n_refine=3):
+    """
+    Least-squares fit of a FringeFit to voltage/power samples.
+
+    For a grid of candidate periods the model is linear in
+    (offset, cos, sin), so all candidates are solved at once with batched
+    3x3 normal equations; the best period is then refined by zooming the
+    grid n_refine times.
+    Returns None if there are too few points to fit.
+    """
+    V = np.asarray(voltages, dtype=float)
+    P = np.asarray(powers, dtype=float)
+    valid = np.isfinite(V) & np.isfinite(P)
+    V, P = V[valid], P[valid]
+    if V.size < 4:
+        return None
+
+    x = V ** 2 if response == 'quadratic' else V
+    span = np.ptp(x)
+    spacing = np.median(np.diff(np.unique(x))) if np.unique(x).size > 1 else 0
+    if span <= 0 or spacing <= 0:
+        return None
+
+    PtP = P @ P
+
+    def solve(periods):
+        kx = (2 * np.pi / periods)[:, None] * x
+        C, S = np.cos(kx), np.sin(kx)
+        sC, sS = C.sum(axis=1), S.sum(axis=1)
+        XtX = np.empty((periods.size, 3, 3))
+        XtX[:, 0, 0] = x.size
+        XtX[:, 0, 1] = XtX[:, 1, 0] = sC
+        XtX[:, 0, 2] = XtX[:, 2, 0] = sS
+        XtX[:, 1, 1] = np.einsum('pn,pn->p', C, C)
+        XtX[:, 1, 2] = XtX[:, 2, 1] = np.einsum('pn,pn->p', C, S)
+        XtX[:, 2, 2] = x.size - XtX[:, 1, 1]
+        XtP = np.stack([np.full(periods.size, P.sum()), C @ P, S @ P], axis=1)
+        beta = np.linalg.solve(XtX + 1e-12 * np.eye(3), XtP[..., None])[..., 0]
+        # For least-squares solutions RSS = P.P - beta.(X^T P)
+        rss = np.maximum(PtP - np.einsum('pi,pi->p', beta, XtP), 0)
+        return beta, rss
+
+    periods = np.geomspace(3 * spacing, 4 * span, n_periods)
+    beta, rss = solve(periods)
+    best = int(np.argmin(rss))
+    for _ in range(n_refine):
+        lo, hi = periods[max(best - 1, 0)], periods[min(best + 1, periods.size - 1)]
+        periods = np.linspace(lo, hi, 16)
+        beta, rss = solve(periods)
+        best = int(np.argmin(rss))
+
+    offset, a, b = beta[best]
+    tss = np.sum((P - P.mean()) ** 2)
+    # a*cos(kx) + b*sin(kx) = A*cos(kx + phase) with A = hypot(a, b), phase = atan2(-b, a)
+    return FringeFit(offset=float(offset), amplitude=float(np.hypot(a, b)), period=float(periods[best]),
+                     phase=float(np.arctan2(-b, a)), rss=float(rss[best]),
+                     r_squared=float(1 - rss[best] / tss) if tss > 0 else None, response=response)
 
 
 class Interferometer:
-    def __init__(self, filename=None):
+    def __init__(self, filename=None, flush_interval=5.0, flush_every=50, max_slew_rate=0.05, ramp_step=0.005, simulator=None):
+        # filename is an interferometer YAML file or a config section (dict).
+        # The shared, hand-edited config a ConfigService.ConfigSection comes from
+        # is never rewritten: its calibration is kept in calibration_file(source)
+        # under the same key_path and overrides the config values on load,
+        # except for fields edited in the config since the calibration was saved.
+        self.config_keys = ()
+        self.config_source = None
+        self._config_values = {}      # label -> config values the calibration file is based on
+        config_data = None
+        if isinstance(filename, dict):
+            config_data = filename
+            self.config_keys = getattr(filename, 'key_path', ())
+            self.config_source = getattr(filename, 'source', None)
+            self._config_values = self._section_values(config_data)
+            filename = calibration_file(self.config_source) if self.config_source else None
         self.filename = filename
+        # Optional SimulatedInstruments.SimulatedLab providing LADAq boards instead of hardware
+        self.simulator = simulator
         self.Interferometers = {}
         self.LADAqs = {}
         self.Connection = {}
 
-        if filename:
-            self.load_yaml(filename)
+        # Lookup tables built once in load_yaml so per-step calls avoid scanning
+        # self.__dict__ or the Connection lists
+        self._label_by_id = {}        # id(InterferometerParams) -> label
+        self._ladaq_by_label = {}     # label -> LADAq name
+        self._label_by_channel = {}   # (LADAq name, VSrcCh) -> label
+
+        # Voltage ramp limits: steps of ramp_step volts paced at max_slew_rate V/s
+        # (default 0.05 V/s, the original 5 mV every 0.1 s)
+        self.max_slew_rate = max_slew_rate
+        self.ramp_step = ramp_step
+
+        # Write-behind persistence: state changes only mark the object dirty and
+        # the YAML file is rewritten once flush_every changes have accumulated
+        # or, by a background timer, flush_interval seconds after the first
+        # unsaved change (and on flush()/exit), so the last voltage of a sweep
+        # reaches disk within flush_interval even if the process is killed.
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._dirty = False
+        self._pending_changes = 0
+        self._last_flush = time.monotonic()
+        self._flush_timer = None
+        self._save_lock = threading.RLock()
+        self._source_locks = {}       # id(LADAq board) -> lock serialising its writes
+        self.phase_locks = {}         # label -> running PhaseLock
+
+        if config_data is not None or filename:
+            self.load_yaml(config_data if config_data is not None else filename)
+            if config_data is not None and filename:
+                self.load_calibration(filename)
+            if filename:
+                atexit.register(_flush_if_alive, weakref.ref(self))
         else:
             print("No YAML file provided!")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
     def load_yaml(self, filename):
-        with open(filename, 'r') as yaml_file:
-            data = yaml.safe_load(yaml_file)
+        """Load interferometers, LADAqs and connections from a YAML file (cached by ConfigService) or a config section dict."""
+        data = filename if isinstance(filename, dict) else load_config(filename)
 
         # Load interferometers
         for intf_name, params in data['Interferometers'].items():
@@ -55,27 +293,134 @@ class Interferometer:
             }
 
         # Load connection
-        self.Connection = data['Connection']
+        self.Connection = {name: list(labels or []) for name, labels in (data.get('Connection') or {}).items()}
 
-    def save_yaml(self, filename):
-        """Update only Interferometers, LADAqs, and Connection sections back to YAML file, without touching other sections."""
+        self._build_registry()
+
+    @classmethod
+    def _section_values(cls, section):
+        """Calibration fields and V of every interferometer in a config section."""
+        return {label: {field: params[field] for field in cls.CALIBRATION_FIELDS + ('V',) if field in params}
+                for label, params in (section.get('Interferometers') or {}).items()}
+
+    def load_calibration(self, filename):
+        """
+        Override calibration fields and V with the values saved in a calibration
+        file at config_keys.
+
+        The file also records the config values each saved calibration was based
+        on (ConfigValues); a field whose config value differs from that was
+        edited by hand since and keeps the config value. For a file without
+        them, the calibration is used only if it is newer than the config.
+        """
         try:
-            # Load existing YAML
             with open(filename, 'r') as file:
-                data = yaml.safe_load(file)
+                data = yaml.safe_load(file) or {}
+        except FileNotFoundError:
+            return
         except Exception as e:
-            print(f"Error loading existing YAML in save_yaml: {e}")
-            data = {}
+            print(f"Error loading calibration file {filename}, using the config values: {e}")
+            return
+        for key in self.config_keys:
+            data = data.get(key) or {}
+        based_on = data.get('ConfigValues')
+        if based_on is None and self.config_source:
+            calibration_is_newer = os.path.getmtime(filename) >= os.path.getmtime(self.config_source)
+        else:
+            calibration_is_newer = True
+        overridden, kept = [], []
+        for label, saved in (data.get('Interferometers') or {}).items():
+            intf_obj = self.Interferometers.get(label)
+            if intf_obj is None:
+                continue
+            config_values = self._config_values.get(label, {})
+            for field in self.CALIBRATION_FIELDS + ('V',):
+                if field not in saved:
+                    continue
+                if based_on is not None:
+                    edited = config_values.get(field) != (based_on.get(label) or {}).get(field)
+                else:
+                    edited = not calibration_is_newer
+                if edited and field in config_values:
+                    kept.append(f"{label}.{field}")
+                elif saved[field] != getattr(intf_obj, field):
+                    setattr(intf_obj, field, saved[field])
+                    overridden.append(f"{label}.{field}")
+        if overridden:
+            print(f"Calibration from {filename} used for {', '.join(overridden)}")
+        if kept:
+            print(f"{self.config_source} edited since the calibration was saved, keeping its {', '.join(kept)}")
+
+    def _build_registry(self):
+        """Index interferometers by object, board and channel for O(1) lookups."""
+        self._label_by_id = {}
+        self._ladaq_by_label = {}
+        self._label_by_channel = {}
 
-        # Update only LADAqs
-        data['LADAqs'] = {}
-        for ladaq_name, info in self.LADAqs.items():
-            data['LADAqs'][ladaq_name] = {
-                'com_port': info['com_port']
-            }
+        for ladaq_name, intf_list in self.Connection.items():
+            for label in intf_list or []:
+                self._ladaq_by_label[label] = ladaq_name
+
+        for label, intf_obj in self.Interferometers.items():
+            intf_obj.label = label
+            intf_obj.LADAqName = self._ladaq_by_label.get(label)
+            self._label_by_id[id(intf_obj)] = label
+            if intf_obj.LADAqName is not None:
+                self._label_by_channel[(intf_obj.LADAqName, intf_obj.VSrcCh)] = label
+
+    def get_label(self, interferometer_name):
+        """Return the label for an InterferometerParams object or label string, or None if unknown."""
+        if isinstance(interferometer_name, InterferometerParams):
+            return self._label_by_id.get(id(interferometer_name))
+        if interferometer_name in self.Interferometers:
+            return interferometer_name
+        return None
+
+    def get_interferometer_for_channel(self, ladaq_name, channel):
+        """Return the InterferometerParams driven by a given LADAq channel, or None."""
+        label = self._label_by_channel.get((ladaq_name, channel))
+        return self.Interferometers[label] if label is not None else None
+
+    def save_yaml(self, filename):
+        """
+        Update only Interferometers, LADAqs, and Connection sections back to YAML file, without touching other sections.
+
+        For an Interferometer created from a config section, filename is its
+        calibration file and only the Interferometers are written, at config_keys.
+        Raises if the existing file cannot be read, rather than replacing it
+        with this object's sections alone.
+        """
+        with _file_lock(filename):
+            self._save_yaml(filename)
 
-        # Update Connection section
-        data['Connection'] = self.Connection
+    def _save_yaml(self, filename):
+        try:
+            # Load existing YAML
+            with open(filename, 'r') as file:
+                data = yaml.safe_load(file) or {}
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            # e.g. a half-edited file: overwriting it would drop everything else in it
+            raise RuntimeError(f"existing YAML could not be loaded, not saving: {e}") from e
+        root = data
+        # A section of a multi-person config is written back at its key path
+        for key in self.config_keys:
+            data = data.setdefault(key, {})
+
+        if not self.config_keys:
+            # Update only LADAqs
+            data['LADAqs'] = {}
+            for ladaq_name, info in self.LADAqs.items():
+                data['LADAqs'][ladaq_name] = {
+                    'com_port': info['com_port']
+                }
+
+            # Update Connection section
+            data['Connection'] = self.Connection
+        else:
+            # The config values this calibration is based on, see load_calibration
+            data['ConfigValues'] = copy.deepcopy(self._config_values)
 
 
         # Update only Interferometers
@@ -96,14 +441,123 @@ class Interferometer:
                 'V': float(params.V),
                 'VSrcCh': params.VSrcCh
             }
+            if params.Fit:
+                data['Interferometers'][intf_name]['Fit'] = params.Fit
 
-        # Write back full YAML
+        # Write back full YAML atomically (temp file + rename) so a crash
+        # mid-write never leaves a truncated calibration file behind.
+        # Errors are raised so flush() keeps the changes pending.
+        tmp_name = None
         try:
-            with open(filename, 'w') as file:
-                yaml.dump(data, file, default_flow_style=False)
+            directory = os.path.dirname(os.path.abspath(filename))
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as file:
+                tmp_name = file.name
+                yaml.dump(root, file, default_flow_style=False)
+                file.flush()
+                os.fsync(file.fileno())
+            # NamedTemporaryFile is created 0600; keep the permissions of the file it replaces
+            mode = stat.S_IMODE(os.stat(filename).st_mode) if os.path.exists(filename) else 0o644
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, filename)
             # print(f"Interferometer settings updated successfully in {filename}")
-        except Exception as e:
-            print(f"Error saving YAML file: {e}")
+        except Exception:
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+
+    def mark_dirty(self):
+        """Record a state change and flush to YAML if the time or count threshold is reached."""
+        with self._save_lock:
+            self._dirty = True
+            self._pending_changes += 1
+            elapsed = time.monotonic() - self._last_flush
+            if self._pending_changes >= self.flush_every or elapsed >= self.flush_interval:
+                self.flush()
+            else:
+                self._arm_flush_timer(self.flush_interval - elapsed)
+
+    def _arm_flush_timer(self, delay):
+        """Flush in the background after delay seconds unless a flush happens first."""
+        if self._flush_timer is None and self.filename:
+            self._flush_timer = threading.Timer(delay, _flush_if_alive, args=(weakref.ref(self),))
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """
+        Write pending Interferometer state to the YAML file if anything changed.
+        Returns False if the save failed; the changes then stay pending and
+        are retried on the next flush.
+        """
+        with self._save_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty or not self.filename:
+                return True
+            try:
+                self.save_yaml(self.filename)
+            except Exception as e:
+                print(f"Error saving YAML file {self.filename}, changes kept for the next flush: {e}")
+                # stay dirty, but retry after flush_interval / flush_every more changes, not on every change
+                self._pending_changes = 0
+                self._last_flush = time.monotonic()
+                self._arm_flush_timer(self.flush_interval)
+                return False
+            self._dirty = False
+            self._pending_changes = 0
+            self._last_flush = time.monotonic()
+            return True
+
+    # Calibration fields taken over from a reloaded config. V is left out: it is
+    # the live output voltage, owned by this object.
+    CALIBRATION_FIELDS = ('IntName', 'Out1', 'Out2',
+                          'Phase0Voltage', 'Phase90Voltage', 'Phase180Voltage', 'Phase270Voltage',
+                          'Phase0power', 'Phase90power', 'Phase180power', 'Phase270power', 'Fit')
+
+    def apply_config(self, section, previous=None):
+        """
+        Copy changed calibration from a reloaded "Interferometer" config section
+        into the InterferometerParams objects, keeping the LADAqs connected.
+
+        With previous (the section as it was in the file before) only fields
+        edited in the file are copied, so calibration changed by this process
+        since then is kept; without it every field differing from the live
+        value is. Copied values are saved to the calibration file. Returns the
+        changes that need the device re-created (interferometers added or
+        removed, a different VSrcCh, LADAq or Connection).
+        """
+        not_applied = []
+        updated = False
+        previous_params = (previous or {}).get('Interferometers') or {}
+        with self._save_lock:
+            for label, params in section['Interferometers'].items():
+                intf_obj = self.Interferometers.get(label)
+                if intf_obj is None:
+                    not_applied.append(f"interferometer {label} added")
+                    continue
+                if params.get('VSrcCh') != intf_obj.VSrcCh:
+                    not_applied.append(f"{label} VSrcCh {intf_obj.VSrcCh} -> {params.get('VSrcCh')}")
+                before = previous_params.get(label) if previous is not None else None
+                for field in self.CALIBRATION_FIELDS:
+                    old = before.get(field) if before is not None else getattr(intf_obj, field)
+                    if params.get(field) != old:
+                        setattr(intf_obj, field, params.get(field))
+                        updated = True
+                        print(f"{label}.{field} updated to {params.get(field)}")
+            not_applied += [f"interferometer {label} removed" for label in self.Interferometers
+                            if label not in section['Interferometers']]
+            if {name: info.get('com_port') for name, info in section['LADAqs'].items()} != \
+                    {name: info['com_port'] for name, info in self.LADAqs.items()}:
+                not_applied.append("LADAqs changed")
+            connection = {name: list(labels or []) for name, labels in (section.get('Connection') or {}).items()}
+            if connection != self.Connection:
+                not_applied.append("Connection changed")
+            if self.config_keys:
+                self._config_values = self._section_values(section)
+            if updated:
+                self.mark_dirty()
+        return not_applied
 
     def connect_LADAqs(self):
         """Connect all LADAqs mentioned in YAML."""
@@ -113,36 +567,89 @@ class Interferometer:
                 print(f"Skipping connection for {ladaq_name} (com_port is None)")
                 continue
             try:
-                self.LADAqs[ladaq_name]['device'] = LADAqBoard(com_port)
+                board_class = self.simulator.LADAqBoard if self.simulator is not None else LADAqBoard
+                if board_class is None:
+                    raise ImportError("LADaq_v1 is not installed")
+                self.LADAqs[ladaq_name]['device'] = board_class(com_port)
                 print(f"Connected to {ladaq_name} at {com_port}")
             except Exception as e:
                 print(f"Failed to connect to {ladaq_name}: {e}")
    
     def get_LADAq_for_interferometer(self, interferometer_name):
         """Return LADAqBoard object for a given interferometer name or object."""
-        # If it's an object, find the label
-        if isinstance(interferometer_name, InterferometerParams):
-            for name, obj in self.__dict__.items():
-                if obj is interferometer_name:
-                    interferometer_name = name
-                    break
+        ladaq_name = self._ladaq_by_label.get(self.get_label(interferometer_name))
+        if ladaq_name is None:
+            return None
+        return self.LADAqs[ladaq_name]['device']
 
-        for ladaq_name, intf_list in self.Connection.items():
-            if interferometer_name in intf_list:
-                return self.LADAqs[ladaq_name]['device']
-        return None
 
-    
-    def SetIntPhase(self, interferometer_name, voltage_source= None, voltage= None, sleep_time = 0.1):
-        """Set the voltage of the specified interferometer."""
+    @staticmethod
+    def ramp_trajectory(start, target, step):
+        """
+        Return the voltages to stream when ramping from start to target.
+
+        The array excludes start and always ends exactly on target; it has a
+        single element when the move is already within one step and is empty
+        when start equals target.
+        """
+        if target == start:
+            return np.empty(0)
+        n_steps = max(int(np.ceil(np.round(abs(target - start), 9) / step)), 1)
+        return np.linspace(start, target, n_steps + 1)[1:]
+
+    def _source_lock(self, voltage_source):
+        """Return the lock serialising writes to one LADAq board."""
+        with self._save_lock:
+            return self._source_locks.setdefault(id(voltage_source), threading.Lock())
+
+    def _ramp_channels(self, voltage_source, interferometers, voltages, max_slew_rate=None, persist=True):
+        """
+        Ramp several interferometers on the same LADAq board in lockstep.
+
+        Each trajectory is precomputed and the points for all channels are sent
+        together on every tick of the monotonic clock, so the whole move takes
+        as long as the longest single ramp. Interferometer V values are updated
+        to wherever the ramp stopped, even if a write fails; with persist=False
+        the move is not marked for saving to the YAML file.
+        """
+        if max_slew_rate is None:
+            max_slew_rate = self.max_slew_rate
+        step_period = self.ramp_step / max_slew_rate if max_slew_rate else 0.0
+
+        trajectories = [self.ramp_trajectory(intf.V, v, self.ramp_step) for intf, v in zip(interferometers, voltages)]
+        n_points = max(len(trajectory) for trajectory in trajectories)
+        written = [0] * len(trajectories)
+
+        with self._source_lock(voltage_source):
+            try:
+                t0 = time.monotonic()
+                for i in range(n_points):
+                    delay = t0 + i * step_period - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    for k, (intf, trajectory) in enumerate(zip(interferometers, trajectories)):
+                        if i < len(trajectory):
+                            voltage_source.VsetCh(float(trajectory[i]), intf.VSrcCh)
+                            written[k] += 1
+            finally:
+                for intf, trajectory, count in zip(interferometers, trajectories, written):
+                    if count:
+                        intf.V = float(trajectory[count - 1])
+                if any(written) and persist:
+                    self.mark_dirty()
+
+    def SetIntPhase(self, interferometer_name, voltage_source= None, voltage= None, sleep_time = 0.1, max_slew_rate=None, persist=True):
+        """
+        Set the voltage of the specified interferometer.
+
+        The voltage is ramped in ramp_step increments no faster than
+        max_slew_rate (V/s, defaults to self.max_slew_rate), then held for
+        sleep_time seconds to let the phase settle. persist=False skips marking
+        the new voltage for saving (transient moves such as lock dithering).
+        """
         # If given an object, find its label
         if isinstance(interferometer_name, InterferometerParams):
-            # Search for the label
-            interferometer_label = None
-            for name, obj in self.__dict__.items():
-                if obj is interferometer_name:
-                    interferometer_label = name
-                    break
+            interferometer_label = self.get_label(interferometer_name)
             if interferometer_label is None:
                 raise ValueError("Interferometer object not recognized!")
         else:
@@ -150,28 +657,16 @@ class Interferometer:
 
         interferometer = self.Interferometers[interferometer_label]
 
+        if voltage == interferometer.V:
+            return True  # already there: nothing to write and nothing to settle
+
         if voltage_source is None:
             voltage_source = self.get_LADAq_for_interferometer(interferometer_label)
 
         try:
-            Vmaxstep = 0.005
-
-            if (voltage - interferometer.V) == 0:
-                Vstep = 0
-            else:
-                Vstep = Vmaxstep * (voltage - interferometer.V) / abs(voltage - interferometer.V)
-
-            # Gradually adjust voltage
-            while abs(np.round(voltage - interferometer.V, 3)) > Vmaxstep:
-                voltage_source.VsetCh(interferometer.V, interferometer.VSrcCh)
-                print(f"Interferometer voltage is set to:{interferometer.V}")
-                interferometer.V += Vstep
-                time.sleep(sleep_time)
-
-            interferometer.V = voltage
-            voltage_source.VsetCh(voltage, interferometer.VSrcCh)
+            # Gradually adjust voltage along a precomputed trajectory
+            self._ramp_channels(voltage_source, [interferometer], [voltage], max_slew_rate, persist)
             time.sleep(sleep_time)
-            self.save_yaml(self.filename)
 
             # print(f"Set voltage {interferometer.V}V on {interferometer_name}")
             voltageSetStatus = True
@@ -182,6 +677,71 @@ class Interferometer:
 
         return voltageSetStatus
 
+    def SetPhases(self, targets, sleep_time=0.1, max_slew_rate=None):
+        """
+        Set several interferometers at once.
+
+        Parameters:
+            targets (dict): {label or InterferometerParams: voltage}
+            sleep_time (float): Settle time after all ramps have finished
+            max_slew_rate (float): Slew rate limit in V/s (defaults to self.max_slew_rate)
+
+        Interferometers on the same LADAq board are ramped in lockstep and
+        different boards are ramped in parallel threads, so the total time is
+        that of the longest ramp.
+
+        Returns:
+            dict: {label: True/False} voltage set status per interferometer
+        """
+        status = {}
+        boards = {}   # id(voltage_source) -> (voltage_source, [interferometers], [voltages])
+
+        for interferometer_name, voltage in targets.items():
+            interferometer_label = self.get_label(interferometer_name)
+            if interferometer_label is None:
+                print(f"Interferometer {interferometer_name} not recognized!")
+                status[interferometer_name] = False
+                continue
+
+            if voltage == self.Interferometers[interferometer_label].V:
+                status[interferometer_label] = True  # already there
+                continue
+
+            voltage_source = self.get_LADAq_for_interferometer(interferometer_label)
+            if voltage_source is None:
+                print(f"No connected LADAq for {interferometer_label}")
+                status[interferometer_label] = False
+                continue
+
+            _, intf_list, voltage_list = boards.setdefault(id(voltage_source), (voltage_source, [], []))
+            intf_list.append(self.Interferometers[interferometer_label])
+            voltage_list.append(voltage)
+
+        def ramp_board(voltage_source, intf_list, voltage_list):
+            try:
+                self._ramp_channels(voltage_source, intf_list, voltage_list, max_slew_rate)
+                ok = True
+            except Exception as e:
+                ok = False
+                print(f"Could not set the voltages for {[intf.label for intf in intf_list]}: {e}")
+            for intf in intf_list:
+                status[intf.label] = ok
+
+        board_jobs = list(boards.values())
+        if len(board_jobs) == 1:
+            ramp_board(*board_jobs[0])
+        else:
+            threads = [threading.Thread(target=ramp_board, args=job, daemon=True) for job in board_jobs]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        if board_jobs:
+            time.sleep(sleep_time)
+
+        return status
+
     # def feedbackSignal(self, Measurement_Inst, *args, **kwargs):
     #     try:
     #         if hasattr(Measurement_Inst, 'measure_power'):
@@ -261,9 +821,14 @@ class Interferometer:
 
         plot_live = kwargs.pop('plot_live', False)
         sleep_time = kwargs.pop('sleep_time', 5)
+        settle_time = kwargs.pop('settle_time', 0.3)          # extra wait before each reading
+        voltages_to_measure = kwargs.pop('voltages', None)   # explicit voltage list overrides voltage_range/step_size
+        if voltages_to_measure is None:
+            voltages_to_measure = np.arange(voltage_range[0], voltage_range[1], step_size)
 
         # Set up live plotting
         if plot_live:
+            import matplotlib.pyplot as plt  # deferred: only loaded when plotting
             plt.ion()
             fig, ax = plt.subplots()
             line, = ax.plot([], [], 'bo-')
@@ -272,9 +837,9 @@ class Interferometer:
             ax.set_ylabel("Feedback Value")
             ax.grid(True)
 
-        for voltage in np.arange(voltage_range[0], voltage_range[1], step_size):
+        for voltage in voltages_to_measure:
             self.SetIntPhase(Interferometer_name, voltage_source, voltage, sleep_time)
-            time.sleep(0.3)
+            time.sleep(settle_time)
             feedback_value = self.feedbackSignal(Measurement_Inst, *args, **kwargs)
             voltage_power_data.append((voltage, feedback_value))
             print(f"Voltage: {voltage:.3f}V, Feedback value: {feedback_value:.6f}")
@@ -293,6 +858,62 @@ class Interferometer:
 
         return voltage_power_data
 
+    def adaptive_sweep_voltage_and_measure_power(self, voltage_range, voltage_source, Interferometer_name, Measurement_Inst, step_size=0.02, coarse_step=0.1, fine_window=0.05, phase_response='linear', *args, **kwargs):
+        """
+        Coarse-to-fine fringe sweep.
+
+        A coarse pass at coarse_step is fitted with a sinusoidal fringe model,
+        then only the voltages within +/- fine_window of the predicted
+        Phase0/90/180/270 points of one full fringe are resampled at step_size. Returns the
+        merged (voltage, feedback) list sorted by voltage, in the same format
+        as sweep_voltage_and_measure_power.
+        """
+        voltage_power_data = self.sweep_voltage_and_measure_power(
+            voltage_range=voltage_range,
+            voltage_source=voltage_source,
+            Interferometer_name=Interferometer_name,
+            Measurement_Inst=Measurement_Inst,
+            step_size=coarse_step,
+            *args, **kwargs
+        )
+
+        voltages, powers = zip(*voltage_power_data)
+        powers = [np.nan if p is None else p for p in powers]
+        fit = fit_fringe(voltages, powers, response=phase_response)
+        if fit is None:
+            print("Coarse sweep could not be fitted, returning coarse data only")
+            return voltage_power_data
+
+        phase_points = fit.phase_points(voltage_range)
+        if phase_points is None:
+            # Less than one full fringe in range, refine around whatever extrema/quadratures exist
+            targets = np.concatenate([fit.voltages_for_phase(phase, voltage_range) for phase in (0, 90, 180, 270)])
+        else:
+            targets = np.array(list(phase_points.values()))
+        fine_voltages = np.concatenate([np.arange(t - fine_window, t + fine_window + step_size / 2, step_size) for t in targets]) if targets.size else np.array([])
+        fine_voltages = np.unique(np.round(fine_voltages[(fine_voltages >= voltage_range[0]) & (fine_voltages < voltage_range[1])], 6))
+
+        # Skip points the coarse pass already measured
+        measured = np.asarray(voltages)
+        if fine_voltages.size:
+            nearest = np.min(np.abs(fine_voltages[:, None] - measured[None, :]), axis=1)
+            fine_voltages = fine_voltages[nearest > step_size / 2]
+
+        print(f"Coarse fit: period={fit.period:.3f} V, resampling {fine_voltages.size} points around {targets.size} phase points")
+
+        if fine_voltages.size:
+            voltage_power_data += self.sweep_voltage_and_measure_power(
+                voltage_range=voltage_range,
+                voltage_source=voltage_source,
+                Interferometer_name=Interferometer_name,
+                Measurement_Inst=Measurement_Inst,
+                step_size=step_size,
+                voltages=fine_voltages,
+                *args, **kwargs
+            )
+
+        return sorted(voltage_power_data, key=lambda vp: vp[0])
+
     def CharaterizeInterferometers(self, SupportingFuncs, interferometer_list, voltage_range=(0, 5), voltage_source=None, Measurement_Inst=None, step_size=0.02, tolerance=0.01, UpdateVoltage=True, plotVoltagePower=True,  *args, **kwargs):
         """
         Optimize interferometer phase by sweeping through a voltage range.
@@ -307,19 +928,26 @@ class Interferometer:
             tolerance (float): Tolerance used when finding extrema
             UpdateVoltage (bool): Whether to update the interferometer voltages
             plotVoltagePower (bool): Whether to plot voltage vs power
+
+        Optional kwargs:
+            adaptive (bool): Use the coarse-to-fine sweep instead of a uniform one
+            coarse_step (float): Step size of the adaptive coarse pass (default 0.1 V)
+            fine_window (float): Half-width resampled around each phase point (default 0.05 V)
+            phase_response (str): 'linear' or 'quadratic' (thermal shifter) fringe model
         """
         # If a single interferometer object is passed, wrap it in a list
         if not isinstance(interferometer_list, (list, tuple)):
             interferometer_list = [interferometer_list]
 
+        adaptive = kwargs.pop('adaptive', False)
+        coarse_step = kwargs.pop('coarse_step', 0.1)
+        fine_window = kwargs.pop('fine_window', 0.05)
+        phase_response = kwargs.pop('phase_response', 'linear')
+
         for interferometer_obj in interferometer_list:
             try:
-                # Find the label dynamically for printing
-                interferometer_label = None
-                for name, obj in self.__dict__.items():
-                    if obj is interferometer_obj:
-                        interferometer_label = name
-                        break
+                # Find the label for printing
+                interferometer_label = self.get_label(interferometer_obj)
 
                 if interferometer_label is None:
                     interferometer_label = str(interferometer_obj)  # fallback to object print
@@ -327,14 +955,27 @@ class Interferometer:
                 print(f"\n--- Starting optimization for {interferometer_label} ---")
 
                 # Sweep voltage and measure power
-                voltage_power_data = self.sweep_voltage_and_measure_power(
-                    voltage_range=voltage_range,
-                    step_size=step_size,
-                    voltage_source=voltage_source,
-                    Interferometer_name=interferometer_obj,
-                    Measurement_Inst=Measurement_Inst,
-                    *args, **kwargs
-                )
+                if adaptive:
+                    voltage_power_data = self.adaptive_sweep_voltage_and_measure_power(
+                        voltage_range=voltage_range,
+                        step_size=step_size,
+                        coarse_step=coarse_step,
+                        fine_window=fine_window,
+                        phase_response=phase_response,
+                        voltage_source=voltage_source,
+                        Interferometer_name=interferometer_obj,
+                        Measurement_Inst=Measurement_Inst,
+                        *args, **kwargs
+                    )
+                else:
+                    voltage_power_data = self.sweep_voltage_and_measure_power(
+                        voltage_range=voltage_range,
+                        step_size=step_size,
+                        voltage_source=voltage_source,
+                        Interferometer_name=interferometer_obj,
+                        Measurement_Inst=Measurement_Inst,
+                        *args, **kwargs
+                    )
 
                 # Find the extrema
                 # supportfunc = SupportingFuncs()  # Instantiate
@@ -347,10 +988,11 @@ class Interferometer:
 
                 # Update the interferometer voltages based on the extrema
                 if UpdateVoltage:
-                    self.UpdateIntVoltages(voltage_power_data, min_voltages, max_voltages, interferometer_obj)
+                    self.UpdateIntVoltages(voltage_power_data, min_voltages, max_voltages, interferometer_obj, phase_response=phase_response)
 
                 # Save after each optimization
-                self.save_yaml(self.filename)
+                self.mark_dirty()
+                self.flush()
 
                 # Plot the scan
                 if plotVoltagePower:
@@ -361,98 +1003,203 @@ class Interferometer:
             except Exception as e:
                 print(f"Error during Characterization for {interferometer_label}: {e}")
 
-    def UpdateIntVoltages(self, voltage_power_data, min_voltages, max_voltages, interferometer_obj):
-        """Update the voltages for Phase0, Phase90, Phase180, and Phase270 based on the optimization."""
-        try:
-            voltages, powers = zip(*voltage_power_data)
-            min_power = min(powers)
-            max_power = max(powers)
-            power_range = max_power - min_power
-            avg_power = min_power + power_range / 2
-
-            Phase0Voltage, Phase0power = [], []
-            Phase90Voltage, Phase90power = [], []
-            Phase180Voltage, Phase180power = [], []
-            Phase270Voltage, Phase270power = [], []
-
-            tolerance = 0.05  # Adjustable if needed
+    def UpdateIntVoltages(self, voltage_power_data, min_voltages, max_voltages, interferometer_obj, phase_response='linear', max_phase_voltage=4.8):
+        """
+        Update the voltages for Phase0, Phase90, Phase180, and Phase270 based on the optimization.
 
+        The sweep is fitted with a sinusoidal fringe model and the four phase
+        voltages/powers are read off the fit for one full fringe below
+        max_phase_voltage, preferring the fringe whose maximum is nearest the
+        first entry of max_voltages. The fit parameters, R^2 and visibility
+        are stored in interferometer_obj.Fit.
+        """
+        try:
             # Find the label of the interferometer (IntE, IntF, etc.)
-            interferometer_label = None
-            for name, obj in self.__dict__.items():
-                if obj is interferometer_obj:
-                    interferometer_label = name
-                    break
+            interferometer_label = self.get_label(interferometer_obj)
 
             if interferometer_label is None:
                 raise ValueError("Interferometer object not found for UpdateIntVoltages.")
-            
-            for min_voltage in min_voltages:
-                for max_voltage in max_voltages:
-                    if min_voltage > max_voltage:
-                        mid_voltage = (min_voltage + max_voltage) / 2
-                        phase270_voltage = min_voltage + abs((min_voltage - max_voltage) / 2)
-
-                        if mid_voltage and max_voltage < 4.8 and phase270_voltage < 4.8:
-                            for voltage, power in voltage_power_data:
-                                if np.isclose(voltage, max_voltage, atol=tolerance):
-                                    Phase0Voltage.append(voltage)
-                                    Phase0power.append(power)
-                                if np.isclose(voltage, min_voltage, atol=tolerance):
-                                    Phase180Voltage.append(voltage)
-                                    Phase180power.append(power)
-
-                                # Phase90Voltage.append(mid_voltage)
-                                Phase90power.append(avg_power)
-
-                                # Phase270Voltage.append(phase270_voltage)
-                                Phase270power.append(avg_power)
-                                
-                                if np.isclose(power, avg_power, atol=tolerance * avg_power):
-                                    if max_voltage < voltage < min_voltage:
-                                        Phase90Voltage.append(voltage)
-                                        # Phase90power.append(power)
-                                    if min_voltage < voltage < phase270_voltage:
-                                        Phase270Voltage.append(voltage)
-                                        # Phase270power.append(power)
-
-                            def mean_if_not_empty(values, label):
-                                if values:
-                                    return np.mean(values)
-                                else:
-                                    print(f"{label} is empty")
-                                    return 0
-
-                            # Save back into the interferometer object
-                            interferometer_obj.Phase0Voltage = mean_if_not_empty(Phase0Voltage, 'Phase0Voltage')
-                            interferometer_obj.Phase0power = mean_if_not_empty(Phase0power, 'Phase0power')
-
-                            interferometer_obj.Phase90Voltage = mean_if_not_empty(Phase90Voltage, 'Phase90Voltage')
-                            interferometer_obj.Phase90power = mean_if_not_empty(Phase90power, 'Phase90power')
-
-                            interferometer_obj.Phase180Voltage = mean_if_not_empty(Phase180Voltage, 'Phase180Voltage')
-                            interferometer_obj.Phase180power = mean_if_not_empty(Phase180power, 'Phase180power')
-
-                            interferometer_obj.Phase270Voltage = mean_if_not_empty(Phase270Voltage, 'Phase270Voltage')
-                            interferometer_obj.Phase270power = mean_if_not_empty(Phase270power, 'Phase270power')
-
-                            print(f"Updated Voltages for {interferometer_label}:")
-                            print(f"Phase0: {interferometer_obj.Phase0Voltage}")
-                            print(f"Phase90: {interferometer_obj.Phase90Voltage}")
-                            print(f"Phase180: {interferometer_obj.Phase180Voltage}")
-                            print(f"Phase270: {interferometer_obj.Phase270Voltage}")
-                            return  # Exit after updating
-
-            # If no valid points found
-            print(f"No suitable voltage combination found for {interferometer_label}. Setting defaults.")
-            interferometer_obj.Phase0Voltage = 0.1
-            interferometer_obj.Phase90Voltage = 0.1
-            interferometer_obj.Phase180Voltage = 0.1
-            interferometer_obj.Phase270Voltage = 0.1
+
+            voltages, powers = zip(*voltage_power_data)
+            powers = [np.nan if p is None else p for p in powers]
+            fit = fit_fringe(voltages, powers, response=phase_response)
+
+            phase_points = None
+            if fit is not None:
+                voltage_range = (min(voltages), min(max(voltages), max_phase_voltage))
+                near = max_voltages[0] if len(max_voltages) else None
+                phase_points = fit.phase_points(voltage_range, near=near)
+
+            if phase_points is None:
+                # If no valid points found
+                print(f"No suitable voltage combination found for {interferometer_label}. Setting defaults.")
+                interferometer_obj.Phase0Voltage = 0.1
+                interferometer_obj.Phase90Voltage = 0.1
+                interferometer_obj.Phase180Voltage = 0.1
+                interferometer_obj.Phase270Voltage = 0.1
+                return
+
+            phase_powers = fit.predict([phase_points[phase] for phase in (0, 90, 180, 270)])
+
+            # Save back into the interferometer object
+            interferometer_obj.Phase0Voltage, interferometer_obj.Phase0power = phase_points[0], float(phase_powers[0])
+            interferometer_obj.Phase90Voltage, interferometer_obj.Phase90power = phase_points[90], float(phase_powers[1])
+            interferometer_obj.Phase180Voltage, interferometer_obj.Phase180power = phase_points[180], float(phase_powers[2])
+            interferometer_obj.Phase270Voltage, interferometer_obj.Phase270power = phase_points[270], float(phase_powers[3])
+            interferometer_obj.Fit = fit.to_dict()
+
+            print(f"Updated Voltages for {interferometer_label}:")
+            print(f"Phase0: {interferometer_obj.Phase0Voltage}")
+            print(f"Phase90: {interferometer_obj.Phase90Voltage}")
+            print(f"Phase180: {interferometer_obj.Phase180Voltage}")
+            print(f"Phase270: {interferometer_obj.Phase270Voltage}")
+            print(f"Fit: period={fit.period:.4f}, R^2={fit.r_squared}, visibility={fit.visibility:.4f}")
 
         except Exception as e:
             print(f"Error during UpdateIntVoltages: {e}")
 
+    def _measure_stable(self, Measurement_Inst, timeout=30, settle_time=1, *args, **kwargs):
+        """
+        Take pairs of feedback readings settle_time apart until two agree within 5%
+        (two equal readings, including zero, always agree).
+
+        Raises TimeoutError if no stable reading is obtained within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            p1 = self.feedbackSignal(Measurement_Inst, *args, **kwargs)
+            time.sleep(settle_time)
+            p2 = self.feedbackSignal(Measurement_Inst, *args, **kwargs)
+            if p1 is not None and p2 is not None and abs(p2 - p1) <= 0.05 * max(abs(p1), abs(p2)):
+                return p2
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Feedback signal did not stabilise within {timeout} s (last readings {p1}, {p2})")
+
+    def fringe_model(self, interferometer_obj):
+        """
+        Return the FringeFit for an interferometer: the stored fit if present,
+        otherwise a linear model built from the Phase0/Phase180 calibration.
+        """
+        if interferometer_obj.Fit:
+            return FringeFit.from_dict(interferometer_obj.Fit)
+
+        V0, P0 = interferometer_obj.Phase0Voltage, interferometer_obj.Phase0power
+        V180, P180 = interferometer_obj.Phase180Voltage, interferometer_obj.Phase180power
+        if V0 is None or V180 is None or V0 == V180:
+            return None
+        period = 2 * abs(V180 - V0)
+        return FringeFit(offset=(P0 + P180) / 2, amplitude=(P0 - P180) / 2, period=period,
+                         phase=-2 * np.pi * V0 / period)
+
+    def _model_lock(
+        self,
+        target_power,
+        mode,
+        voltage_source,
+        interferometer_obj,
+        Measurement_Inst,
+        measurement_function,
+        tolerance,
+        power_tolerance,
+        max_iterations,
+        min_step_size,
+        max_time,
+        *args,
+        **kwargs
+        ):
+        """
+        Model-based phase lock engine.
+
+        Jumps to the voltage predicted by the fringe model for the requested
+        mode ('minimum', 'maximum' or numeric 'target'), then refines with a
+        golden-section search (extrema) or Newton steps using the model slope
+        (target), within max_iterations measurements and max_time seconds.
+        Returns the final voltage.
+        """
+        model = self.fringe_model(interferometer_obj)
+        if model is None:
+            raise ValueError(f"No fringe calibration available for {interferometer_obj.IntName}")
+
+        kwargs.setdefault("measurement_function", measurement_function)
+        stable_timeout = kwargs.pop('stable_timeout', 10)
+        settle_time = kwargs.pop('settle_time', 0.2)
+        deadline = time.monotonic() + max_time
+        curV = interferometer_obj.V
+
+        def measure_at(voltage):
+            self.SetIntPhase(interferometer_obj, voltage_source, voltage)
+            return self._measure_stable(Measurement_Inst, stable_timeout, settle_time, *args, **kwargs)
+
+        def nearest(candidates):
+            candidates = np.asarray(candidates)
+            return float(candidates[np.argmin(np.abs(candidates - curV))]) if candidates.size else None
+
+        # one fringe period either side; voltage spans follow the model's response
+        low, high = model.voltage_window(curV, 360)
+        search_range = (max(low, 0), high)
+
+        if mode in ('minimum', 'maximum'):
+            predV = nearest(model.voltages_for_phase(180 if mode == 'minimum' else 0, search_range))
+            if predV is None:
+                predV = curV
+            print(f"[Model] predicted {mode} at {predV:.4f} V")
+
+            # golden-section search around the prediction
+            sign = 1 if mode == 'minimum' else -1
+            invphi = (np.sqrt(5) - 1) / 2
+            a, b = model.voltage_window(predV, 45)
+            a = max(a, 0)
+            c, d = b - invphi * (b - a), a + invphi * (b - a)
+            fc, fd = sign * measure_at(c), sign * measure_at(d)
+            it = 2
+            while abs(b - a) > min_step_size and it < max_iterations and time.monotonic() < deadline:
+                if fc < fd:
+                    b, d, fd = d, c, fc
+                    c = b - invphi * (b - a)
+                    fc = sign * measure_at(c)
+                else:
+                    a, c, fc = c, d, fd
+                    d = a + invphi * (b - a)
+                    fd = sign * measure_at(d)
+                it += 1
+            bestV = c if fc < fd else d
+            P_best = sign * min(fc, fd)
+            self.SetIntPhase(interferometer_obj, voltage_source, bestV)
+            print(f"[Model] {mode} at {bestV:.4f} V, P={P_best:.6f} after {it} measurements")
+            return bestV
+
+        # numeric target: solve cos(theta) = (target - offset) / amplitude on the model
+        ratio = np.clip((target_power - model.offset) / model.amplitude, -1, 1)
+        theta = np.rad2deg(np.arccos(ratio))
+        predV = nearest(np.concatenate([model.voltages_for_phase(theta, search_range),
+                                        model.voltages_for_phase(360 - theta, search_range)]))
+        if predV is None:
+            predV = curV
+        print(f"[Model] predicted target at {predV:.4f} V")
+
+        V = predV
+        P = measure_at(V)
+        for it in range(1, max_iterations + 1):
+            err_rel = (P - target_power) / target_power
+            if abs(err_rel) < tolerance or abs(P - target_power) < power_tolerance:
+                print(f"[Model] converged at {V:.4f} V (rel_err={err_rel*100:.2f}%)")
+                return V
+            if time.monotonic() >= deadline:
+                break
+            slope = float(model.slope(V))
+            if abs(slope) < 1e-12:
+                break
+            low, high = model.voltage_window(V, 45)
+            step = float(np.clip((target_power - P) / slope, low - V, high - V))
+            if abs(step) < min_step_size:
+                step = np.sign(step) * min_step_size
+            V = max(V + step, 0)
+            P = measure_at(V)
+            print(f"[Model {it}] V={V:.4f}, P={P:.6f}")
+
+        print(f"[Model] budget reached; V={V:.4f}, P={P:.6f}")
+        return V
+
     def _gradient_descent(
         self,
         initial_voltage,
@@ -491,15 +1238,11 @@ class Interferometer:
         delta = 0.05#min_step_size
 
         kwargs.setdefault("measurement_function", measurement_function)
+        stable_timeout = kwargs.pop('stable_timeout', 30)
 
         # helper to measure stabilized power
         def measure_stable():
-            while True:
-                p1 = self.feedbackSignal(Measurement_Inst, *args, **kwargs)
-                time.sleep(1)
-                p2 = self.feedbackSignal(Measurement_Inst, *args, **kwargs)
-                if p1 and p1>0 and abs(p2-p1)/p1 < 0.05:
-                    return p2
+            return self._measure_stable(Measurement_Inst, stable_timeout, 1, *args, **kwargs)
 
         P_prev = measure_stable()
 
@@ -595,6 +1338,15 @@ class Interferometer:
         - numeric target_power (mode='target')
         - 'minimum'       (mode='minimize')
         - 'maximum'/'maximize' (mode='maximize')
+
+        Optional kwargs:
+            method (str): 'gradient' (default) or 'model' to jump to the voltage
+                predicted by the stored fringe calibration and refine from there
+            max_time (float): Time budget in seconds for the 'model' method (default 60)
+            stable_timeout (float): Give up waiting for a stable reading after this many seconds
+
+        Raises TimeoutError if the feedback signal does not stabilise within
+        stable_timeout; the interferometer is left at the last voltage set.
         """
         # pick mode
         if isinstance(target_power, str) and target_power.lower() in ('minimum','maximum'):
@@ -629,6 +1381,26 @@ class Interferometer:
                     + interferometer_obj.Phase180Voltage
                 )
 
+        method = kwargs.pop('method', 'gradient')
+        max_time = kwargs.pop('max_time', 60)
+
+        if method == 'model':
+            return self._model_lock(
+                target_power=numeric_target,
+                mode=mode,
+                voltage_source=voltage_source,
+                interferometer_obj=interferometer_obj,
+                Measurement_Inst=Measurement_Inst,
+                measurement_function=kwargs.pop('measurement_function', 'measure_power'),
+                tolerance=tolerance,
+                power_tolerance=power_tolerance,
+                max_iterations=max_iterations,
+                min_step_size=min_step_size,
+                max_time=max_time,
+                *args,
+                **kwargs
+            )
+
         # call GD engine
         return self._gradient_descent(
             initial_voltage=initV,
@@ -662,11 +1434,8 @@ class Interferometer:
         # Handle if an object is passed instead of string
         if isinstance(interferometer_name, InterferometerParams):
             # Find the label (e.g., 'IntE')
-            for name, obj in self.__dict__.items():
-                if obj is interferometer_name:
-                    interferometer_name = name
-                    break
-            else:
+            interferometer_name = self.get_label(interferometer_name)
+            if interferometer_name is None:
                 raise ValueError("Provided interferometer object not found in Interferometer class.")
 
         # Now interferometer_name is string
@@ -690,6 +1459,7 @@ class Interferometer:
 
     def plot_voltage_vs_power(self, voltage_power_data):
         """Plot voltage vs. power."""
+        import matplotlib.pyplot as plt  # deferred: only loaded when plotting
         voltages, powers = zip(*voltage_power_data)
         plt.figure()
         plt.plot(voltages, powers, marker='o')
@@ -789,11 +1559,25 @@ class Interferometer:
         interval_seconds=5,
         N=100,
         save_data=True,
-        plot_live=True
+        plot_live=True,
+        plot_fps=2,
+        plot_points=100000,
+        save_chunk=100
     ):
         """
         Monitor interferometer stability by locking to a fixed phase voltage and logging power.
 
+        Running mean/std are updated in O(1) per sample, the plot keeps at most
+        plot_points samples in a ring buffer and redraws at plot_fps, and data
+        is appended to disk every save_chunk samples, so CPU and memory stay
+        flat over multi-day runs.
+
+        The data ends up in stability_<IntName>_<timestamp>.npz (arrays time in
+        minutes and power in mW). During the run the samples are appended to
+        a .npz.part file of float64 (time, power) pairs, which is turned into
+        the .npz at the end; after a crash it can be read with
+        np.fromfile(name, dtype=float).reshape(-1, 2).
+
         Parameters
         ----------
         interferometer_obj : InterferometerParams
@@ -809,12 +1593,17 @@ class Interferometer:
         N : int
             Number of power samples to average per reading.
         save_data : bool
-            Save time and power arrays to an .npz file if True.
+            Save time and power to an .npz file if True.
         plot_live : bool
             Show a live plot during the measurement.
+        plot_fps : float
+            Maximum live plot redraws per second.
+        plot_points : int
+            Number of most recent samples kept for the live plot.
+        save_chunk : int
+            Number of samples buffered before each append to disk.
         """
         import numpy as np
-        import matplotlib.pyplot as plt
         import time
         from datetime import datetime
 
@@ -826,10 +1615,24 @@ class Interferometer:
         else:
           print(f"\n--- Starting stability monitoring for {interferometer_obj.IntName} at previously applied voltage ---")
 
-        times = []
-        powers = []
+        stats = RunningStats()
+        history = RingBuffer(plot_points, columns=2)
+        first_power = last_power = None
+
+        save_file = None
+        pending = []
+        if save_data:
+            filename = f"stability_{interferometer_obj.IntName}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
+            save_file = open(filename + '.part', 'wb')
+
+        def write_pending():
+            if save_file is not None and pending:
+                np.asarray(pending, dtype=float).tofile(save_file)
+                save_file.flush()
+            pending.clear()
 
         if plot_live:
+            import matplotlib.pyplot as plt  # deferred: only loaded when plotting
             plt.ion()
             fig, ax = plt.subplots()
             power_line, = ax.plot([], [], 'b.-', label="Power (dBm)")
@@ -841,6 +1644,7 @@ class Interferometer:
             ax.set_ylabel("Power (dBm)")
             ax.grid(True)
             ax.legend()
+            last_draw = 0.0
 
         start_time = time.time()
         end_time = start_time + duration_minutes * 60
@@ -850,20 +1654,30 @@ class Interferometer:
                 elapsed_min = (time.time() - start_time) / 60
                 power = np.mean(power_meter.measure_power(N=N))/1e-3 # Converting W to mW
 
-                times.append(elapsed_min)
-                powers.append(power)
-
-                mean_p = np.mean(powers)
-                std_p = np.std(powers)
-
-                if plot_live:
+                stats.update(power)
+                history.append((elapsed_min, power))
+                if first_power is None:
+                    first_power = power
+                last_power = power
+                if save_file is not None:
+                    pending.append((elapsed_min, power))
+                    if len(pending) >= save_chunk:
+                        write_pending()
+
+                mean_p = stats.mean
+                std_p = stats.std
+
+                if plot_live and time.monotonic() - last_draw >= 1 / plot_fps:
+                    times, powers = history.view().T
+                    span = [times[0], times[-1]]
                     power_line.set_data(times, powers)
-                    mean_line.set_data(times, [mean_p] * len(times))
-                    std_upper.set_data(times, [mean_p + std_p] * len(times))
-                    std_lower.set_data(times, [mean_p - std_p] * len(times))
+                    mean_line.set_data(span, [mean_p, mean_p])
+                    std_upper.set_data(span, [mean_p + std_p, mean_p + std_p])
+                    std_lower.set_data(span, [mean_p - std_p, mean_p - std_p])
                     ax.relim()
                     ax.autoscale_view()
                     plt.pause(0.01)
+                    last_draw = time.monotonic()
 
                 try:
                     print(f"[{elapsed_min:.2f} min] Power: {power:.3f} mW | Mean: {mean_p:.3f} mW| Std: {std_p:.6f} mW")
@@ -873,20 +1687,253 @@ class Interferometer:
 
         except KeyboardInterrupt:
             print("Monitoring interrupted.")
+        finally:
+            if save_file is not None:
+                write_pending()
+                save_file.close()
+                data = np.fromfile(save_file.name, dtype=float).reshape(-1, 2)
+                np.savez(filename, time=data[:, 0], power=data[:, 1])
+                os.remove(save_file.name)
+                print(f"Data saved to {filename}")
 
         if plot_live:
             plt.ioff()
             plt.show()
 
         print(f"\n--- Summary for {interferometer_obj.IntName} ---")
-        print(f"Mean Power: {np.mean(powers):.3f} dBm")
-        print(f"Std Dev:    {np.std(powers):.3f} dB")
-        print(f"Drift:      {powers[-1] - powers[0]:.3f} dB")
+        if stats.count:
+            print(f"Mean Power: {stats.mean:.3f} dBm")
+            print(f"Std Dev:    {stats.std:.3f} dB")
+            print(f"Drift:      {last_power - first_power:.3f} dB")
 
-        if save_data:
-            filename = f"stability_{interferometer_obj.IntName}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
-            np.savez(filename, time=np.array(times), power=np.array(powers))
-            print(f"Data saved to {filename}")
+    def start_phase_lock(self, interferometer_obj, Measurement_Inst, phase=90, target_power=None, *args, **kwargs):
+        """
+        Start a background PhaseLock holding interferometer_obj at a calibrated
+        phase (0/90/180/270) or at a numeric target_power. Any running lock on
+        the same interferometer is stopped first. Extra args/kwargs are passed
+        to PhaseLock (e.g. interval, dither, measurement_function, N=...).
+        """
+        label = self.get_label(interferometer_obj)
+        self.stop_phase_lock(label)
+        lock = PhaseLock(self, interferometer_obj, Measurement_Inst, phase=phase, target_power=target_power, *args, **kwargs)
+        self.phase_locks[label] = lock
+        lock.start()
+        return lock
+
+    def stop_phase_lock(self, interferometer_obj=None):
+        """Stop the PhaseLock of one interferometer, or all of them if none is given."""
+        labels = list(self.phase_locks) if interferometer_obj is None else [self.get_label(interferometer_obj)]
+        for label in labels:
+            lock = self.phase_locks.pop(label, None)
+            if lock is not None:
+                lock.stop()
+
+
+class RunningStats:
+    """Welford running mean/variance, O(1) per update."""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class RingBuffer:
+    """
+    Fixed-width NumPy row buffer that grows by doubling up to capacity rows,
+    then overwrites the oldest rows.
+    """
+    def __init__(self, capacity, columns=1, initial_size=1024):
+        self.capacity = capacity
+        self._data = np.empty((min(initial_size, capacity), columns))
+        self._start = 0
+        self.size = 0
+
+    def append(self, row):
+        if self.size == self._data.shape[0] and self.size < self.capacity:
+            grown = np.empty((min(2 * self.size, self.capacity), self._data.shape[1]))
+            grown[:self.size] = self.view()
+            self._data = grown
+            self._start = 0
+        if self.size < self._data.shape[0]:
+            self._data[(self._start + self.size) % self._data.shape[0]] = row
+            self.size += 1
+        else:
+            self._data[self._start] = row
+            self._start = (self._start + 1) % self._data.shape[0]
+
+    def view(self):
+        """Return the rows oldest-first (a view unless the buffer has wrapped)."""
+        end = self._start + self.size
+        if end <= self._data.shape[0]:
+            return self._data[self._start:end]
+        return np.concatenate([self._data[self._start:], self._data[:end - self._data.shape[0]]])
+
+
+class PhaseLock:
+    """
+    Background dither lock holding one interferometer at a fixed phase.
+
+    Every interval seconds the loop sets V +/- dither, takes one feedback
+    reading at each side and estimates the local fringe slope. For extrema
+    (phase 0/180) it steps towards the zero of the slope, using the fringe
+    curvature for scale; for quadrature phases (90/270) and numeric targets
+    it takes a Newton step on the power error. Steps are scaled by gain and
+    clipped to max_step, so the loop costs two short ramps and two readings
+    per interval. The +/- dither appears on the interferometer output while
+    locked.
+    """
+    def __init__(self, interferometer, interferometer_obj, Measurement_Inst, phase=90, target_power=None,
+                 measurement_function='measure_power', interval=1.0, dither=0.005, gain=0.5, max_step=0.02,
+                 settle_time=0.05, lock_tolerance=0.05, *args, **kwargs):
+        self.interferometer = interferometer
+        self.interferometer_obj = interferometer_obj
+        self.Measurement_Inst = Measurement_Inst
+        self.voltage_source = interferometer.get_LADAq_for_interferometer(interferometer_obj)
+        self.interval = interval
+        self.dither = dither
+        self.gain = gain
+        self.max_step = max_step
+        self.settle_time = settle_time
+        self.lock_tolerance = lock_tolerance
+        self.args = args
+        self.kwargs = dict(kwargs, measurement_function=measurement_function)
+
+        self.model = interferometer.fringe_model(interferometer_obj)
+        if self.model is None:
+            raise ValueError(f"No fringe calibration available for {interferometer_obj.IntName}")
+
+        if target_power is not None:
+            self.mode = 'target'
+            self.phase = None
+            self.target_power = float(target_power)
+        else:
+            self.phase = int(phase) % 360
+            self.mode = {0: 'maximum', 180: 'minimum'}.get(self.phase, 'target')
+            self.target_power = float(getattr(interferometer_obj, f"Phase{self.phase}power"))
+
+        self.error_stats = RunningStats()
+        self.iterations = 0
+        self.last_error = None
+        self.last_power = None
+        self.last_update = None
+        self.locked = False
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"PhaseLock-{self.interferometer_obj.IntName}", daemon=True)
+        self._thread.start()
+        print(f"Phase lock started for {self.interferometer_obj.IntName} ({self.mode}, target {self.target_power:.6g})")
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        print(f"Phase lock stopped for {self.interferometer_obj.IntName}")
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        """Return lock state and error statistics as a dict."""
+        return {
+            'running': self.running,
+            'locked': self.locked,
+            'mode': self.mode,
+            'phase': self.phase,
+            'target_power': self.target_power,
+            'voltage': self.interferometer_obj.V,
+            'last_power': self.last_power,
+            'last_error': self.last_error,
+            'mean_error': self.error_stats.mean,
+            'rms_error': float(np.sqrt(self.error_stats.variance + self.error_stats.mean ** 2)),
+            'std_error': float(self.error_stats.std),
+            'iterations': self.iterations,
+            'last_update': self.last_update,
+        }
+
+    def _curvature(self, voltage):
+        """|d2P/dV2| of the fringe at an extremum near voltage, for step scaling."""
+        k = 2 * np.pi / abs(self.model.period)
+        # chain rule for x = V^2: dtheta/dV = k * 2V (kept away from 0 at V = 0)
+        dx_dv = 2 * max(voltage, self.dither) if self.model.response == 'quadratic' else 1.0
+        return abs(self.model.amplitude) * (k * dx_dv) ** 2
+
+    def _measure_at(self, voltage):
+        # dither moves are transient, so they are not marked for saving
+        self.interferometer.SetIntPhase(self.interferometer_obj, self.voltage_source, voltage, sleep_time=self.settle_time, persist=False)
+        return self.interferometer.feedbackSignal(self.Measurement_Inst, *self.args, **self.kwargs)
+
+    def step(self):
+        """Run one dither/correction cycle and return the applied voltage step."""
+        V = self.interferometer_obj.V
+        P_plus = self._measure_at(V + self.dither)
+        P_minus = self._measure_at(max(V - self.dither, 0))
+        if P_plus is None or P_minus is None:
+            self.interferometer.SetIntPhase(self.interferometer_obj, self.voltage_source, V, sleep_time=0, persist=False)
+            return 0.0
+
+        slope = (P_plus - P_minus) / (2 * self.dither)
+        P = (P_plus + P_minus) / 2
+        error = P - self.target_power
+
+        if self.mode in ('maximum', 'minimum'):
+            # distance to the extremum estimated from slope and fringe curvature
+            offset = slope / self._curvature(V)
+            step = self.gain * offset if self.mode == 'maximum' else -self.gain * offset
+            locked = abs(offset) < self.lock_tolerance * abs(self.model.period) / 4
+        else:
+            if abs(slope) < 1e-12:
+                slope = float(self.model.slope(V))
+            step = -self.gain * error / slope if abs(slope) > 1e-12 else 0.0
+            # 90 sits on the falling and 270 on the rising edge; walk off the wrong edge
+            if (self.phase == 90 and slope > 0) or (self.phase == 270 and slope < 0):
+                step = self.max_step
+            locked = abs(error) < self.lock_tolerance * 2 * abs(self.model.amplitude) and step != self.max_step
+        step = float(np.clip(step, -self.max_step, self.max_step))
+        self.interferometer.SetIntPhase(self.interferometer_obj, self.voltage_source, max(V + step, 0), sleep_time=0)
+
+        self.iterations += 1
+        self.last_power = P
+        self.last_error = error
+        self.last_update = time.time()
+        self.error_stats.update(error)
+        self.locked = locked
+        return step
+
+    def _run(self):
+        next_time = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                self.locked = False
+                print(f"Phase lock error for {self.interferometer_obj.IntName}: {e}")
+            next_time += self.interval
+            self._stop_event.wait(max(next_time - time.monotonic(), 0))
 
 
 if __name__ == "__main__":
@@ -1027,5 +2074,5 @@ if __name__ == "__main__":
 
 
     # Save updated parameters
-    interferometer.save_yaml(interferometer.filename)
+    interferometer.flush()
 
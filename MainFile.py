@@ -1,70 +1,348 @@
-# Only supports inputs for Interferometer, Optical Switch, Time Tagger and Yokogawa
+# Device types come from DeviceRegistry (Interferometer, Optical Switch, Time Tagger,
+# Power Meter, SHG, Laser, Yokogawa and any installed plugins).
 # Steps to add a new device:
 # 1. Create a new class for the device in its own file.
-# 2. Import the class in this file.
-# 3. Add an elif statement in the create_device function to handle the new device type
-# 4. Add a new attribute for the device in the Person class.
-# 5. Add the device to the assign_persons_from_config function to create the device and assign it to the person. (Marked with Add here)
-import os
+# 2. Register it once, e.g. in DeviceRegistry.py:
+#    register_device("My Device", "MyModule:MyDevice", capabilities=("counting",), timeout=10)
+#    It is then created for every person whose config has a "My Device" section and
+#    is available as person.my_device / person["My Device"].
 import time
-import yaml
-import math
-import datetime
-import shutil
-from time import sleep
-import numpy as np
-from Interferometer_v4_20250425 import Interferometer  # Import the Interferometer class
-from OpticalSwitch import OSwitch  # Import the OpticalSwitch class
-from TimeTaggerFunctions import TimeTagger  # Import TimeTagger
-import matplotlib.pyplot as plt
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+# Driver modules pull in pyvisa, serial, TimeTagger, scipy, ... so the registry
+# only imports them when a device of that type is actually created.
+from DeviceRegistry import get_device_spec, key_for_attribute
+import ConfigService
+
+
+class LazyDevice:
+    """
+    Stand-in for a device that imports its driver and constructs (connects)
+    it on first attribute access, so scripts only pay for the devices they use.
+    Ask capabilities / has_capability() what it can do: they are answered
+    from the device registry, while hasattr() would connect the device.
+    """
+    def __init__(self, device_type, params):
+        self._device_type = device_type
+        self._params = params
+        self._device = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Create the real device now (if not done yet) and return it."""
+        if self._device is None:
+            with self._lock:
+                if self._device is None:
+                    self._device = create_device(self._device_type, self._params)
+        return self._device
+
+    @property
+    def is_resolved(self):
+        return self._device is not None
+
+    @property
+    def capabilities(self):
+        """Capabilities registered for this device type (does not connect)."""
+        spec = get_device_spec(self._device_type)
+        return spec.capabilities if spec else frozenset()
+
+    def has_capability(self, capability):
+        return capability in self.capabilities
+
+    def apply_config(self, section, previous=None):
+        """Take a reloaded config section: stored for later if not connected yet, else passed to the device."""
+        with self._lock:
+            if self._device is None:
+                self._params = section
+                return []
+        if not hasattr(self._device, 'apply_config'):
+            return ["device does not support live reload"]
+        return self._device.apply_config(section, previous)
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the proxy itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = 'connected' if self.is_resolved else 'not connected'
+        return f"<LazyDevice {self._device_type} ({state})>"
+
 
 class Person:
-    def __init__(self, name, interferometer, optical_switch, time_tagger):
+    """
+    A person's devices keyed by config key ("Time Tagger", ...).
+
+    Devices are reachable as person["Time Tagger"], person.devices[...] or as
+    snake_case attributes (person.time_tagger); a registered device type the
+    person does not have reads as None.
+    """
+    def __init__(self, name, devices=None, **named_devices):
         self.name = name
-        self.interferometer = interferometer
-        self.optical_switch = optical_switch
-        self.time_tagger = time_tagger
+        self.devices = dict(devices or {})
+        for attribute, device in named_devices.items():
+            if device is not None:
+                self.devices[key_for_attribute(attribute) or attribute] = device
+        # capability -> device keys, built once so capability lookups are a dict hit
+        self._by_capability = {}
+        for key in self.devices:
+            spec = get_device_spec(key)
+            for capability in (spec.capabilities if spec else ()):
+                self._by_capability.setdefault(capability, []).append(key)
+
+    def __getattr__(self, name):
+        # Only called for names that are not regular attributes
+        if name.startswith('_'):
+            raise AttributeError(name)
+        key = key_for_attribute(name)
+        if key is None:
+            raise AttributeError(f"{type(self).__name__} has no attribute or device type {name!r}")
+        return self.devices.get(key)
+
+    def __getitem__(self, key):
+        return self.devices[key]
+
+    def __contains__(self, key):
+        return key in self.devices
+
+    def has_capability(self, capability):
+        return capability in self._by_capability
+
+    def devices_with(self, capability):
+        """Return this person's devices with a capability, in config order."""
+        return [self.devices[key] for key in self._by_capability.get(capability, [])]
+
+    def __repr__(self):
+        return f"<Person {self.name}: {', '.join(self.devices) or 'no devices'}>"
 
 
 def load_config(config_path):
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
-
-#Easily add more devices with the following elif statements
-
-def create_device(device_type, params):
-    if device_type == "Interferometer":
-        return Interferometer(params)
-    elif device_type == "Optical Switch":
-        return OSwitch(params)
-    elif device_type == "Time Tagger":
-        return TimeTagger(params)
-    else:
+    """Parse (once, cached by mtime/hash) and validate config.yaml; see ConfigService."""
+    return ConfigService.load_config(config_path)
+
+def create_device(device_type, params, lazy=False):
+    spec = get_device_spec(device_type)
+    if spec is None:
         return None
+    if lazy:
+        return LazyDevice(device_type, params)
+    return spec.create(params)
 
-def assign_persons_from_config(config):
-    persons = []
+def _device_com_port(params):
+    return params.get('com_port') if isinstance(params, dict) else None
+
+def _run_in_daemon_thread(fn, *args, name=None):
+    """
+    Run fn(*args) in a new daemon thread and return a Future for its result.
+    Unlike a ThreadPoolExecutor worker, a thread that never returns does not
+    keep the interpreter from exiting.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def bring_up_devices(config, max_workers=8, timeouts=None):
+    """
+    Create every person's devices concurrently.
+
+    Constructors run concurrently (at most max_workers at once) so the lab is
+    online in about the time of the slowest device. Devices wait for the
+    device types their registry entry depends_on (on the same person) and
+    devices sharing a com_port are opened one at a time. A device still
+    running after its registered timeout (or timeouts[device_type]) is
+    reported as 'timeout': its thread cannot be killed, so it is left running
+    as a daemon thread that does not hold up interpreter exit, its result is
+    discarded and its worker slot goes to the next device. It may still have
+    its com_port open, so devices on that port are not started and are
+    reported as 'blocked'.
+
+    Returns ({person: {device_type: device}}, report) where report is a list
+    of dicts with person, device, status ('ok', 'failed', 'timeout',
+    'blocked', 'skipped'), seconds and error.
+    """
+    pending = {}
+    specs = {}
     for person_name, person_data in config.items():
         if not isinstance(person_data, dict):
             continue
-        devices = {}
         for device_type, params in person_data.items():
-            if device_type in ["Interferometer", "Optical Switch", "Time Tagger"]: # Add here
-                devices[device_type] = create_device(device_type, params)
-        person = Person(
-            name=person_name,
-            interferometer=devices.get("Interferometer"),
-            optical_switch=devices.get("Optical Switch"),
-            time_tagger=devices.get("Time Tagger"),
-            #yokogawa = devices.get("Yokogawa")  # Add here if you have a Yokogawa device (example for adding a new device)
-        )
-        persons.append(person)
+            spec = get_device_spec(device_type)
+            if spec is not None:
+                pending[(person_name, device_type)] = params
+                specs[device_type] = spec
+    timeouts = {**{device_type: spec.timeout for device_type, spec in specs.items()}, **(timeouts or {})}
+
+    configured = set(pending)
+    devices = {person: {} for person, _ in pending}
+    results = {}                  # (person, device_type) -> report entry
+    active = set()                # keys whose constructor is running, at most max_workers
+    port_owner = {}               # com_port -> key of the device opening it, so a port is never opened twice at once
+    hung_ports = {}               # com_port -> key of a timed-out device that may still hold it open
+    abandoned = set()             # queued keys that must not start (their port is hung)
+    slot_free = threading.Condition()
+    started = {}                  # key -> time its constructor actually started (not just queued)
+
+    def construct(key, device_type, params):
+        port = _device_com_port(params)
+        with slot_free:
+            slot_free.wait_for(lambda: key in abandoned or
+                               (len(active) < max_workers and (port is None or port not in port_owner)))
+            if key in abandoned:
+                return None
+            active.add(key)
+            if port is not None:
+                port_owner[port] = key
+            started[key] = time.monotonic()
+        try:
+            return create_device(device_type, params)
+        finally:
+            with slot_free:
+                active.discard(key)
+                if port is not None and port_owner.get(port) == key:
+                    del port_owner[port]
+                if port is not None and hung_ports.get(port) == key:
+                    del hung_ports[port]
+                slot_free.notify_all()
+
+    def blocked_entry(key, port, hung_key):
+        person, device_type = key
+        return {'person': person, 'device': device_type, 'status': 'blocked', 'seconds': 0.0,
+                'error': f"{port} may still be open by timed-out {hung_key[1]}"}
+
+    running = {}                  # future -> (key, params)
+    while pending or running:
+        # Start every device whose dependencies have finished
+        for key in list(pending):
+            person, device_type = key
+            deps = [(person, dep) for dep in specs[device_type].depends_on if (person, dep) in configured]
+            if not all(dep in results for dep in deps):
+                continue
+            params = pending.pop(key)
+            failed = [dep[1] for dep in deps if results[dep]['status'] != 'ok']
+            if failed:
+                results[key] = {'person': person, 'device': device_type, 'status': 'skipped', 'seconds': 0.0,
+                                'error': f"dependency failed: {', '.join(failed)}"}
+                continue
+            hung_key = hung_ports.get(_device_com_port(params))
+            if hung_key is not None:
+                results[key] = blocked_entry(key, _device_com_port(params), hung_key)
+                continue
+            future = _run_in_daemon_thread(construct, key, device_type, params, name=f"device-init-{person}-{device_type}")
+            running[future] = (key, params)
+
+        if pending and not running:
+            # Nothing is running and nothing could start: the remaining devices depend on each other
+            for person, device_type in list(pending):
+                pending.pop((person, device_type))
+                results[(person, device_type)] = {'person': person, 'device': device_type, 'status': 'skipped',
+                                                  'seconds': 0.0, 'error': 'circular dependency'}
+
+        if not running:
+            continue
+
+        now = time.monotonic()
+        deadline = min(started.get(key, now) + timeouts[key[1]] for key, _ in running.values())
+        done, _ = wait(list(running), timeout=max(deadline - now, 0), return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for future in list(running):
+            key, params = running[future]
+            person, device_type = key
+            elapsed = now - started.get(key, now)
+            if future in done:
+                del running[future]
+                try:
+                    device = future.result()
+                    devices[person][device_type] = device
+                    status, error = ('ok', None) if device is not None else ('failed', 'constructor returned None')
+                except Exception as e:
+                    status, error = 'failed', str(e)
+                results[key] = {'person': person, 'device': device_type, 'status': status, 'seconds': elapsed, 'error': error}
+            elif elapsed >= timeouts[device_type]:
+                del running[future]
+                future.cancel()
+                # Free its worker slot, but keep its port until the constructor really returns
+                port = _device_com_port(params)
+                with slot_free:
+                    active.discard(key)
+                    if port is not None and port_owner.get(port) == key:
+                        hung_ports[port] = key
+                    slot_free.notify_all()
+                results[key] = {'person': person, 'device': device_type, 'status': 'timeout', 'seconds': elapsed,
+                                'error': f"no response after {elapsed:.1f} s"}
+
+        # Devices still queued for a port a timed-out constructor may hold are not started
+        for future in list(running):
+            key, params = running[future]
+            port = _device_com_port(params)
+            with slot_free:
+                hung_key = hung_ports.get(port)
+                if hung_key is None or key in started:
+                    continue
+                abandoned.add(key)
+                slot_free.notify_all()
+            del running[future]
+            results[key] = blocked_entry(key, port, hung_key)
+
+    return devices, list(results.values())
+
+
+def print_startup_report(report):
+    header_format = '{:<10} {:<16} {:<8} {:>8}  {}'
+    print(header_format.format('Person', 'Device', 'Status', 'Time (s)', 'Details'))
+    print('-' * 65)
+    for entry in sorted(report, key=lambda e: (e['person'], e['device'])):
+        print(header_format.format(entry['person'], entry['device'], entry['status'], f"{entry['seconds']:.2f}", entry['error'] or ''))
+    print('-' * 65)
+    ready = sum(entry['status'] == 'ok' for entry in report)
+    print(f"{ready}/{len(report)} devices online")
+
+
+def assign_persons_from_config(config, max_workers=8, timeouts=None, report=True, lazy=False):
+    """
+    Create the Person objects and their devices.
+
+    By default all devices are brought up concurrently (bring_up_devices).
+    With lazy=True every device is a LazyDevice that imports its driver and
+    connects on first use, so startup costs nothing for unused devices.
+    """
+    persons = []
+    if lazy:
+        all_devices = {person_name: {device_type: create_device(device_type, params, lazy=True)
+                                     for device_type, params in person_data.items() if get_device_spec(device_type) is not None}
+                       for person_name, person_data in config.items() if isinstance(person_data, dict)}
+    else:
+        all_devices, startup_report = bring_up_devices(config, max_workers=max_workers, timeouts=timeouts)
+        if report:
+            print_startup_report(startup_report)
+    for person_name, person_data in config.items():
+        if not isinstance(person_data, dict):
+            continue
+        devices = all_devices.get(person_name, {})
+        # keep config order rather than the order devices finished starting
+        persons.append(Person(person_name, devices={key: devices[key] for key in person_data if key in devices}))
     return persons
 
 # Usage
-config_path = "/Users/vish/Entanglement Automation/config.yaml" # Adjust the path as needed
-config = load_config(config_path)
-persons = assign_persons_from_config(config)
+if __name__ == "__main__":
+    config_path = "/Users/vish/Entanglement Automation/config.yaml" # Adjust the path as needed
+    config = load_config(config_path)
+    persons = assign_persons_from_config(config)
+    # Apply edits of config.yaml (trigger levels, switch states, calibration) without reconnecting
+    from ConfigWatcher import ConfigWatcher
+    watcher = ConfigWatcher(config_path, persons)
+    watcher.start()
 
 
 
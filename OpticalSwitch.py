@@ -1,13 +1,65 @@
-import serial
 import time
-import numpy as np
-from multiprocessing import Process
-import yaml
+import threading
+from collections import deque
+from ConfigService import load_config
 start_time = time.time()
 
+
+class CommandBatch:
+    """
+    Switch commands written back-to-back and their acknowledgements.
+
+    sent_at / ack_at are time.monotonic() stamps per command; responses holds
+    each reply ("+ok", "+err", ...) or None if none arrived before the timeout.
+    error is the exception that kept the batch from being sent, if any.
+    """
+    def __init__(self, driver, commands, settle_time):
+        self.driver = driver
+        self.commands = list(commands)
+        self.settle_time = settle_time
+        self.sent_at = [None] * len(self.commands)
+        self.ack_at = [None] * len(self.commands)
+        self.responses = [None] * len(self.commands)
+        self.received = 0           # replies (or timeouts) accounted for
+        self.error = None
+
+    @property
+    def done(self):
+        return self.received == len(self.commands)
+
+    @property
+    def ok(self):
+        return self.done and all(response == "+ok" for response in self.responses)
+
+    @property
+    def latencies(self):
+        """Seconds from write to acknowledgement per command (None if not acknowledged)."""
+        return [ack - sent if ack is not None and sent is not None else None
+                for sent, ack in zip(self.sent_at, self.ack_at)]
+
+    def _give_up(self, index, error):
+        """Mark commands index.. as never sent because of error; no reply will come for them."""
+        self.error = error
+        for i in range(index, len(self.commands)):
+            self.sent_at[i] = None
+        self.received += len(self.commands) - index
+
+    def wait(self, settle=True):
+        """Collect the outstanding acknowledgements, then sleep out the settle time once. Returns ok."""
+        self.driver._collect_acks(self)
+        if settle and self.settle_time:
+            last_ack = max((ack for ack in self.ack_at if ack is not None), default=time.monotonic())
+            remaining = last_ack + self.settle_time - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        return self.ok
+
+
 class OpticalSwitchDriver:
-    def __init__(self, com_port, baudrate=9600, timeout=0.5, filename = None):
+    def __init__(self, com_port, baudrate=9600, timeout=0.5, filename = None, simulator=None, settle_time=0.1):
         self.com_port = com_port
+        self.settle_time = settle_time  # optical settle time after the last switch command of a batch
+        self.simulator = simulator  # Optional SimulatedInstruments.SimulatedLab used instead of the serial port
         self.baudrate = baudrate
         self.timeout = timeout
         self.minvoltage = 0
@@ -15,12 +67,35 @@ class OpticalSwitchDriver:
         self.maxvoltage = 4.9#
         self.device_connected = False
         self.device = None
+        # Command pipeline: writes go out back-to-back and (batch, index) of every
+        # command still waiting for its reply is queued in send order.
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._outstanding = deque()
         if self.com_port != None:
             self.load_osw_settings(filename)
     
     
+    @classmethod
+    def from_config(cls, section, **kwargs):
+        """Create a driver from an "Optical Switch" config section (com_port, SW1..SW4)."""
+        return cls(section.get('com_port'), filename=section, **kwargs)
+
+    @staticmethod
+    def _switch_status(value):
+        # YAML reads ON/OFF as booleans; the DF2X2 command takes 1/0
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str) and value.upper() in ('ON', 'OFF'):
+            return int(value.upper() == 'ON')
+        return value
+
     def load_osw_settings(self, filename):
-        """Load the OSW settings from the YAML file."""
+        """
+        Load the OSW settings from the YAML file (OSW: SWnStatus, parsed once
+        and cached by ConfigService) or from an "Optical Switch" config
+        section dict (SW1..SW4).
+        """
             # Access OSW switch statuses
         self.SW1Status = None
         self.SW2Status = None
@@ -28,19 +103,17 @@ class OpticalSwitchDriver:
         self.SW4Status = None
         try:
             if filename is None:
-                print(f"Filename is not mentioned to load OSW settings")
+                print("Filename is not mentioned to load OSW settings")
             else:
-                with open(filename, 'r') as file:
-                    data = yaml.safe_load(file)
+                data = filename if isinstance(filename, dict) else load_config(filename)
+                osw = data['OSW'] if 'OSW' in data else data
 
                 # Set OSW statuses from the file
-                self.SW1Status = data['OSW']['SW1Status']
-                self.SW2Status = data['OSW']['SW2Status']
-                self.SW3Status = data['OSW']['SW3Status']
-                self.SW4Status = data['OSW']['SW4Status']
+                statuses = [self._switch_status(osw[f'SW{n}Status'] if f'SW{n}Status' in osw else osw[f'SW{n}']) for n in range(1, 5)]
+                self.SW1Status, self.SW2Status, self.SW3Status, self.SW4Status = statuses
 
                 # Set all switches based on the loaded configuration
-                self.OSWAll([self.SW1Status, self.SW2Status, self.SW3Status, self.SW4Status], sleep_time=0.1)
+                self.OSWAll([self.SW1Status, self.SW2Status, self.SW3Status, self.SW4Status])
 
                 print(f"OSW settings applied: SW1={self.SW1Status}, SW2={self.SW2Status}, SW3={self.SW3Status}, SW4={self.SW4Status}")
 
@@ -48,16 +121,21 @@ class OpticalSwitchDriver:
             print(f"Error loading OSW settings: {e}")   
 
     def connect(self):
+        import serial  # deferred so scripts that never open the port do not load pyserial
         if self.com_port == None:
             print(f"OSW com port is :{self.com_port}")
         else:
             if not self.device_connected or self.device==None: 
                 print("OSW is not connected. Connecting now...")
                 try:
-                    self.device = serial.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
+                    if self.simulator is not None:
+                        self.device = self.simulator.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
+                    else:
+                        self.device = serial.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
                     self.device_connected = True
                     print("OSW is connected")
-                    time.sleep(2)  # Give some time for the device to initialize
+                    if self.simulator is None:
+                        time.sleep(2)  # Give some time for the device to initialize
                 except serial.SerialException as e:
                     print(f"Failed to connect to OSW: {e}")
                     self.device = None
@@ -65,7 +143,18 @@ class OpticalSwitchDriver:
                 print("OSW is already connected.")
             return self.device
     
-    def OSWAll(self, statuses, sleep_time):
+    def OSWAll(self, statuses, sleep_time=None, wait=True):
+        """
+        Set every switch (channel = index in statuses) in one pipelined batch:
+        all commands are written back-to-back, the "+ok" replies collected
+        afterwards and the settle time (sleep_time, default self.settle_time)
+        slept once at the end. With wait=False the CommandBatch is returned
+        straight after writing; call its wait() before relying on the switches.
+        If the switches could not be set the batch is returned failed (ok is
+        False, error holds the exception).
+        """
+        commands = [f"DF2X2 {channel} {status}\n" for channel, status in enumerate(statuses)]
+        batch = CommandBatch(self, commands, self.settle_time if sleep_time is None else sleep_time)
         try:
             if not self.device_connected:
                 print("OSW is not initialized, attempting to connect...")
@@ -74,17 +163,20 @@ class OpticalSwitchDriver:
             if self.device is None:
                 raise RuntimeError("Failed to connect to the OSW or OSW not initialized")
 
-            for channel, status in enumerate(statuses):
-                command = f"DF2X2 {channel} {status}\n"
-                start_time = time.time()
-                self._send_command(command, start_time)
-                time.sleep(sleep_time)
+            self._send_commands(batch)
+            if wait:
+                batch.wait()
+                self._report(batch)
 
         except Exception as e:
+            self._batch_failed(batch, e)
             print(e)
             print("Could not set the optical switches")
+        return batch
 
-    def OSWch(self, channel, status):
+    def OSWch(self, channel, status, wait=True):
+        """Set one switch; returns its CommandBatch (failed if it could not be sent), see OSWAll."""
+        batch = CommandBatch(self, [f"DF2X2 {channel} {status}\n"], self.settle_time)
         try:
             if not self.device_connected:
                 print("OSW not initialized, attempting to connect...")
@@ -93,27 +185,117 @@ class OpticalSwitchDriver:
             if self.device is None:
                 raise RuntimeError("Failed to connect to the OSW or OSW not initialized")
 
-            command = f"DF2X2 {channel} {status}\n"
-            start_time = time.time()
-            self._send_command(command, start_time)
+            self._send_commands(batch)
+            if wait:
+                batch.wait()
+                self._report(batch)
         except Exception as e:
+            self._batch_failed(batch, e)
             print(e)
             print("Could not set the voltage")
-        
+        return batch
+
+    @staticmethod
+    def _batch_failed(batch, error):
+        if batch.error is None:
+            if all(sent is None for sent in batch.sent_at):
+                batch._give_up(0, error)    # nothing was sent, so wait() has nothing to collect
+            else:
+                batch.error = error
+
+    @classmethod
+    def _section_status(cls, section, n):
+        key = f'SW{n}Status' if f'SW{n}Status' in section else f'SW{n}'
+        return cls._switch_status(section[key]) if key in section else None
+
+    def apply_config(self, section, previous=None):
+        """
+        Apply a reloaded "Optical Switch" config section over the open port.
+
+        With previous (the section as it was in the file before) only switches
+        edited in the file change, so switching done by this process since then
+        is kept; without it every switch differing from the live state does.
+        All switches are sent in one pipelined OSWAll batch, so the settle time
+        is paid once. Returns the changes that need the driver re-created (a
+        different com_port).
+        """
+        if section.get('com_port') != self.com_port:
+            return [f"com_port {self.com_port} -> {section.get('com_port')}"]
+        if self.com_port is None:
+            return []
+        statuses = [getattr(self, f'SW{n}Status', None) for n in range(1, 5)]
+        changed = []
+        for n in range(1, 5):
+            status = self._section_status(section, n)
+            old = self._section_status(previous, n) if previous is not None else statuses[n - 1]
+            if status is not None and status != old and status != statuses[n - 1]:
+                statuses[n - 1] = status
+                changed.append(n)
+        if changed and None not in statuses:
+            batch = self.OSWAll(statuses)
+            if batch.ok:
+                for n in changed:
+                    setattr(self, f'SW{n}Status', statuses[n - 1])
+                    print(f"SW{n} set to {statuses[n - 1]}")
+        return []
+
      
-    def _send_command(self, command, start_time):
-        print(command)
-        # self.device.write(bytes(command, 'utf-8'))
-        # while True:
-        #     data = self.device.readline()
-        #     dataStr = data.decode().strip()
-        #     if dataStr == "+ok":
-        #         # print(f" Applied voltage {self.amplification*float(command.split()[2])}V, Command:{command.strip()}, running time: {time.time() - start_time:.5f}s")
-        #         break
-        #     else:
-        #         print(f"Received data: {dataStr}")
-        #         print(f"Data not received and running time: {time.time() - start_time:.5f} seconds")
-        #         break
+    def _send_commands(self, batch):
+        """
+        Write the batch's commands back-to-back without waiting for replies.
+        If a write fails, that command and the rest are given up and the
+        error is raised; replies to the commands already sent are still
+        collected by wait().
+        """
+        with self._write_lock:
+            for index, command in enumerate(batch.commands):
+                self._outstanding.append((batch, index))
+                batch.sent_at[index] = time.monotonic()
+                try:
+                    self.device.write(bytes(command, 'utf-8'))
+                except Exception as e:
+                    self._outstanding.pop()
+                    batch._give_up(index, e)
+                    raise
+        return batch
+
+    def _collect_acks(self, batch):
+        """
+        Read replies until batch is complete. Replies arrive in send order, so
+        each line belongs to the oldest outstanding command, whichever batch
+        (and thread) sent it. On a timeout every outstanding command is given
+        up and the input buffer flushed so late replies cannot be misassigned.
+        """
+        with self._read_lock:
+            while not batch.done:
+                with self._write_lock:
+                    if not self._outstanding:
+                        break
+                    owner, index = self._outstanding[0]
+                data_str = self.device.readline().decode().strip()
+                if not data_str:
+                    print(f"No reply to {owner.commands[index].strip()} within {self.timeout} s")
+                    with self._write_lock:
+                        while self._outstanding:
+                            lost, _ = self._outstanding.popleft()
+                            lost.received += 1
+                        if hasattr(self.device, 'reset_input_buffer'):
+                            self.device.reset_input_buffer()
+                    break
+                with self._write_lock:
+                    self._outstanding.popleft()
+                owner.ack_at[index] = time.monotonic()
+                owner.responses[index] = data_str
+                owner.received += 1
+                if data_str != "+ok":
+                    print(f"Received data: {data_str} for command {owner.commands[index].strip()}")
+
+    def _report(self, batch):
+        timings = ', '.join(f"{command.split()[1]}:{latency * 1e3:.1f}" if latency is not None else f"{command.split()[1]}:-"
+                            for command, latency in zip(batch.commands, batch.latencies))
+        state = "acknowledged" if batch.ok else "NOT all acknowledged"
+        print(f"OSW: {len(batch.commands)} command(s) {state}, ack times (ms) {timings}")
+
     def disconnect(self):
         print("OSW disconnects automatically")
 
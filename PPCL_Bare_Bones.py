@@ -1,13 +1,13 @@
-import pyvisa
 import numpy as np
 import time
 
 from Support.LaserSupport.PPCL550v7 import PPCL550
+from VisaSessions import get_resource_manager
 
 class LaserControl:
     def __init__(self, port, baud_rate=9600, min_pow=600, max_pow=1700, wavelength=1550,power=6):
         self.laser = PPCL550(port, baud_rate, min_pow=min_pow, max_pow=max_pow)
-        self.rm = pyvisa.ResourceManager()
+        self.rm = get_resource_manager()  # shared process-wide ResourceManager
         self.C = 299792458  # Speed of light in m/s
         self.wl = wavelength
         self.power = power
@@ -1,18 +1,16 @@
 import time
-import serial
 import numpy as np
-import matplotlib.pyplot as plt
 from ThorlabsPMFunctions import PowerMeter
-from supportingfunctions import SupportFunc
 
 class SHGController:
-    def __init__(self, com_port, baudrate=9600, timeout=0.5, plotData=False):
+    def __init__(self, com_port, baudrate=9600, timeout=0.5, plotData=False, simulator=None):
         """
         Initialize SHG Voltage Controller.
 
         Args:
             voltage_source: Instance like LADAqBoard controlling voltage output
             plotData: If True, plot after scan
+            simulator: Optional SimulatedInstruments.SimulatedLab used instead of the serial port
         """
         ## LADAq params
         self.com_port = com_port
@@ -22,21 +20,27 @@ class SHGController:
         self.amplification = 1
         self.maxvoltage = 2.5#
         self.device_connected = False
+        self.device = None
+        self.simulator = simulator
         
         ### SHG params ###
         self.beta = 3450
         self.plotData = plotData
-        self.Supportfunctions = SupportFunc()
+        self.Supportfunctions = None  # supportingfunctions.SupportFunc, imported on the first plot
         self.last_voltage = 0  # Start with 0V internally
 
         self.device = self.connect()
 
     def connect(self):
+        import serial  # deferred so scripts that never open the port do not load pyserial
         # if not self.is_device_connected():
         if not self.device_connected or self.device==None: 
             print("SHG TEC Controller is not connected. Connecting now...")
             try:
-                self.device = serial.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
+                if self.simulator is not None:
+                    self.device = self.simulator.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
+                else:
+                    self.device = serial.Serial(port=self.com_port, baudrate=self.baudrate, timeout=self.timeout)
                 self.device_connected = True
                 print("SHG TEC Controller is connected")
                 time.sleep(0.1)  # Give some time for the device to initialize
@@ -62,6 +66,7 @@ class SHGController:
         if expect_response:
             response = self.device.readline().decode().strip()
             print(f"Response: {response}")
+            return response
             # if response == "+ok":
             #     print(f"Temperature is set")
             #     break
@@ -178,6 +183,9 @@ class SHGController:
 
         # Plot if enabled
         if self.plotData:
+            if self.Supportfunctions is None:
+                from supportingfunctions import SupportFunc
+                self.Supportfunctions = SupportFunc()
             self.Supportfunctions.plot_voltage_vs_power(temp_power_data, figSaveName="SHG_scan.png")
 
         return temp_power_data
@@ -211,6 +219,7 @@ if __name__ == "__main__":
     #     stabilization_time=5
     # )
 
+    # import matplotlib.pyplot as plt
     # plt.figure()
     # temps, powers = zip(*temp_power_data)
     # flat_powers = powers
@@ -0,0 +1,364 @@
+"""
+Software stand-ins for the lab instruments driven by this package.
+
+A SimulatedLab holds one shared physical model and hands out simulated
+devices that plug into the existing drivers:
+
+- LADAqBoard(com_port): VsetCh(voltage, channel) drives heater voltages of
+  simulated interferometers (fringe with thermal phase drift, heater lag
+  and noise). Used by Interferometer(filename, simulator=lab).
+- open_resource(resource_id): a PM100 VISA resource answering *IDN?,
+  SENS:CORR:WAV, SENS:AVER:COUN, CONF/INIT/FETC?, READ? and MEAS:POW?,
+  including ';'-compound queries. Used by PowerMeter(..., simulator=lab).
+- Serial(port, baudrate, timeout): a serial port speaking either the DF2X2
+  optical switch or the SHG TEC protocol (SetT/SetImax/ReadVolt/ReadCurr).
+  Used by OpticalSwitchDriver(..., simulator=lab) and
+  SHGController(..., simulator=lab).
+
+The power meter reads the interferometer chain (cascaded fringes) at
+telecom wavelengths and the SHG output (sinc^2 phase-matching curve of the
+lagging TEC temperature) below 1000 nm. Every write/query sleeps for the
+configured latency, so timing of the control stack can be measured
+end-to-end without hardware.
+
+Example:
+    lab = SimulatedLab(latency={'ladaq': 0.002, 'pm': 0.003}, seed=1)
+    intf = Interferometer("config.yaml", simulator=lab)
+    pm = PowerMeter(wavelength=1536, simulator=lab)
+"""
+import time
+import threading
+import numpy as np
+
+# Default per-device latency in seconds for each write/query
+DEFAULT_LATENCY = {'ladaq': 0.001, 'pm': 0.002, 'switch': 0.001, 'tec': 0.001}
+
+
+class SimulatedFringe:
+    """One interferometer: transmission vs heater voltage with drifting phase."""
+    def __init__(self, period=1.2, phase=0.0, visibility=0.95, response='linear',
+                 drift_rate=0.5, drift_noise=0.5, heater_tau=0.0):
+        """
+        Args:
+            period: Voltage period (linear) or V^2 period (quadratic) of the fringe
+            phase: Phase at 0 V in degrees
+            visibility: Fringe visibility (0..1)
+            response: 'linear' (phase ~ V) or 'quadratic' (phase ~ V^2, thermo-optic heater)
+            drift_rate: Deterministic thermal phase drift in deg/s
+            drift_noise: Phase random walk in deg/sqrt(s)
+            heater_tau: First-order heater time constant in s (0 = instantaneous)
+        """
+        self.period = period
+        self.phase = phase
+        self.visibility = visibility
+        self.response = response
+        self.drift_rate = drift_rate
+        self.drift_noise = drift_noise
+        self.heater_tau = heater_tau
+        self.voltage = 0.0          # commanded voltage
+        self.effective_voltage = 0.0  # voltage seen by the waveguide after heater lag
+
+    def advance(self, dt, rng):
+        self.phase += self.drift_rate * dt + self.drift_noise * np.sqrt(dt) * rng.standard_normal()
+        if self.heater_tau > 0:
+            self.effective_voltage += (self.voltage - self.effective_voltage) * (1 - np.exp(-dt / self.heater_tau))
+        else:
+            self.effective_voltage = self.voltage
+
+    def transmission(self):
+        x = self.effective_voltage ** 2 if self.response == 'quadratic' else self.effective_voltage
+        phi = np.deg2rad(360.0 * x / self.period + self.phase)
+        return 0.5 * (1 + self.visibility * np.cos(phi))
+
+
+class SimulatedTEC:
+    """One TEC channel: temperature relaxing to its setpoint, SHG phase-matching curve."""
+    def __init__(self, temperature=25.0, tau=5.0, phase_matching_temp=46.0, bandwidth=2.0, efficiency=0.05):
+        """
+        Args:
+            temperature: Initial temperature in deg C
+            tau: Thermal time constant in s
+            phase_matching_temp: Temperature of peak SHG in deg C
+            bandwidth: Temperature offset of the first sinc^2 zero in deg C
+            efficiency: Peak SHG conversion efficiency
+        """
+        self.temperature = temperature
+        self.setpoint = temperature
+        self.tau = tau
+        self.phase_matching_temp = phase_matching_temp
+        self.bandwidth = bandwidth
+        self.efficiency = efficiency
+        self.imax = 1.0
+
+    def advance(self, dt):
+        if self.tau > 0:
+            self.temperature += (self.setpoint - self.temperature) * (1 - np.exp(-dt / self.tau))
+        else:
+            self.temperature = self.setpoint
+
+    def shg_efficiency(self):
+        return self.efficiency * np.sinc((self.temperature - self.phase_matching_temp) / self.bandwidth) ** 2
+
+    def current(self):
+        # Drive current proportional to the remaining temperature error, clipped at Imax
+        return float(np.clip(0.1 * (self.setpoint - self.temperature), -self.imax, self.imax))
+
+
+class SimulatedLab:
+    def __init__(self, input_power=1e-3, noise=0.005, dark_power=1e-9, latency=None, seed=None, **fringe_defaults):
+        """
+        Args:
+            input_power: Optical power (W) entering the interferometer chain and SHG
+            noise: Relative power meter noise (standard deviation)
+            dark_power: Additive power meter noise floor in W
+            latency: Seconds per write/query, a number for all devices or a
+                dict with keys 'ladaq', 'pm', 'switch', 'tec'
+            seed: Random seed for reproducible runs
+            fringe_defaults: SimulatedFringe arguments for fringes created on
+                first use (period, visibility, response, drift_rate, ...)
+        """
+        self.input_power = input_power
+        self.noise = noise
+        self.dark_power = dark_power
+        if isinstance(latency, dict):
+            self.latency = {**DEFAULT_LATENCY, **latency}
+        elif latency is not None:
+            self.latency = {key: float(latency) for key in DEFAULT_LATENCY}
+        else:
+            self.latency = dict(DEFAULT_LATENCY)
+        self.rng = np.random.default_rng(seed)
+        self.fringe_defaults = fringe_defaults
+        self.fringes = {}         # (com_port, channel) -> SimulatedFringe
+        self.tecs = {}            # channel -> SimulatedTEC
+        self.switch_states = {}   # switch channel -> status
+        self._lock = threading.RLock()
+        self._last_time = time.monotonic()
+
+    # --- physical model ---
+    def add_fringe(self, com_port, channel, **params):
+        """Create (or replace) the fringe driven by a LADAq channel."""
+        with self._lock:
+            settings = {'phase': float(self.rng.uniform(0, 360)), **self.fringe_defaults, **params}
+            self.fringes[(com_port, channel)] = SimulatedFringe(**settings)
+            return self.fringes[(com_port, channel)]
+
+    def add_tec(self, channel, **params):
+        """Create (or replace) a TEC channel and its SHG crystal."""
+        with self._lock:
+            self.tecs[channel] = SimulatedTEC(**params)
+            return self.tecs[channel]
+
+    def fringe(self, com_port, channel):
+        with self._lock:
+            if (com_port, channel) not in self.fringes:
+                self.add_fringe(com_port, channel)
+            return self.fringes[(com_port, channel)]
+
+    def tec(self, channel):
+        with self._lock:
+            if channel not in self.tecs:
+                self.add_tec(channel)
+            return self.tecs[channel]
+
+    def advance(self):
+        """Evolve drift, heater lag and TEC temperatures up to now."""
+        with self._lock:
+            now = time.monotonic()
+            dt = now - self._last_time
+            self._last_time = now
+            if dt <= 0:
+                return
+            for fringe in self.fringes.values():
+                fringe.advance(dt, self.rng)
+            for tec in self.tecs.values():
+                tec.advance(dt)
+
+    def power(self, wavelength=1550):
+        """Noisy power in W at the power meter for the given wavelength in nm."""
+        with self._lock:
+            self.advance()
+            if wavelength < 1000:
+                # SHG light: the strongest phase-matched crystal reaches the meter
+                efficiency = max((tec.shg_efficiency() for tec in self.tecs.values()), default=0.0)
+                power = self.input_power * efficiency
+            else:
+                power = self.input_power
+                for fringe in self.fringes.values():
+                    power *= fringe.transmission()
+            noisy = power * (1 + self.noise * self.rng.standard_normal()) + self.dark_power * self.rng.standard_normal()
+            return max(float(noisy), 0.0)
+
+    def wait(self, device):
+        """Sleep for the latency of one transaction with a device type."""
+        delay = self.latency.get(device, 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- device factories ---
+    def LADAqBoard(self, com_port):
+        return SimulatedLADAqBoard(self, com_port)
+
+    def open_resource(self, resource_id):
+        return SimulatedPM100(self, resource_id)
+
+    def Serial(self, port=None, baudrate=9600, timeout=0.5):
+        return SimulatedSerial(self, port, baudrate=baudrate, timeout=timeout)
+
+
+class SimulatedLADAqBoard:
+    """LADAq DAC board: each channel heats one simulated interferometer."""
+    def __init__(self, lab, com_port, maxvoltage=5.0):
+        self.lab = lab
+        self.com_port = com_port
+        self.maxvoltage = maxvoltage
+
+    def VsetCh(self, voltage, channel):
+        self.lab.wait('ladaq')
+        voltage = float(np.clip(voltage, 0, self.maxvoltage))
+        with self.lab._lock:
+            self.lab.advance()
+            self.lab.fringe(self.com_port, channel).voltage = voltage
+
+    def Vset(self, voltages, sleep_time=0):
+        for channel, voltage in enumerate(voltages):
+            self.VsetCh(voltage, channel)
+            if sleep_time:
+                time.sleep(sleep_time)
+
+
+class SimulatedPM100:
+    """pyvisa-style resource for a Thorlabs PM100 (write/query of SCPI strings)."""
+    def __init__(self, lab, resource_id, sample_time=0.0003):
+        self.lab = lab
+        self.resource_id = resource_id
+        self.wavelength = 1550.0
+        self.averaging = 1
+        self.sample_time = sample_time  # seconds per internal sample
+        self.timeout = 2000
+        self._fetched = None
+
+    def write(self, command):
+        self.lab.wait('pm')
+        for part in command.split(';'):
+            self._set(part.strip().upper())
+        return len(command)
+
+    def _set(self, command):
+        if command.startswith('SENS:CORR:WAV'):
+            self.wavelength = float(command.split()[1].rstrip('NM'))
+        elif command.startswith('SENS:AVER:COUN') or command.startswith('SENS:AVER'):
+            self.averaging = max(int(float(command.split()[1])), 1)
+        elif command == 'INIT':
+            self._fetched = self._measure()
+
+    def _measure(self):
+        """One reading averaged over self.averaging internal samples."""
+        time.sleep(self.sample_time * self.averaging)
+        return float(np.mean([self.lab.power(self.wavelength) for _ in range(self.averaging)]))
+
+    def query(self, command):
+        """Answer a (possibly ';'-compound) query in a single round-trip."""
+        self.lab.wait('pm')
+        return ";".join(self._answer(part.strip().upper()) for part in command.split(';')) + "\n"
+
+    def _answer(self, command):
+        if command == '*IDN?':
+            return f"Thorlabs,PM100USB,SIM-{self.resource_id},1.0.0"
+        if command in ('MEAS:POW?', 'READ?'):
+            return f"{self._measure():.9E}"
+        if command in ('FETC?', 'FETCH?'):
+            value = self._fetched if self._fetched is not None else self._measure()
+            return f"{value:.9E}"
+        if command == 'SENS:CORR:WAV?':
+            return f"{self.wavelength:.1f}"
+        if command in ('SENS:AVER:COUN?', 'SENS:AVER?'):
+            return str(self.averaging)
+        if not command.endswith('?'):
+            self._set(command)
+            return ""
+        raise ValueError(f"Simulated PM100 does not understand {command!r}")
+
+    def query_ascii_values(self, command, converter='f', separator=','):
+        response = self.query(command).strip()
+        parts = separator(response) if callable(separator) else response.split(separator)
+        return [float(part) for part in parts if part.strip()]
+
+    # ThorlabsPM100 and usbtmc use ask() for queries
+    ask = query
+
+    def close(self):
+        pass
+
+
+class SimulatedSerial:
+    """
+    pyserial-style port answering the DF2X2 optical switch and SHG TEC commands.
+
+    Each command written produces one response line: "+ok" for set commands,
+    the value for reads and "+err" for anything unknown. Like a real port,
+    write() returns at once; the device works through commands in order and
+    each response becomes readable one latency after the previous one.
+    """
+    def __init__(self, lab, port, baudrate=9600, timeout=0.5):
+        self.lab = lab
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self._responses = []      # [ready time, response line]
+        self._busy_until = time.monotonic()
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = data.decode()
+        for line in data.splitlines():
+            if line.strip():
+                device = 'switch' if line.split()[0] == 'DF2X2' else 'tec'
+                self._busy_until = max(self._busy_until, time.monotonic()) + self.lab.latency.get(device, 0)
+                self._responses.append([self._busy_until, self._handle(line.split())])
+        return len(data)
+
+    def _handle(self, words):
+        command, args = words[0], words[1:]
+        try:
+            if command == 'DF2X2':
+                self.lab.switch_states[int(args[0])] = int(float(args[1]))
+                return "+ok"
+            with self.lab._lock:
+                self.lab.advance()
+                tec = self.lab.tec(int(args[0]))
+                if command == 'SetT':
+                    tec.setpoint = float(args[1])
+                    return "+ok"
+                if command == 'SetImax':
+                    tec.imax = float(args[1])
+                    return "+ok"
+                if command == 'ReadVolt':
+                    return f"{2.0 * tec.current():.4f}"
+                if command == 'ReadCurr':
+                    return f"{tec.current():.4f}"
+        except (IndexError, ValueError):
+            pass
+        return "+err"
+
+    def readline(self):
+        now = time.monotonic()
+        if not self._responses or self._responses[0][0] - now > (self.timeout or 0):
+            # Nothing arrives in time: a real port blocks until its timeout
+            time.sleep(self.timeout or 0)
+            return b""
+        ready, response = self._responses.pop(0)
+        if ready > now:
+            time.sleep(ready - now)
+        return (response + "\n").encode()
+
+    @property
+    def in_waiting(self):
+        now = time.monotonic()
+        return sum(len(response) + 1 for ready, response in self._responses if ready <= now)
+
+    def reset_input_buffer(self):
+        self._responses.clear()
+
+    def close(self):
+        self.is_open = False
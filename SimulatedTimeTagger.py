@@ -0,0 +1,471 @@
+"""
+Software stand-in for the Swabian TimeTagger module.
+
+Implements the subset of the API used by TimeTaggerFunctions.TT
+(createTimeTagger, setTriggerLevel, setDeadtime, setDelaySoftware,
+setTestSignal, Counter, Countrate, Histogram, FileWriter, FileReader,
+SynchronizedMeasurements) on top of synthetic tag streams:
+
+- Poisson singles on every configured channel (singles_rate, Hz)
+- correlated photon pairs between two channels with a fixed delay and
+  Gaussian jitter, clipped at +/-6 sigma (pairs, list of dicts)
+- per-channel non-paralysable deadtime and software delay
+
+Tags are generated in virtual time, so startFor(duration) returns as soon as
+the data is synthesised. Continuously running measurements (start(),
+FileWriter) generate data for the wall-clock time elapsed since their last
+read. Use TT(filename, simulate=True, ...) to run TT against this backend.
+"""
+import os
+import time
+import threading
+import numpy as np
+
+# Pair jitter is clipped to this many standard deviations so the backwards
+# shift of a tag, and with it how long generate() holds tags back, is bounded
+_JITTER_LIMIT = 6
+
+# Record layout of simulated .ttbin files
+SIM_TAG_DTYPE = np.dtype([('type', np.uint8), ('missed', np.uint16), ('channel', np.int32), ('timestamp', np.int64)])
+
+
+def createTimeTagger(singles_rate=1e5, pairs=None, seed=None):
+    return SimulatedTimeTagger(singles_rate=singles_rate, pairs=pairs, seed=seed)
+
+
+def freeTimeTagger(tagger):
+    pass
+
+
+class SimulatedTimeTagger:
+    def __init__(self, singles_rate=1e5, pairs=None, seed=None):
+        """
+        Args:
+            singles_rate: Uncorrelated count rate in Hz, a number for every
+                configured channel or a {channel: rate} dict
+            pairs: List of {'channels': (ch_a, ch_b), 'rate': Hz, 'delay': ps,
+                'jitter': ps} describing correlated photon pairs
+            seed: Random seed for reproducible streams
+        """
+        self.singles_rate = singles_rate
+        self.pairs = pairs or []
+        self.rng = np.random.default_rng(seed)
+        self.trigger_levels = {}
+        self.deadtimes = {}
+        self.delays = {}
+        self.test_signals = {}
+        self.time_ps = 0
+        # tags generated but held back until no later block can precede them
+        self._carry_channels = np.empty(0, dtype=np.int32)
+        self._carry_timestamps = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    # --- channel settings ---
+    def setTriggerLevel(self, channel, voltage):
+        self.trigger_levels[channel] = voltage
+
+    def getTriggerLevel(self, channel):
+        return self.trigger_levels.get(channel, 0.0)
+
+    def setDeadtime(self, channel, deadtime):
+        self.deadtimes[channel] = int(deadtime)
+        return self.deadtimes[channel]
+
+    def getDeadtime(self, channel):
+        return self.deadtimes.get(channel, 0)
+
+    def setDelaySoftware(self, channel, delay):
+        self.delays[channel] = int(delay)
+
+    def getDelaySoftware(self, channel):
+        return self.delays.get(channel, 0)
+
+    def setInputDelay(self, channel, delay):
+        self.setDelaySoftware(channel, delay)
+
+    def setTestSignal(self, channel, enabled):
+        if isinstance(channel, (list, tuple)):
+            for ch in channel:
+                self.test_signals[ch] = enabled
+        else:
+            self.test_signals[channel] = enabled
+
+    def getChannelList(self):
+        channels = set(self.trigger_levels) | set(self.deadtimes) | set(self.delays)
+        if isinstance(self.singles_rate, dict):
+            channels |= set(self.singles_rate)
+        for pair in self.pairs:
+            channels |= set(pair['channels'])
+        return sorted(channels)
+
+    def _rate_for(self, channel):
+        if isinstance(self.singles_rate, dict):
+            return self.singles_rate.get(channel, 0.0)
+        return self.singles_rate
+
+    # --- stream generation ---
+    def _min_shift(self):
+        """Largest backwards shift (<= 0, ps) delays and pair jitter can give a tag."""
+        shift = min([0] + list(self.delays.values()))
+        for pair in self.pairs:
+            ch_b = pair['channels'][1]
+            shift = min(shift, int(pair.get('delay', 0)) - _JITTER_LIMIT * int(np.ceil(pair.get('jitter', 0)))
+                        + self.delays.get(ch_b, 0))
+        return shift
+
+    def generate(self, duration_ps):
+        """
+        Synthesise the next duration_ps of tags.
+
+        Returns time-ordered (channels, timestamps, t_start, t_end) where
+        [t_start, t_end) is the virtual time span covered. Delays and pair
+        jitter move tags past that span; tags a later block could still
+        precede are held back and returned with the next block, so the
+        stream stays time-ordered across blocks.
+        """
+        with self._lock:
+            t0 = self.time_ps
+            t1 = t0 + int(duration_ps)
+            self.time_ps = t1
+
+            # Collect sorted per-channel streams: singles plus each side of the pairs
+            streams = {}
+            for ch in self.getChannelList():
+                rate = 1e6 if self.test_signals.get(ch) else self._rate_for(ch)
+                streams.setdefault(ch, []).append(self._sorted_uniform(rate, t0, t1))
+
+            for pair in self.pairs:
+                ch_a, ch_b = pair['channels']
+                t_a = self._sorted_uniform(pair['rate'], t0, t1)
+                sigma = pair.get('jitter', 0)
+                jitter = np.round(np.clip(self.rng.normal(0, sigma, t_a.size), -_JITTER_LIMIT * sigma,
+                                          _JITTER_LIMIT * sigma)).astype(np.int64)
+                streams.setdefault(ch_a, []).append(t_a)
+                streams.setdefault(ch_b, []).append(np.sort(t_a + int(pair.get('delay', 0)) + jitter, kind='stable'))
+
+            channels = [self._carry_channels]
+            timestamps = [self._carry_timestamps]
+            for ch, parts in streams.items():
+                ts = np.sort(np.concatenate(parts), kind='stable') if len(parts) > 1 else parts[0]
+                ts = ts[_deadtime_mask(ts, self.deadtimes.get(ch, 0))] + self.delays.get(ch, 0)
+                timestamps.append(ts)
+                channels.append(np.full(ts.size, ch, dtype=np.int32))
+
+            # Each channel is already sorted, so the stable (merge) sort only has to merge runs
+            ch = np.concatenate(channels)
+            ts = np.concatenate(timestamps)
+            order = np.argsort(ts, kind='stable')
+            ch, ts = ch[order], ts[order]
+
+            # Later blocks start at t1 and shift tags back by at most _min_shift()
+            ready = int(np.searchsorted(ts, t1 + self._min_shift(), side='left'))
+            self._carry_channels, self._carry_timestamps = ch[ready:], ts[ready:]
+            return ch[:ready], ts[:ready], t0, t1
+
+    def _sorted_uniform(self, rate, t0, t1):
+        """Poisson arrival times in [t0, t1) for a rate in Hz, generated already sorted."""
+        n = self.rng.poisson(rate * (t1 - t0) * 1e-12)
+        gaps = np.cumsum(self.rng.exponential(size=n + 1))
+        return t0 + (gaps[:-1] / gaps[-1] * (t1 - t0)).astype(np.int64)
+
+
+def _deadtime_mask(timestamps, deadtime):
+    """Return the events of a sorted single-channel stream that survive a non-paralysable deadtime."""
+    keep = np.ones(timestamps.size, dtype=bool)
+    if deadtime <= 0 or timestamps.size < 2:
+        return keep
+    close = np.diff(timestamps) < deadtime
+    if not close.any():
+        return keep
+
+    # Only runs of closely spaced events need resolving; the first event of each run is always kept
+    in_run = np.flatnonzero(np.concatenate([close, [False]]) | np.concatenate([[False], close]))
+    run_ts = timestamps[in_run]
+    run_keep = np.ones(in_run.size, dtype=bool)
+    while True:
+        kept = np.flatnonzero(run_keep)
+        too_close = np.diff(run_ts[kept]) < deadtime
+        if not too_close.any():
+            break
+        # Only drop the first violating event of each run; the rest may be valid once it is gone
+        first_of_run = too_close & ~np.concatenate([[False], too_close[:-1]])
+        run_keep[kept[1:][first_of_run]] = False
+    keep[in_run] = run_keep
+    return keep
+
+
+class SynchronizedMeasurements:
+    def __init__(self, tagger):
+        self.tagger = tagger
+        self.measurements = []
+
+    def getTagger(self):
+        return self
+
+    def _register(self, measurement):
+        self.measurements.append(measurement)
+
+    def startFor(self, duration, clear=True):
+        block = self.tagger.generate(int(duration))
+        for measurement in self.measurements:
+            if clear:
+                measurement.clear()
+            measurement._process(*block)
+
+    def start(self):
+        for measurement in self.measurements:
+            measurement.start()
+
+    def stop(self):
+        for measurement in self.measurements:
+            measurement.stop()
+
+    def waitUntilFinished(self, timeout=-1):
+        return True
+
+    def isRunning(self):
+        return any(measurement.isRunning() for measurement in self.measurements)
+
+
+class _Measurement:
+    """
+    Common start/stop/startFor behaviour of the simulated measurements.
+
+    Each measurement sees its blocks as one contiguous stream in its own
+    local time (ps since clear()), even if other measurements consumed
+    virtual time in between.
+    """
+    def __init__(self, tagger):
+        if isinstance(tagger, SynchronizedMeasurements):
+            tagger._register(self)
+            tagger = tagger.tagger
+        self.tagger = tagger
+        self._running = False
+        self._last_pull = None
+
+    def _pull(self):
+        """Feed tags for the wall-clock time elapsed since the last read of a running measurement."""
+        if not self._running:
+            return
+        now = time.monotonic()
+        elapsed_ps = int((now - self._last_pull) * 1e12)
+        self._last_pull = now
+        if elapsed_ps > 0:
+            self._process(*self.tagger.generate(elapsed_ps))
+
+    def _to_local(self, timestamps, t_start, t_end):
+        """Shift a block onto this measurement's contiguous local time axis."""
+        local = timestamps - t_start + self._elapsed
+        self._elapsed += t_end - t_start
+        return local
+
+    def start(self):
+        self._running = True
+        self._last_pull = time.monotonic()
+
+    def startFor(self, duration, clear=True):
+        if clear:
+            self.clear()
+        self._process(*self.tagger.generate(int(duration)))
+
+    def stop(self):
+        self._pull()
+        self._running = False
+
+    def isRunning(self):
+        return self._running
+
+    def waitUntilFinished(self, timeout=-1):
+        return True
+
+    def clear(self):
+        self._elapsed = 0
+
+    def _process(self, channels, timestamps, t_start, t_end):
+        raise NotImplementedError
+
+
+class Counter(_Measurement):
+    def __init__(self, tagger, channels, binwidth=int(1e9), n_values=1):
+        super().__init__(tagger)
+        self.channels = list(channels)
+        self.binwidth = int(binwidth)
+        self.n_values = int(n_values)
+        self.clear()
+
+    def clear(self):
+        super().clear()
+        self._data = np.zeros((len(self.channels), self.n_values), dtype=np.int32)
+        self._completed = 0                                          # bins finished since clear()
+        self._pending = np.zeros(len(self.channels), dtype=np.int64)  # counts in the unfinished bin
+        # bins of tags that a delay pushed past the end of their block, counted with a later block
+        self._carry = [np.empty(0, dtype=np.int64) for _ in self.channels]
+
+    def _process(self, channels, timestamps, t_start, t_end):
+        # Delays move tags outside [t_start, t_end): tags landing in a finished
+        # bin still in the rolling window are added to it, tags past the
+        # unfinished bin are carried to the next block, and tags from before
+        # clear() are dropped.
+        local = self._to_local(timestamps, t_start, t_end)
+        old = self._completed
+        completed = self._elapsed // self.binwidth
+        first = old - self.n_values                 # oldest bin still held in _data
+        for i, ch in enumerate(self.channels):
+            bins = np.concatenate([self._carry[i], local[channels == ch] // self.binwidth])
+            self._carry[i] = bins[bins > completed]
+            bins = bins[(bins >= max(first, 0)) & (bins <= completed)]
+            per_bin = np.bincount(bins - first, minlength=completed - first + 1)
+            per_bin[:self.n_values] += self._data[i]
+            per_bin[old - first] += self._pending[i]
+            self._pending[i] = per_bin[completed - first]
+            self._data[i] = per_bin[completed - first - self.n_values:completed - first]
+        self._completed = completed
+
+    def getData(self, rolling=True):
+        self._pull()
+        return self._data.copy()
+
+    def getIndex(self):
+        return np.arange(self.n_values, dtype=np.int64) * self.binwidth
+
+
+class Countrate(_Measurement):
+    def __init__(self, tagger, channels):
+        super().__init__(tagger)
+        self.channels = list(channels)
+        self.clear()
+
+    def clear(self):
+        super().clear()
+        self._counts = np.zeros(len(self.channels), dtype=np.int64)
+
+    def _process(self, channels, timestamps, t_start, t_end):
+        self._elapsed += t_end - t_start
+        for i, ch in enumerate(self.channels):
+            self._counts[i] += np.count_nonzero(channels == ch)
+
+    def getData(self):
+        self._pull()
+        if self._elapsed <= 0:
+            return np.zeros(len(self.channels))
+        return self._counts / (self._elapsed * 1e-12)
+
+    def getCountsTotal(self):
+        self._pull()
+        return self._counts.copy()
+
+
+class Histogram(_Measurement):
+    def __init__(self, tagger, click_channel, start_channel, binwidth=1000, n_values=1000):
+        super().__init__(tagger)
+        self.click_channel = click_channel
+        self.start_channel = start_channel
+        self.binwidth = int(binwidth)
+        self.n_values = int(n_values)
+        self.clear()
+
+    def clear(self):
+        super().clear()
+        self._data = np.zeros(self.n_values, dtype=np.int64)
+        self._last_start = np.empty(0, dtype=np.int64)
+
+    def _process(self, channels, timestamps, t_start, t_end):
+        local = self._to_local(timestamps, t_start, t_end)
+        starts = np.concatenate([self._last_start, local[channels == self.start_channel]])
+        clicks = local[channels == self.click_channel]
+        if starts.size == 0:
+            return
+        self._last_start = starts[-1:]
+        idx = np.searchsorted(starts, clicks, side='right') - 1
+        valid = idx >= 0
+        bins = (clicks[valid] - starts[idx[valid]]) // self.binwidth
+        self._data += np.bincount(bins[bins < self.n_values], minlength=self.n_values)
+
+    def getData(self):
+        self._pull()
+        return self._data.copy()
+
+    def getIndex(self):
+        return np.arange(self.n_values, dtype=np.int64) * self.binwidth
+
+
+class FileWriter(_Measurement):
+    """Writes simulated tags as SIM_TAG_DTYPE records; starts recording on construction like the real FileWriter."""
+    def __init__(self, tagger, filename, channels):
+        synchronized = isinstance(tagger, SynchronizedMeasurements)
+        super().__init__(tagger)
+        self.channels = np.asarray(list(channels))
+        self.total_size = 0
+        self._file = open(filename, 'wb')
+        if not synchronized:
+            self.start()
+
+    def _process(self, channels, timestamps, t_start, t_end):
+        if self._file is None:
+            return
+        mask = np.isin(channels, self.channels)
+        records = np.zeros(np.count_nonzero(mask), dtype=SIM_TAG_DTYPE)
+        records['channel'] = channels[mask]
+        records['timestamp'] = timestamps[mask]
+        data = records.tobytes()
+        self._file.write(data)
+        self.total_size += len(data)
+
+    def split(self, new_filename=""):
+        self._pull()
+        self._file.close()
+        self._file = open(new_filename, 'wb')
+
+    def getTotalSize(self):
+        self._pull()
+        return self.total_size
+
+    def getTotalEvents(self):
+        return self.total_size // SIM_TAG_DTYPE.itemsize
+
+    def stop(self):
+        super().stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TimeTagStreamBuffer:
+    def __init__(self, records):
+        self._records = records
+        self.size = records.size
+
+    def getChannels(self):
+        return self._records['channel']
+
+    def getTimestamps(self):
+        return self._records['timestamp']
+
+    def getEventTypes(self):
+        return self._records['type']
+
+    def getMissedEvents(self):
+        return self._records['missed']
+
+
+class FileReader:
+    def __init__(self, filenames):
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        self._records = [np.memmap(f, dtype=SIM_TAG_DTYPE, mode='r') if os.path.getsize(f) else np.empty(0, SIM_TAG_DTYPE)
+                         for f in filenames]
+        self._file = 0
+        self._offset = 0
+
+    def hasData(self):
+        while self._file < len(self._records) and self._offset >= self._records[self._file].size:
+            self._file += 1
+            self._offset = 0
+        return self._file < len(self._records)
+
+    def getData(self, n_events=1000):
+        if not self.hasData():
+            return TimeTagStreamBuffer(np.empty(0, dtype=SIM_TAG_DTYPE))
+        records = np.array(self._records[self._file][self._offset:self._offset + n_events])
+        self._offset += records.size
+        return TimeTagStreamBuffer(records)
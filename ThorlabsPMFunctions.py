@@ -1,14 +1,47 @@
-import pyvisa
-import usbtmc
 import time
 import re
-from ThorlabsPM100 import ThorlabsPM100
+import threading
+import numpy as np
+from VisaSessions import get_session
+try:
+    import usbtmc
+    from ThorlabsPM100 import ThorlabsPM100
+except ImportError:
+    usbtmc = ThorlabsPM100 = None  # vendor packages not installed, only pyvisa/simulated meters work
 
 class PowerMeter:
-    def __init__(self, power_meter_id='USB0::0x1313::0x8078::P0023583::INSTR', wavelength=1536, use_pyvisa=True):
-        """Initialize the Thorlabs Power Meter using a single power_meter_id."""
-        self.use_pyvisa = use_pyvisa
+    def __init__(self, power_meter_id='USB0::0x1313::0x8078::P0023583::INSTR', wavelength=1536, use_pyvisa=True, simulator=None, read_mode='single', batch_size=20):
+        """
+        Initialize the Thorlabs Power Meter using a single power_meter_id.
+
+        With a SimulatedInstruments.SimulatedLab as simulator, a simulated PM100
+        resource is opened instead of the VISA/usbtmc device. read_mode sets the
+        default measure_power mode ('single', 'average' or 'array').
+
+        pyvisa and simulated meters share a pooled VISA session per resource
+        string (VisaSessions), so re-creating a PowerMeter reuses the open
+        resource and skips the wavelength write and settle time when the
+        wavelength is unchanged. The session holds the meter's actual settings;
+        each PowerMeter keeps its own wavelength and re-applies it before
+        reading if another PowerMeter on the resource changed it.
+        """
+        self.use_pyvisa = use_pyvisa or simulator is not None
+        self.simulator = simulator
         self.power_meter_id = power_meter_id
+        self.read_mode = read_mode    # default measure_power mode: 'single', 'average' or 'array'
+        self.batch_size = batch_size  # READ? queries per round-trip in 'array' mode
+        self.wavelength = wavelength        # wavelength this PowerMeter measures at
+        self.session = None
+        self._state = {}                    # settings the meter actually has, shared through the session when pooled
+        self._io_lock = threading.RLock()   # serialises device access between the sampler and callers
+
+        # Background sampling (start_streaming): timestamped ring buffer of readings
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._stream_cond = threading.Condition()
+        self._stream_times = None
+        self._stream_powers = None
+        self._stream_count = 0              # total samples written since start_streaming
 
         if self.power_meter_id is None:  # <<< Handle None case
             print("PowerMeter ID is None. Skipping power meter initialization.")
@@ -27,16 +60,18 @@ class PowerMeter:
 
         try:
             if self.use_pyvisa:
-                self.rm = pyvisa.ResourceManager()
-                self.device = self.rm.open_resource(power_meter_id)
-                self.power_meter = ThorlabsPM100(inst=self.device)
+                self.session = get_session(power_meter_id, simulator=self.simulator)
+                self._state = self.session.state
+                self._io_lock = self.session.lock
+                self.device = self.session.device
+                self.power_meter = ThorlabsPM100(inst=self.device) if ThorlabsPM100 and self.simulator is None else None
             else:
                 self.device = usbtmc.Instrument(vendor_id_usbtmc, product_id_usbtmc)
                 self.power_meter = ThorlabsPM100(inst=self.device)
 
             self.connected = True
-            self.set_wavelength(wavelength)
-            time.sleep(1)  # Let wavelength setting settle
+            if self.set_wavelength(wavelength) and self.simulator is None:
+                time.sleep(1)  # Let wavelength setting settle
             self.confirm_connection()
 
         except Exception as e:
@@ -46,24 +81,79 @@ class PowerMeter:
             self.connected = False
 
     def set_wavelength(self, wavelength):
+        """Set the correction wavelength; returns True if a command was sent, False if it was already set."""
         if self.device is None:
             print("No device connected. Cannot set wavelength.")  # <<< safe guard
-            return
-        print(f"Setting wavelength to {wavelength} nm.")
-        self._send_command(f"SENS:CORR:WAV {wavelength}NM")
+            return False
+        self.wavelength = wavelength
+        with self._io_lock:
+            return self._apply_wavelength()
+
+    def _apply_wavelength(self):
+        """Write self.wavelength if the meter is set to another one (e.g. by a PowerMeter sharing the session)."""
+        if self.wavelength is None or self._state.get('wavelength') == self.wavelength:
+            return False
+        print(f"Setting wavelength to {self.wavelength} nm.")
+        self._send_command(f"SENS:CORR:WAV {self.wavelength}NM")
+        self._state['wavelength'] = self.wavelength
+        return True
 
     def confirm_connection(self):
         if self.device is None:
             print("No device connected. Skipping confirmation.")  # <<< safe guard
             return
-        response = self._query_command("*IDN?")
-        print(f"Connected to: {response}")
+        if 'idn' not in self._state:
+            self._state['idn'] = self._query_command("*IDN?").strip()
+        print(f"Connected to: {self._state['idn']}")
+
+    def measure_power(self, N=1, delay=0.01, read_mode=None):
+        """
+        Read N power values in W.
+
+        read_mode (defaults to self.read_mode):
+            'single':  N sequential MEAS:POW? round-trips (original behaviour)
+            'average': the meter averages N samples internally (SENS:AVER:COUN)
+                       and one READ? returns the mean, as a one-element list
+            'array':   N individual READ? samples fetched in compound queries of
+                       up to self.batch_size per round-trip
 
-    def measure_power(self, N=1, delay=0.01):
+        While streaming (start_streaming), calls from other threads return the
+        first N samples acquired after the call instead of querying the meter.
+        """
         if self.device is None:
             print("No device connected. Returning empty power list.")  # <<< safe guard
             return []
-        
+
+        if self.streaming and threading.current_thread() is not self._stream_thread:
+            times, powers = self.wait_for_samples(N, since=time.monotonic())
+            return list(powers)
+
+        with self._io_lock:
+            return self._read_power(N, read_mode)
+
+    def _read_power(self, N, read_mode):
+        if self._apply_wavelength() and self.simulator is None:
+            time.sleep(1)  # Let wavelength setting settle
+
+        read_mode = read_mode or self.read_mode
+        if read_mode == 'average':
+            self.set_averaging(N)
+            self._configure_power()
+            return self._read_values("READ?", 1)
+        if read_mode == 'array':
+            self.set_averaging(1)
+            self._configure_power()
+            powers = []
+            while len(powers) < N:
+                count = min(self.batch_size, N - len(powers))
+                values = self._read_values(";".join(["READ?"] * count), count)
+                if not values:
+                    break
+                powers.extend(values)
+            return powers
+
+        # MEAS:POW? configures power mode itself, but honours a SENS:AVER:COUN left by 'average'
+        self.set_averaging(1)
         powers = []
         for i in range(N):
             retries = 0
@@ -77,18 +167,204 @@ class PowerMeter:
                     print(f"Error reading power (attempt {retries}/5): {e}")
         return powers
 
+    @property
+    def averaging(self):
+        """SENS:AVER:COUN last sent to the meter (None if unknown)."""
+        return self._state.get('averaging')
+
+    @averaging.setter
+    def averaging(self, count):
+        self._state['averaging'] = count
+
+    @property
+    def _power_configured(self):
+        return self._state.get('power_configured', False)
+
+    @_power_configured.setter
+    def _power_configured(self, configured):
+        self._state['power_configured'] = configured
+
+    def set_averaging(self, count):
+        """Set the meter's internal averaging count (one sample is roughly 0.3 ms); skipped if unchanged."""
+        count = max(int(count), 1)
+        if count != self.averaging:
+            self._send_command(f"SENS:AVER:COUN {count}")
+            self.averaging = count
+
+    def _configure_power(self):
+        """Put the meter in power measurement mode once, so READ? needs no reconfiguration."""
+        if not self._power_configured:
+            self._send_command("CONF:POW")
+            self._power_configured = True
+
+    def _read_values(self, command, count, retries=3):
+        """Send one (compound) query and parse its ';'/','-separated float response."""
+        for attempt in range(1, retries + 1):
+            try:
+                if hasattr(self.device, 'query_ascii_values'):
+                    values = self._io('query_ascii_values', command, separator=lambda text: re.split(r'[;,]', text))
+                else:
+                    values = [float(v) for v in re.split(r'[;,]', self._query_command(command).strip())]
+                if len(values) != count:
+                    raise ValueError(f"expected {count} values, got {len(values)}")
+                return list(values)
+            except Exception as e:
+                print(f"Error reading power (attempt {attempt}/{retries}): {e}")
+                self._power_configured = False
+                self.averaging = None
+        return []
+
+    # --- background sampling ---
+    @property
+    def streaming(self):
+        return self._stream_thread is not None and self._stream_thread.is_alive()
+
+    def start_streaming(self, capacity=100000, read_mode='array', batch_size=None):
+        """
+        Sample the meter continuously in a daemon thread into a ring buffer of
+        capacity (time.monotonic() timestamp, power W) pairs.
+
+        Each round-trip reads batch_size samples (default self.batch_size) in
+        read_mode; sample times are spread evenly over the round-trip.
+        """
+        if self.device is None:
+            print("No device connected. Cannot start streaming.")
+            return
+        if self.streaming:
+            return
+        with self._stream_cond:
+            self._stream_times = np.full(capacity, np.nan)
+            self._stream_powers = np.full(capacity, np.nan)
+            self._stream_count = 0
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(target=self._stream_loop, args=(read_mode, batch_size or self.batch_size),
+                                               name=f"PowerMeter-{self.power_meter_id}", daemon=True)
+        self._stream_thread.start()
+        print(f"Power meter streaming started ({read_mode}, {capacity} samples buffered)")
+
+    def stop_streaming(self, timeout=None):
+        self._stream_stop.set()
+        if self._stream_thread is not None:
+            self._stream_thread.join(timeout)
+        self._stream_thread = None
+        with self._stream_cond:
+            self._stream_cond.notify_all()
+
+    def _stream_loop(self, read_mode, batch_size):
+        # 'average' yields one meter-averaged value of batch_size samples per round-trip
+        while not self._stream_stop.is_set():
+            t0 = time.monotonic()
+            try:
+                with self._io_lock:
+                    powers = self._read_power(batch_size, read_mode)
+            except Exception as e:
+                print(f"Error while streaming power: {e}")
+                powers = []
+            t1 = time.monotonic()
+            if not powers:
+                self._stream_stop.wait(0.1)
+                continue
+            times = t0 + (np.arange(len(powers)) + 0.5) * (t1 - t0) / len(powers)
+            self._store(times, np.asarray(powers, dtype=float))
+
+    def _store(self, times, powers):
+        with self._stream_cond:
+            capacity = self._stream_times.size
+            idx = (self._stream_count + np.arange(times.size)) % capacity
+            self._stream_times[idx] = times
+            self._stream_powers[idx] = powers
+            self._stream_count += times.size
+            self._stream_cond.notify_all()
+
+    def _buffered(self):
+        """Return (times, powers) in the buffer, oldest first. Caller holds _stream_cond."""
+        if self._stream_times is None:
+            return np.empty(0), np.empty(0)
+        capacity = self._stream_times.size
+        n = min(self._stream_count, capacity)
+        idx = (self._stream_count - n + np.arange(n)) % capacity
+        return self._stream_times[idx], self._stream_powers[idx]
+
+    def latest(self):
+        """Return the most recent (time, power) sample, or None before the first one."""
+        with self._stream_cond:
+            if not self._stream_count:
+                return None
+            i = (self._stream_count - 1) % self._stream_times.size
+            return float(self._stream_times[i]), float(self._stream_powers[i])
+
+    def window(self, seconds):
+        """Return (times, powers) arrays of the samples acquired in the last `seconds`."""
+        with self._stream_cond:
+            times, powers = self._buffered()
+        keep = times >= time.monotonic() - seconds
+        return times[keep], powers[keep]
+
+    def samples_since(self, t):
+        """Return (times, powers) of the buffered samples taken at or after monotonic time t."""
+        with self._stream_cond:
+            times, powers = self._buffered()
+        start = np.searchsorted(times, t)
+        return times[start:], powers[start:]
+
+    def mean_since(self, t):
+        """Mean power of the samples taken since monotonic time t (nan if none yet)."""
+        powers = self.samples_since(t)[1]
+        return float(np.mean(powers)) if powers.size else float('nan')
+
+    def wait_for_samples(self, N, since=None, timeout=5.0):
+        """Block until N samples taken after `since` (default: now) exist and return the first N."""
+        since = time.monotonic() if since is None else since
+        deadline = time.monotonic() + timeout
+        with self._stream_cond:
+            while True:
+                times, powers = self._buffered()
+                start = np.searchsorted(times, since)
+                if times.size - start >= N or not self.streaming:
+                    return times[start:start + N], powers[start:start + N]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Timed out waiting for {N} power samples")
+                    return times[start:], powers[start:]
+                self._stream_cond.wait(remaining)
+
+    def _io(self, method, *args, **kwargs):
+        """Call a device method; a pooled VISA session is reconnected once on error and the call retried."""
+        with self._io_lock:
+            if self.session is not None:
+                self._use_device(self.session.device)  # pick up a reconnect done through another PowerMeter
+            try:
+                return getattr(self.device, method)(*args, **kwargs)
+            except Exception as e:
+                if self.session is None:
+                    raise
+                print(f"VISA error on {self.power_meter_id}: {e}")
+                self._use_device(self.session.reconnect())
+                if self.wavelength is not None:
+                    # the meter may have reset; restore the correction wavelength before retrying
+                    self.device.write(f"SENS:CORR:WAV {self.wavelength}NM")
+                    self._state['wavelength'] = self.wavelength
+                return getattr(self.device, method)(*args, **kwargs)
+
+    def _use_device(self, device):
+        """Switch to a (re)opened resource; the ThorlabsPM100 wrapper is rebuilt around it."""
+        if device is not self.device:
+            self.device = device
+            if self.power_meter is not None:
+                self.power_meter = ThorlabsPM100(inst=device)
+
     def _send_command(self, command):
         if self.device:
-            self.device.write(command)
+            self._io('write', command)
 
     def _query_command(self, command):
         if self.device is None:
             raise ConnectionError("Device not connected.")
         
         if self.use_pyvisa:
-            return self.device.query(command)
+            return self._io('query', command)
         else:
-            return self.device.ask(command)
+            return self._io('ask', command)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,12 +1,120 @@
-import yaml
-import TimeTagger
+import os
 import numpy as np
 import time
+import queue
+import tempfile
+import itertools
+import threading
+from collections import OrderedDict
+from ConfigService import load_config
+
+try:
+    import TimeTagger
+except ImportError:
+    TimeTagger = None  # Swabian software not installed, only TT(simulate=True) works
+
+# On-disk layout of converted time tags: exact picosecond timestamps, no float rounding
+TIME_TAG_DTYPE = np.dtype([('channel', np.int8), ('timestamp', np.int64)])
+NPY_HEADER_SIZE = 128
+
+
+def _npy_header(dtype, n_rows):
+    """Return a fixed-size .npy v1.0 header for a 1-D array of n_rows, so it can be rewritten in place."""
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (n_rows,)})
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    if len(header) != NPY_HEADER_SIZE - 10:
+        raise ValueError("npy header does not fit in the reserved space")
+    return b'\x93NUMPY\x01\x00' + np.uint16(len(header)).tobytes() + header.encode('latin1')
+
+
+def load_time_tags(data):
+    """
+    Return (channels, timestamps) arrays for offline analysis.
+
+    data can be a .npy file written by TT.npSaveData (opened memory-mapped),
+    an already loaded structured/legacy (N, 2) array, or a (channels,
+    timestamps) tuple. Timestamps are returned as int64 picoseconds.
+    """
+    if isinstance(data, tuple):
+        channels, timestamps = data
+        return np.asarray(channels), np.asarray(timestamps).astype(np.int64, copy=False)
+    if isinstance(data, str):
+        data = np.load(data, mmap_mode='r')
+    if data.dtype.names:
+        return data['channel'], data['timestamp']
+    # Legacy float64 [channel, timestamp] layout
+    return data[:, 0].astype(np.int8), data[:, 1].astype(np.int64)
+
+
+def _advance_sorted(ts, pos, value, side='left', step=4096):
+    """
+    Index of the first element at or after pos that is >= value (side='left')
+    or > value (side='right') in the sorted array ts.
+
+    Only ts[pos:result] (plus one slice) is read, in slices that double in
+    size, so moving a cursor forward over a memory-mapped, strided timestamp
+    column costs O(distance moved) instead of copying the whole column the
+    way np.searchsorted(ts, ...) does.
+    """
+    n = ts.size
+    while pos < n:
+        window = np.asarray(ts[pos:pos + step])
+        offset = int(np.searchsorted(window, value, side=side))
+        if offset < window.size:
+            return pos + offset
+        pos += window.size
+        step *= 2
+    return n
+
+
+def _histogram_time_tags(data, ch_click, ch_start, measurement_time, binwidth_ps, n_bins, chunk_size):
+    """Offline start-stop histogram for TT.histogram_between_channels (data as for load_time_tags)."""
+    ch, ts = load_time_tags(data)
+
+    n_tags = ts.size
+    if measurement_time is not None and n_tags:
+        n_tags = _advance_sorted(ts, 0, ts[0] + int(measurement_time * 1e12), 'left')
+
+    hist_data = np.zeros(int(n_bins), dtype=np.int64)
+    last_start = np.empty(0, dtype=np.int64)
+    for start in range(0, n_tags, chunk_size):
+        stop = min(start + chunk_size, n_tags)
+        block_ch = np.asarray(ch[start:stop])
+        block_ts = np.asarray(ts[start:stop])
+        starts = np.concatenate([last_start, block_ts[block_ch == ch_start]])
+        clicks = block_ts[block_ch == ch_click]
+        if starts.size == 0:
+            continue
+        last_start = starts[-1:]
+
+        idx = np.searchsorted(starts, clicks, side='right') - 1
+        valid = idx >= 0
+        bins = (clicks[valid] - starts[idx[valid]]) // int(binwidth_ps)
+        bins = bins[bins < n_bins]
+        hist_data += np.bincount(bins, minlength=int(n_bins))
+    return hist_data
+
+
 class TT:
-    def __init__(self, filename):
+    def __init__(self, filename, simulate=False, **simulation_params):
+        """
+        Connect to the Time Tagger and load its channel configuration.
+
+        With simulate=True the SimulatedTimeTagger backend is used instead of
+        hardware; simulation_params (singles_rate, pairs, seed) are passed to
+        SimulatedTimeTagger.createTimeTagger.
+        """
+        if simulate:
+            import SimulatedTimeTagger
+            self.backend = SimulatedTimeTagger
+        else:
+            if TimeTagger is None:
+                raise ImportError("TimeTagger module is not installed. Use TT(filename, simulate=True) to run without hardware.")
+            self.backend = TimeTagger
+
         # Store the provided TimeTagger instance
-        self.Inst = TimeTagger.createTimeTagger()  # TimeTagger instance stored in self.Inst
-        print("Time tagger is connected")
+        self.Inst = self.backend.createTimeTagger(**simulation_params)  # TimeTagger instance stored in self.Inst
+        print("Simulated time tagger is connected" if simulate else "Time tagger is connected")
 
         # Initialize the channel parameters at the class level
         self.Chlist = []
@@ -15,23 +123,33 @@ class TT:
         self.DelayTimes = []
         self.DataAcquisitionTime = None
 
+        # Measurement objects reused across calls, keyed by (type, channels, binwidth, n_values).
+        # Least recently used first; beyond measurement_cache_size the oldest is stopped and dropped.
+        self._measurements = OrderedDict()
+        self.measurement_cache_size = 8
+
+        # State of a running TTContinuousMeasure, if any; its worker clears it when done
+        self._continuous = None
+        self._continuous_lock = threading.Lock()
+
         # Load the timetagger configuration
         self.load_timetagger_config(filename)
 
     def load_timetagger_config(self, filename):
-        # Load the data from the YAML file
-        with open(filename, 'r') as file:
-            config = yaml.safe_load(file)
+        # Load the data from the YAML file (parsed once and cached by ConfigService),
+        # or use a "Time Tagger" section of a multi-person config passed as a dict
+        config = filename if isinstance(filename, dict) else load_config(filename)
+        tt_config = config.get('TimeTagger', config)
 
         # Load channel data directly into the class-level attributes
-        for channel, data in config['TimeTagger']['Channels'].items():
+        for channel, data in tt_config['Channels'].items():
             self.Chlist.append(data['ChannelID'])
             self.TriggerLevels.append(data['TriggerLevel'])
             self.Deadtimes.append(data['Deadtime'])
             self.DelayTimes.append(data['DelayTime'])
 
         # Load Data Acquisition Time
-        self.DataAcquisitionTime = config['TimeTagger']['DataAcquisitionTime']
+        self.DataAcquisitionTime = tt_config['DataAcquisitionTime']
         print("TimetaggerConfig file is successfully loaded and initialized")
 
     def initTTChs(self):
@@ -111,6 +229,46 @@ class TT:
         except Exception as e:
             print(f"Error while changing parameter {param} for channel {TTCh}: {e}")
 
+    def apply_config(self, section, previous=None):
+        """
+        Apply a reloaded "Time Tagger" config section to the running tagger.
+
+        Changed values are sent with TTChangeParams over the open connection.
+        With previous (the section as it was in the file before) only values
+        edited in the file are sent, so settings changed with TTChangeParams
+        since then are kept; without it every value differing from the live
+        one is. Returns the changes that cannot be applied live (channels
+        added or removed), which need the device re-created.
+        """
+        tt_config = section.get('TimeTagger', section)
+        previous_config = previous.get('TimeTagger', previous) if previous is not None else None
+        previous_channels = {data['ChannelID']: data for data in previous_config['Channels'].values()} if previous_config else {}
+        not_applied = []
+        # YAML key, TTChangeParams parameter, live list
+        params = (('TriggerLevel', 'TriggerLevel', self.TriggerLevels),
+                  ('Deadtime', 'Deadtime', self.Deadtimes),
+                  ('DelayTime', 'DelaySoftware', self.DelayTimes))
+        channel_ids = set()
+        for name, data in tt_config['Channels'].items():
+            channel = data['ChannelID']
+            channel_ids.add(channel)
+            if channel not in self.Chlist:
+                not_applied.append(f"channel {name} (ID {channel}) added")
+                continue
+            index = self.Chlist.index(channel)
+            before = previous_channels.get(channel) if previous_config else None
+            for key, param, live in params:
+                old = before[key] if before is not None else live[index]
+                if data[key] != old:
+                    self.TTChangeParams(channel, param, data[key])
+        not_applied += [f"channel ID {channel} removed" for channel in self.Chlist if channel not in channel_ids]
+
+        old_time = previous_config['DataAcquisitionTime'] if previous_config else self.DataAcquisitionTime
+        if tt_config['DataAcquisitionTime'] != old_time:
+            self.DataAcquisitionTime = tt_config['DataAcquisitionTime']
+            print(f"Set DataAcquisitionTime to {self.DataAcquisitionTime}")
+        return not_applied
+
     def enableTestSignals(self, Chlist=None):
         """Enable test signals on each channel for testing using the Chlist."""
         try:
@@ -141,12 +299,12 @@ class TT:
                 raise ValueError("Channel list (Chlist) is not provided.")
 
             # Synchronized measurement
-            synchronized = TimeTagger.SynchronizedMeasurements(self.Inst)
+            synchronized = self.backend.SynchronizedMeasurements(self.Inst)
             print(f"Starting synchronized measurement for {self.DataAcquisitionTime} s")
             start_time = time.time()
 
             # File writing setup using the provided Chlist
-            filewriter = TimeTagger.FileWriter(synchronized.getTagger(), filenameWrite, Chlist)
+            filewriter = self.backend.FileWriter(synchronized.getTagger(), filenameWrite, Chlist)
             synchronized.startFor(int(self.DataAcquisitionTime)*1e12)  # Use the configured acquisition time
             synchronized.waitUntilFinished()
 
@@ -155,11 +313,151 @@ class TT:
         except Exception as e:
             print(f"Error during synchronized measurement: {e}")
     
-    def getChannelCounts(self, Chlist, measurement_time=1):
+    def _getMeasurement(self, kind, Chlist, binwidth_ps=0, n_values=1):
+        """
+        Return a cached Counter/Countrate for these channels and binwidth,
+        creating it on first use. Only the measurement_cache_size most recently
+        used measurements are kept; older ones are stopped and released.
+        """
+        key = (kind, tuple(Chlist), int(binwidth_ps), int(n_values))
+        measurement = self._measurements.get(key)
+        if measurement is None:
+            if kind == 'Countrate':
+                measurement = self.backend.Countrate(self.Inst, list(Chlist))
+            else:
+                measurement = self.backend.Counter(self.Inst, list(Chlist), binwidth=int(binwidth_ps), n_values=int(n_values))
+            self._measurements[key] = measurement
+            while len(self._measurements) > max(self.measurement_cache_size, 1):
+                _, evicted = self._measurements.popitem(last=False)
+                try:
+                    evicted.stop()
+                except Exception as e:
+                    print(f"Error stopping cached measurement: {e}")
+        else:
+            self._measurements.move_to_end(key)
+        return measurement
+
+    def clearMeasurementCache(self):
+        """Stop and drop all cached measurement objects."""
+        for measurement in self._measurements.values():
+            try:
+                measurement.stop()
+            except Exception as e:
+                print(f"Error stopping cached measurement: {e}")
+        self._measurements.clear()
+
+    def TTContinuousMeasure(self, filenameWrite, Chlist, file_duration=60, max_file_size=None, total_duration=None, callback=None, convert_to_npy=False, poll_interval=0.1):
+        """
+        Gapless continuous recording into a series of ttbin files.
+
+        A FileWriter records in the background and is split into
+        <filenameWrite>_00000.ttbin, _00001.ttbin, ... every file_duration
+        seconds and/or max_file_size bytes; FileWriter.split switches files
+        without losing tags. Each finished file is handed to a worker thread
+        that optionally runs npSaveData on it and then calls
+        callback(ttbin_filename, npy_filename_or_None). Recording runs until
+        total_duration seconds (None = until TTStopContinuous is called).
+        Returns immediately.
+        """
+        try:
+            with self._continuous_lock:
+                running = self._continuous is not None and any(thread.is_alive() for thread in self._continuous['threads'])
+            if running:
+                raise RuntimeError("A continuous measurement is already running. Call TTStopContinuous first.")
+
+            if filenameWrite is None:
+                raise ValueError("Filename for writing the data is not provided.")
+
+            if not Chlist:
+                raise ValueError("Channel list (Chlist) is not provided.")
+
+            if file_duration is None and max_file_size is None:
+                raise ValueError("Either file_duration or max_file_size is needed for file rollover.")
+
+            base = filenameWrite[:-len('.ttbin')] if filenameWrite.endswith('.ttbin') else filenameWrite
+            names = (f"{base}_{index:05d}.ttbin" for index in itertools.count())
+            stop_event = threading.Event()
+            finished_files = queue.Queue()
+
+            current_file = next(names)
+            filewriter = self.backend.FileWriter(self.Inst, current_file, Chlist)
+            print(f"Started continuous measurement into {current_file}")
+
+            def rollover():
+                nonlocal current_file
+                start_time = time.monotonic()
+                file_start = start_time
+                size_at_split = 0
+                try:
+                    while not stop_event.wait(poll_interval):
+                        now = time.monotonic()
+                        if total_duration is not None and now - start_time >= total_duration:
+                            break
+                        roll = ((file_duration is not None and now - file_start >= file_duration)
+                                or (max_file_size is not None and filewriter.getTotalSize() - size_at_split >= max_file_size))
+                        if roll:
+                            next_file = next(names)
+                            filewriter.split(next_file)
+                            finished_files.put(current_file)
+                            current_file = next_file
+                            file_start = now
+                            size_at_split = filewriter.getTotalSize()
+                except Exception as e:
+                    print(f"Error during continuous measurement: {e}")
+                finally:
+                    filewriter.stop()
+                    finished_files.put(current_file)
+                    finished_files.put(None)
+                    print(f"Continuous measurement finished after {time.monotonic() - start_time:.1f}s")
+
+            def process_files():
+                while True:
+                    filename = finished_files.get()
+                    if filename is None:
+                        break
+                    try:
+                        npy_filename = self.npSaveData(filename) if convert_to_npy else None
+                        if callback is not None:
+                            callback(filename, npy_filename)
+                    except Exception as e:
+                        print(f"Error processing {filename}: {e}")
+                # Last file handled (stopped or total_duration reached): no longer running
+                with self._continuous_lock:
+                    if self._continuous is state:
+                        self._continuous = None
+
+            rollover_thread = threading.Thread(target=rollover, name="TTRollover", daemon=True)
+            worker_thread = threading.Thread(target=process_files, name="TTFileWorker", daemon=True)
+            state = {'stop_event': stop_event, 'threads': (rollover_thread, worker_thread)}
+            with self._continuous_lock:
+                self._continuous = state
+            rollover_thread.start()
+            worker_thread.start()
+
+        except Exception as e:
+            print(f"Error starting continuous measurement: {e}")
+
+    def TTStopContinuous(self, timeout=None):
+        """Stop a continuous measurement and wait for the last file to be processed."""
+        with self._continuous_lock:
+            state = self._continuous
+        if state is None:
+            print("No continuous measurement is running.")
+            return
+        state['stop_event'].set()
+        for thread in state['threads']:
+            thread.join(timeout)
+        with self._continuous_lock:
+            if self._continuous is state and not any(thread.is_alive() for thread in state['threads']):
+                self._continuous = None
+
+    def getChannelCounts(self, Chlist, measurement_time=1, verbose=True):
         """Count the number of events on the specified channels."""
+        counts = None
         try:
-            # Create a Counter to count events on the specified channels
-            counter = TimeTagger.Counter(self.Inst, Chlist, binwidth=measurement_time*1e12)
+            # Reuse the Counter for these channels and measurement time
+            counter = self._getMeasurement('Counter', Chlist, measurement_time*1e12)
+            counter.clear()
 
             # Start the measurement for a given time (in seconds)
             counter.startFor(int(measurement_time * 1e12))  # Measurement time in picoseconds
@@ -168,6 +466,9 @@ class TT:
             # Get the counts for each channel
             counts = counter.getData()
 
+            if not verbose:
+                return counts
+
             header_format = '{:<10} {:<18}'
             print(header_format.format('Channel', 'Counts'))
             print('-' * 65)
@@ -175,7 +476,7 @@ class TT:
             # Print the counts
             for i, ch in enumerate(Chlist):
                 row_format = '{:<10} {:<18}'
-                print(row_format.format(ch, float(counts[i])))
+                print(row_format.format(ch, float(np.sum(counts[i]))))
             print('-' * 65)
 
         except Exception as e:
@@ -183,12 +484,31 @@ class TT:
         
         return counts   
     
+    def getChannelCountsRolling(self, Chlist, window=1, binwidth=0.1):
+        """
+        Non-blocking counts over the last `window` seconds on the specified channels.
+
+        A Counter with binwidth-second bins runs continuously in the background
+        (started on the first call), so reads return immediately and are at most
+        one bin old. Returns one count per channel.
+        """
+        try:
+            n_values = max(int(round(window / binwidth)), 1)
+            counter = self._getMeasurement('RollingCounter', Chlist, binwidth*1e12, n_values)
+            if not counter.isRunning():
+                counter.start()
+            return np.sum(counter.getData(), axis=1)
 
-    def getChannelCountRate(self, Chlist, measurement_time=1):
+        except Exception as e:
+            print(f"Error while reading rolling counts on channels: {e}")
+            return None
+
+    def getChannelCountRate(self, Chlist, measurement_time=1, verbose=True):
         """Get the count rate (events per second) on the specified channels."""
         try:
-            # Create a Counter to count events on the specified channels
-            count_rates = TimeTagger.Countrate(self.Inst, Chlist)
+            # Reuse the Countrate for these channels
+            count_rates = self._getMeasurement('Countrate', Chlist)
+            count_rates.clear()
 
             # Start the measurement for a given time (in seconds)
             count_rates.startFor(int(measurement_time * 1e12))  # Measurement time in picoseconds
@@ -197,6 +517,9 @@ class TT:
             # Get the counts for each channel
             countrates = count_rates.getData()
 
+            if not verbose:
+                return countrates
+
 
             # Print the count rates
             header_format = '{:<10} {:<18}'
@@ -216,84 +539,237 @@ class TT:
         
         return count_rates
 
-    def npSaveData(self, filenameRead=None, ShowDataTable = False):
-        """Reads data from a file and saves it as a NumPy array."""
+    def npSaveData(self, filenameRead=None, ShowDataTable = False, n_events=1000000, filenameWrite=None):
+        """
+        Reads data from a ttbin file and saves the time tags as a NumPy array.
+
+        The file is streamed in chunks of n_events and only TimeTag events are
+        appended straight to a .npy file on disk, so memory use is bounded by
+        the chunk size. The saved array is structured with an int8 'channel'
+        and an exact int64 'timestamp' (ps) field and can be opened with
+        np.load(..., mmap_mode='r'). Returns the .npy filename, or None if
+        the conversion failed; a partially written .npy is deleted then.
+        """
+        partial = None
         try:
             if filenameRead is None:
                 raise ValueError("Filenameread is not provided.")
 
+            if filenameWrite is None:
+                filenameWrite = filenameRead.replace('.ttbin', '.npy')
+
             if ShowDataTable is False:
                 print(f"!!!!!! Not printing the DataTable. If you want to print make DataTable=True !!!!!!!\n")
 
             # Initialize the file reader
-            filereader = TimeTagger.FileReader(filenameRead)
+            filereader = self.backend.FileReader(filenameRead)
 
 
             format_string = '{:>8} | {:>17} | {:>7} | {:>14} | {:>13}'
             print(format_string.format('TAG #', 'EVENT TYPE', 'CHANNEL', 'TIMESTAMP (ps)', 'MISSED EVENTS'))
             print('---------+-------------------+---------+----------------+--------------')
 
-            n_events = 1000  # Number of events to read at once
             event_name = ['0 (TimeTag)', '1 (Error)', '2 (OverflowBegin)', '3 (OverflowEnd)', '4 (MissedEvents)']
 
-            tempChannel = []
-            tempTimestamp = []
+            n_tags = 0
             i = 0
 
-            while filereader.hasData():
-                # Get data in chunks
-                data = filereader.getData(n_events=n_events)
-
-                # Retrieve channels and timestamps
-                channel = data.getChannels()
-                timestamps = data.getTimestamps()
-                overflow_types = data.getEventTypes()
-                missed_events = data.getMissedEvents()  # The numbers of missed events in case of overflow
-                OnlyTimeTags = np.squeeze(np.where(overflow_types == 0))
+            with open(filenameWrite, 'wb') as out:
+                partial = filenameWrite
+                # Reserve a fixed-size header, rewritten with the final length at the end
+                out.write(_npy_header(TIME_TAG_DTYPE, 0))
+
+                while filereader.hasData():
+                    # Get data in chunks
+                    data = filereader.getData(n_events=n_events)
+
+                    # Retrieve channels and timestamps
+                    channel = data.getChannels()
+                    timestamps = data.getTimestamps()
+                    overflow_types = data.getEventTypes()
+                    missed_events = data.getMissedEvents()  # The numbers of missed events in case of overflow
+                    OnlyTimeTags = overflow_types == 0
+
+                    chunk = np.empty(np.count_nonzero(OnlyTimeTags), dtype=TIME_TAG_DTYPE)
+                    chunk['channel'] = channel[OnlyTimeTags]
+                    chunk['timestamp'] = timestamps[OnlyTimeTags]
+                    out.write(chunk.tobytes())
+                    n_tags += chunk.size
+
+                    # Output to table
+                    if ShowDataTable==True:
+                        if i < 2 or not filereader.hasData():
+                            print(format_string.format(*" "*5))
+                            heading = ' Start of data chunk {} with {} events '.format(i+1, data.size)
+                            extra_width = 69 - len(heading)
+                            print('{} {} {}'.format("="*(extra_width//2), heading, "="*(extra_width - extra_width//2)))
+                            print(format_string.format(*" "*5))
+                            print(format_string.format(i*n_events + 1, event_name[overflow_types[0]], channel[0], timestamps[0], missed_events[0]))
+                            if data.size > 1:
+                                print(format_string.format(i*n_events + 2, event_name[overflow_types[1]], channel[1], timestamps[1], missed_events[1]))
+                            if data.size > 3:
+                                print(format_string.format(*["..."]*5))
+                            if data.size > 2:
+                                print(format_string.format(i*n_events + data.size, event_name[overflow_types[-1]], channel[-1], timestamps[-1], missed_events[-1]))
+                        if i == 1:
+                            print(format_string.format(*" "*5))
+                            for j in range(3):
+                                print(format_string.format(*"."*5))
+
+                    i += 1
+
+                out.seek(0)
+                out.write(_npy_header(TIME_TAG_DTYPE, n_tags))
+            partial = None
+
+            print(f"{n_tags} time tags saved to {filenameWrite}")
+            return filenameWrite
 
-                tempChannel.append(channel[OnlyTimeTags])
-                tempTimestamp.append(timestamps[OnlyTimeTags])
-                
-                
-                # Output to table
-                if ShowDataTable==True:
-                    OnlyTimeTags = np.squeeze(np.where(overflow_types==0))
-
-                    if i < 2 or not filereader.hasData():
-                        print(format_string.format(*" "*5))
-                        heading = ' Start of data chunk {} with {} events '.format(i+1, data.size)
-                        extra_width = 69 - len(heading)
-                        print('{} {} {}'.format("="*(extra_width//2), heading, "="*(extra_width - extra_width//2)))
-                        print(format_string.format(*" "*5))
-                        print(format_string.format(i*n_events + 1, event_name[overflow_types[0]], channel[0], timestamps[0], missed_events[0]))
-                        if data.size > 1:
-                            print(format_string.format(i*n_events + 2, event_name[overflow_types[1]], channel[1], timestamps[1], missed_events[1]))
-                        if data.size > 3:
-                            print(format_string.format(*["..."]*5))
-                        if data.size > 2:
-                            print(format_string.format(i*n_events + data.size, event_name[overflow_types[-1]], channel[-1], timestamps[-1], missed_events[-1]))
-                    if i == 1:
-                        print(format_string.format(*" "*5))
-                        for j in range(3):
-                            print(format_string.format(*"."*5))
-
-                i += 1
-
-                
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            if partial is not None and os.path.exists(partial):
+                # The header still says 0 rows; don't leave a valid-looking empty array behind
+                os.remove(partial)
+            return None
 
-                i += 1
+    def histogram_between_channels(self, ch_click, ch_start, measurement_time=None, binwidth_ps=1, n_bins=1000, end_bins=None, plotHistogram=False, data=None, chunk_size=10000000):
+        """
+        Start-stop histogram of click delays after the most recent start event.
+
+        Live (data=None): runs a TimeTagger.Histogram for measurement_time
+        seconds (None = 1 s).
+        Offline (data = .npy/.ttbin filename, array or (channels, timestamps)):
+        histograms recorded tags with a vectorised np.bincount, in blocks of
+        chunk_size tags; measurement_time limits the analysed span from the
+        first tag (None, the default, for the whole file). A .ttbin file is
+        converted with npSaveData into a temporary .npy that is deleted
+        afterwards; convert it with npSaveData first to keep the .npy.
+
+        Parameters:
+            ch_click (int): Click (stop) channel
+            ch_start (int): Start channel
+            binwidth_ps (int): Bin width in ps
+            n_bins (int): Number of bins
+            end_bins (list): [first, last) bin indices summed into selected_counts
+            plotHistogram (bool): Plot the histogram
+
+        Returns:
+            (hist_data, bin_centers, selected_counts); selected_counts is None without end_bins
+        """
+        try:
+            if data is None:
+                histogram = self.backend.Histogram(self.Inst, ch_click, ch_start, int(binwidth_ps), int(n_bins))
+                histogram.startFor(int((1 if measurement_time is None else measurement_time) * 1e12))
+                histogram.waitUntilFinished()
+                hist_data = np.asarray(histogram.getData())
+                bin_centers = np.asarray(histogram.getIndex()) + binwidth_ps / 2
+            else:
+                npy_filename = None
+                if isinstance(data, str) and data.endswith('.ttbin'):
+                    # Convert into a temporary .npy instead of leaving one next to the recording
+                    fd, npy_filename = tempfile.mkstemp(suffix='.npy')
+                    os.close(fd)
+                try:
+                    if npy_filename is not None:
+                        if self.npSaveData(data, filenameWrite=npy_filename) is None:
+                            raise RuntimeError(f"could not convert {data}")
+                        data = npy_filename
+                    hist_data = _histogram_time_tags(data, ch_click, ch_start, measurement_time, binwidth_ps, n_bins, chunk_size)
+                finally:
+                    if npy_filename is not None:
+                        os.remove(npy_filename)
+                bin_centers = np.arange(int(n_bins)) * binwidth_ps + binwidth_ps / 2
+
+            selected_counts = None
+            if end_bins is not None:
+                selected_counts = float(np.sum(hist_data[int(end_bins[0]):int(end_bins[1])]))
+
+            if plotHistogram:
+                import matplotlib.pyplot as plt
+                plt.figure()
+                plt.plot(bin_centers, hist_data)
+                if end_bins is not None:
+                    plt.axvspan(end_bins[0] * binwidth_ps, end_bins[1] * binwidth_ps, alpha=0.2)
+                plt.title(f"Histogram between channels {ch_start} (start) and {ch_click} (click)")
+                plt.xlabel("Delay (ps)")
+                plt.ylabel("Counts")
+                plt.grid(True)
+                plt.show()
+
+            return hist_data, bin_centers, selected_counts
 
-            # Concatenate the results into a single array
-            tempChannel = np.concatenate(tempChannel)
-            tempTimestamp = np.concatenate(tempTimestamp)
+        except Exception as e:
+            print(f"Error while building histogram between channels {ch_start} and {ch_click}: {e}")
+            return None, None, None
+
+    def count_coincidences(self, data, channels, window_ps, delays_ps=None, chunk_size=10000000):
+        """
+        Count N-fold coincidences in recorded time tags.
+
+        An event on channels[0] counts once if every other channel in channels
+        has at least one event within +/- window_ps of it (after adding
+        delays_ps[channel], in ps, to that channel). The time-ordered tag stream
+        is processed in blocks of chunk_size tags with searchsorted lookups, so
+        the cost is O(n log n) and memory is bounded by the block size. The
+        partner range around each block is found with forward-only cursors,
+        never by searching the whole (possibly memory-mapped) timestamp column.
+
+        Parameters:
+            data: .npy filename from npSaveData, array, or (channels, timestamps) tuple
+            channels (list): Channels to correlate, the first one is the reference
+            window_ps (int): Coincidence half-window in ps
+            delays_ps (dict): Optional {channel: delay in ps}
+
+        Returns:
+            int: number of coincidences
+        """
+        try:
+            if len(channels) < 2:
+                raise ValueError("At least two channels are needed for coincidences.")
+
+            ch, ts = load_time_tags(data)
+            delays_ps = delays_ps or {}
+            delays = {c: int(delays_ps.get(c, 0)) for c in channels}
+            # A partner of a reference tag can be up to window + |d_ref - d_other| away in raw time
+            margin = int(window_ps) + max(delays.values()) - min(delays.values())
+            ref_ch, others = channels[0], channels[1:]
+
+            count = 0
+            p0 = p1 = 0        # partner range cursors; they only move forward
+            for start in range(0, ts.size, chunk_size):
+                stop = min(start + chunk_size, ts.size)
+                block_ch = np.asarray(ch[start:stop])
+                block_ts = np.asarray(ts[start:stop])
+                ref_t = block_ts[block_ch == ref_ch] + delays[ref_ch]
+                if ref_t.size == 0:
+                    continue
+
+                # Partner events may lie up to margin outside the block
+                p0 = _advance_sorted(ts, p0, block_ts[0] - margin, side='left')
+                p1 = _advance_sorted(ts, max(p1, stop), block_ts[-1] + margin, side='right')
+                partner_ch = np.asarray(ch[p0:p1])
+                partner_ts = np.asarray(ts[p0:p1])
+
+                found = np.ones(ref_t.size, dtype=bool)
+                for other in others:
+                    other_t = partner_ts[partner_ch == other] + delays[other]
+                    n_hits = (np.searchsorted(other_t, ref_t + window_ps, side='right')
+                              - np.searchsorted(other_t, ref_t - window_ps, side='left'))
+                    found &= n_hits > 0
+                count += int(np.count_nonzero(found))
+
+            return count
 
-            # Save the data to a NumPy array
-            timeTagData = np.empty([tempChannel.size, 2])
-            timeTagData[:, 0] = tempChannel
-            timeTagData[:, 1] = tempTimestamp
-            np.save(filenameRead.replace('.ttbin', '.npy'), timeTagData)
+        except Exception as e:
+            print(f"Error while counting coincidences on channels {channels}: {e}")
+            return None
 
-            print(f"Data saved to {filenameRead.replace('.ttbin', '.npy')}")
+    def coincidence_counts(self, data, pairs, window_ps, delays_ps=None, chunk_size=10000000):
+        """
+        Pairwise coincidence counts, e.g. for CHSH analyses.
 
-        except Exception as e:
-            print(f"Error reading file: {e}")
+        Returns {(ch_a, ch_b): count} for every pair in pairs; see count_coincidences.
+        """
+        if isinstance(data, str):
+            data = np.load(data, mmap_mode='r')
+        return {tuple(pair): self.count_coincidences(data, list(pair), window_ps, delays_ps, chunk_size) for pair in pairs}
@@ -0,0 +1,100 @@
+"""
+Process-wide VISA session pool.
+
+One pyvisa.ResourceManager is shared by every instrument in the process and
+each resource string is opened at most once. Re-creating a PowerMeter (or
+opening several drivers on the same meter) reuses the open session together
+with its cached instrument state (IDN, wavelength, averaging, ...), so no
+I/O or settle time is spent on settings that did not change. The state is
+what the instrument is actually set to; drivers sharing a session keep the
+settings they want themselves and compare them with it before each use.
+
+    session = get_session('USB0::0x1313::0x8078::P0023583::INSTR')
+    session.device.query('*IDN?')
+"""
+import threading
+try:
+    import pyvisa
+except ImportError:
+    pyvisa = None  # only simulated sessions (get_session(..., simulator=lab)) work
+
+_resource_manager = None
+_sessions = {}                # (resource_id, id(simulator) or None) -> VisaSession
+_pool_lock = threading.Lock()
+
+
+def get_resource_manager():
+    """Return the shared pyvisa.ResourceManager, creating it on first use."""
+    global _resource_manager
+    with _pool_lock:
+        if _resource_manager is None:
+            if pyvisa is None:
+                raise ImportError("pyvisa is not installed")
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+
+class VisaSession:
+    """One shared VISA resource, opened lazily, with a lock and cached instrument state."""
+    def __init__(self, resource_id, opener):
+        self.resource_id = resource_id
+        self._opener = opener
+        self._device = None
+        self.lock = threading.RLock()  # serialises I/O of all users of this resource
+        self.state = {}                # actual instrument settings, cleared on reconnect
+
+    @property
+    def device(self):
+        with self.lock:
+            if self._device is None:
+                self._device = self._opener(self.resource_id)
+            return self._device
+
+    @property
+    def is_open(self):
+        return self._device is not None
+
+    def reconnect(self):
+        """Close and reopen the resource; cached state is dropped as the instrument may have reset."""
+        with self.lock:
+            print(f"Reconnecting VISA resource {self.resource_id}")
+            self.close()
+            return self.device
+
+    def close(self):
+        with self.lock:
+            if self._device is not None:
+                try:
+                    self._device.close()
+                except Exception as e:
+                    print(f"Error closing VISA resource {self.resource_id}: {e}")
+            self._device = None
+            self.state.clear()
+
+
+def get_session(resource_id, simulator=None):
+    """
+    Return the pooled VisaSession for resource_id, creating it if needed.
+
+    With a SimulatedInstruments.SimulatedLab as simulator the resource is
+    opened on the simulator instead of the shared ResourceManager.
+    """
+    key = (resource_id, None if simulator is None else id(simulator))
+    with _pool_lock:
+        session = _sessions.get(key)
+        if session is None:
+            if simulator is not None:
+                opener = simulator.open_resource
+            else:
+                opener = lambda rid: get_resource_manager().open_resource(rid)
+            session = _sessions[key] = VisaSession(resource_id, opener)
+        return session
+
+
+def close_sessions():
+    """Close every pooled session (they reopen on next use)."""
+    with _pool_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
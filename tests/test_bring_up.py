@@ -0,0 +1,31 @@
+import time
+
+from DeviceRegistry import register_device
+import MainFile
+
+register_device("Test Hanging Device", lambda params: time.sleep(60), timeout=0.2)
+register_device("Test Quick Device", lambda params: "connected", timeout=5)
+
+
+def test_timed_out_device_frees_its_worker_but_not_its_port():
+    config = {'Alice': {'Test Hanging Device': {'com_port': 'COM_T'},
+                        'Test Quick Device': {'com_port': 'COM_T'}},
+              'Bob': {'Test Quick Device': {'com_port': 'COM_U'}}}
+    devices, report = MainFile.bring_up_devices(config, max_workers=1)
+    status = {(entry['person'], entry['device']): entry['status'] for entry in report}
+    assert status == {('Alice', 'Test Hanging Device'): 'timeout',
+                      ('Alice', 'Test Quick Device'): 'blocked',      # COM_T may still be open by the hung one
+                      ('Bob', 'Test Quick Device'): 'ok'}
+    assert devices['Bob'] == {'Test Quick Device': 'connected'}
+    assert devices['Alice'] == {}
+
+
+def test_lazy_device_answers_capabilities_without_connecting():
+    created = []
+    register_device("Test Lazy Device", lambda params: created.append(params), capabilities=("counting",))
+    persons = MainFile.assign_persons_from_config({'Bob': {'Test Lazy Device': {}}}, lazy=True)
+    device = persons[0]['Test Lazy Device']
+    assert device.has_capability('counting') and not device.has_capability('switching')
+    assert device.capabilities == {'counting'}
+    assert persons[0].devices_with('counting') == [device]
+    assert created == [] and not device.is_resolved
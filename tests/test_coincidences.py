@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+import SimulatedTimeTagger
+from TimeTaggerFunctions import TT, TIME_TAG_DTYPE, load_time_tags
+
+CONFIG = {
+    'Channels': {
+        'A': {'ChannelID': 1, 'TriggerLevel': 0.1, 'Deadtime': 0, 'DelayTime': 0},
+        'B': {'ChannelID': 2, 'TriggerLevel': 0.1, 'Deadtime': 0, 'DelayTime': 0},
+        'C': {'ChannelID': 3, 'TriggerLevel': 0.1, 'Deadtime': 0, 'DelayTime': 0},
+    },
+    'DataAcquisitionTime': 1,
+}
+
+
+@pytest.fixture(scope='module')
+def tt():
+    return TT(CONFIG, simulate=True)
+
+
+def brute_force(channels, timestamps, coincidence_channels, window_ps, delays_ps):
+    shifted = timestamps + np.array([delays_ps.get(c, 0) for c in channels])
+    ref = shifted[channels == coincidence_channels[0]]
+    found = np.ones(ref.size, dtype=bool)
+    for other in coincidence_channels[1:]:
+        other_t = shifted[channels == other]
+        found &= (np.abs(ref[:, None] - other_t[None, :]) <= window_ps).any(axis=1)
+    return int(found.sum())
+
+
+def test_partner_across_block_boundary_with_opposite_delays(tt):
+    # ch2 is 2000 ps after ch1 in raw time but coincident after the delays
+    data = (np.array([1, 2], dtype=np.int8), np.array([0, 2000], dtype=np.int64))
+    delays = {1: 1000, 2: -1000}
+    assert tt.count_coincidences(data, [1, 2], 10, delays, chunk_size=10) == 1
+    assert tt.count_coincidences(data, [1, 2], 10, delays, chunk_size=1) == 1
+
+
+@pytest.mark.parametrize('channels', [[1, 2], [2, 1], [1, 2, 3]])
+def test_result_does_not_depend_on_chunk_size(tt, channels):
+    rng = np.random.default_rng(7)
+    n = 2000
+    timestamps = np.sort(rng.integers(0, 2_000_000, n)).astype(np.int64)
+    tag_channels = rng.integers(1, 4, n).astype(np.int8)
+    delays = {1: 3000, 2: -2500, 3: 400}
+    expected = brute_force(tag_channels, timestamps, channels, 1500, delays)
+    assert expected > 0
+    for chunk_size in (1, 7, 64, 1000, n):
+        assert tt.count_coincidences((tag_channels, timestamps), channels, 1500, delays, chunk_size) == expected
+
+
+def test_memory_mapped_structured_file(tt, tmp_path):
+    rng = np.random.default_rng(3)
+    tags = np.zeros(5000, dtype=TIME_TAG_DTYPE)
+    tags['timestamp'] = np.sort(rng.integers(0, 5_000_000, tags.size))
+    tags['channel'] = rng.integers(1, 3, tags.size)
+    path = str(tmp_path / 'tags.npy')
+    np.save(path, tags)
+    expected = brute_force(tags['channel'], tags['timestamp'], [1, 2], 800, {2: -600})
+    for chunk_size in (13, 5000):
+        assert tt.count_coincidences(path, [1, 2], 800, {2: -600}, chunk_size) == expected
+
+
+def test_continuous_measure_can_restart_after_total_duration(tt, tmp_path):
+    tt.TTContinuousMeasure(str(tmp_path / 'first'), [1, 2], file_duration=0.1, total_duration=0.2, poll_interval=0.01)
+    tt._continuous['threads'][1].join(5)
+    assert tt._continuous is None
+    tt.TTContinuousMeasure(str(tmp_path / 'second'), [1, 2], file_duration=0.1, poll_interval=0.01)
+    assert tt._continuous is not None
+    tt.TTStopContinuous()
+    assert tt._continuous is None
+    assert (tmp_path / 'second_00000.ttbin').exists()
+
+
+def test_offline_histogram_uses_whole_file_by_default(tt):
+    # start on channel 1 every 2 s, click on channel 2 10 ps later: five pairs over 8 s
+    starts = np.arange(5, dtype=np.int64) * 2 * 10**12
+    timestamps = np.sort(np.concatenate([starts, starts + 10]))
+    channels = np.where(np.isin(timestamps, starts), 1, 2).astype(np.int8)
+    hist, _, _ = tt.histogram_between_channels(2, 1, binwidth_ps=1, n_bins=100, data=(channels, timestamps))
+    assert hist[10] == 5
+    hist, _, _ = tt.histogram_between_channels(2, 1, measurement_time=3, binwidth_ps=1, n_bins=100, data=(channels, timestamps), chunk_size=3)
+    assert hist[10] == 2
+
+
+def test_measurement_cache_is_bounded(tt):
+    tt.clearMeasurementCache()
+    first = tt._getMeasurement('Counter', [1], 1e9)
+    stopped = []
+    first.stop = lambda: stopped.append(first)
+    for n in range(tt.measurement_cache_size):
+        tt._getMeasurement('Counter', [1], (n + 2) * 1e9)
+    assert len(tt._measurements) == tt.measurement_cache_size
+    assert stopped == [first]                                   # least recently used is stopped
+    assert tt._getMeasurement('Counter', [1], 2e9) is tt._getMeasurement('Counter', [1], 2e9)
+    tt.clearMeasurementCache()
+
+
+def write_ttbin(filename):
+    tagger = SimulatedTimeTagger.createTimeTagger(singles_rate={1: 1e6, 2: 1e6}, seed=5)
+    writer = SimulatedTimeTagger.FileWriter(tagger, filename, [1, 2])
+    writer.startFor(int(1e9))
+    writer.stop()
+
+
+def test_npSaveData_round_trip(tt, tmp_path):
+    ttbin = str(tmp_path / 'run.ttbin')
+    write_ttbin(ttbin)
+    records = np.fromfile(ttbin, dtype=SimulatedTimeTagger.SIM_TAG_DTYPE)
+    assert records.size > 0
+    path = tt.npSaveData(ttbin, n_events=7)
+    channels, timestamps = load_time_tags(path)
+    assert np.array_equal(channels, records['channel'])
+    assert np.array_equal(timestamps, records['timestamp'])
+
+
+def test_npSaveData_removes_partial_file(tt, tmp_path, monkeypatch):
+    ttbin = str(tmp_path / 'run.ttbin')
+    write_ttbin(ttbin)
+
+    def broken_getData(self, n_events=1000):
+        raise IOError("disk went away")
+    monkeypatch.setattr(SimulatedTimeTagger.FileReader, 'getData', broken_getData)
+    assert tt.npSaveData(ttbin) is None
+    assert not (tmp_path / 'run.npy').exists()
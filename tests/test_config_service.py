@@ -0,0 +1,48 @@
+import os
+
+import pytest
+import yaml
+
+import ConfigService
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    ConfigService.clear_cache()
+    yield
+    ConfigService.clear_cache()
+
+
+def test_invalid_section_lists_every_problem(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump({'Alice': {
+        'Time Tagger': {'Channels': {'A': {'ChannelID': 'one', 'TriggerLevel': 0.1, 'Deadtime': 0}}},
+        'Optical Switch': {'com_port': 3, 'SW1': True},
+    }}))
+    with pytest.raises(ConfigService.ConfigError) as error:
+        ConfigService.load_config(str(path))
+    assert sorted(error.value.problems) == [
+        "Alice/Optical Switch/com_port: expected str or null, got int",
+        "Alice/Time Tagger/Channels/A/ChannelID: expected int, got str",
+        "Alice/Time Tagger/Channels/A/DelayTime: missing",
+        "Alice/Time Tagger/DataAcquisitionTime: missing",
+    ]
+
+
+def test_touched_but_unchanged_file_is_not_reparsed(tmp_path, monkeypatch):
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump({'Alice': {'Optical Switch': {'com_port': None, 'SW1': 1}}}))
+    snapshot = ConfigService.load_config(str(path))
+    assert snapshot['Alice']['Optical Switch'].key_path == ('Alice', 'Optical Switch')
+
+    def fail(*args, **kwargs):
+        raise AssertionError("re-parsed")
+    monkeypatch.setattr(ConfigService.yaml, 'load', fail)
+    assert ConfigService.load_config(str(path)) is snapshot      # unchanged stat: cache hit
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert ConfigService.load_config(str(path)) is snapshot      # touched, same content: no re-parse
+
+    monkeypatch.undo()
+    path.write_text(yaml.safe_dump({'Alice': {'Optical Switch': {'com_port': None, 'SW1': 0}}}))
+    assert ConfigService.load_config(str(path))['Alice']['Optical Switch']['SW1'] == 0
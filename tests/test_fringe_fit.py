@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from Interferometer_v4_20250425 import FringeFit
+
+
+@pytest.mark.parametrize('response, voltage', [('linear', 1.0), ('quadratic', 1.0), ('quadratic', 3.0)])
+def test_voltage_window_spans_the_requested_phase(response, voltage):
+    model = FringeFit(offset=1.0, amplitude=0.5, period=2.0, phase=0.3, response=response)
+    low, high = model.voltage_window(voltage, 180)
+    theta = lambda v: 2 * np.pi * model._x(v) / model.period
+    assert theta(high) - theta(voltage) == pytest.approx(np.pi)
+    assert theta(voltage) - theta(low) == pytest.approx(np.pi)
+
+
+def test_quadratic_window_narrows_with_voltage():
+    model = FringeFit(offset=1.0, amplitude=0.5, period=2.0, phase=0.0, response='quadratic')
+    low, high = model.voltage_window(3.0, 45)
+    assert high - 3.0 == pytest.approx(np.sqrt(9.25) - 3.0)     # 0.083 V, not a fixed 0.125 V
+    assert model.voltage_window(0.1, 180)[0] == 0.0             # clipped at 0 V
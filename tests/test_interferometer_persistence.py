@@ -0,0 +1,130 @@
+import os
+import time
+
+import pytest
+import yaml
+
+from SimulatedInstruments import SimulatedLab
+import Interferometer_v4_20250425 as interferometer_module
+from Interferometer_v4_20250425 import Interferometer
+
+COM_PORT = 'SIM0'
+
+
+def write_config(path):
+    config = {
+        'Interferometers': {'IntA': {'IntName': 'IntA', 'Out1': 1, 'Out2': 2, 'VSrcCh': 0, 'V': 0.0,
+                                     'Phase0Voltage': 0.0, 'Phase90Voltage': 0.0, 'Phase180Voltage': 0.0,
+                                     'Phase270Voltage': 0.0, 'Phase0power': 0.0, 'Phase90power': 0.0,
+                                     'Phase180power': 0.0, 'Phase270power': 0.0}},
+        'LADAqs': {'LADAq1': {'com_port': COM_PORT}},
+        'Connection': {'LADAq1': ['IntA']},
+    }
+    path.write_text(yaml.safe_dump(config))
+    os.chmod(path, 0o664)
+
+
+def make_interferometer(path, **kwargs):
+    lab = SimulatedLab(latency=0)
+    lab.add_fringe(COM_PORT, 0, period=2.0)
+    intf = Interferometer(str(path), simulator=lab, max_slew_rate=1000.0, **kwargs)
+    intf.connect_LADAqs()
+    return intf
+
+
+def saved_voltage(path):
+    return yaml.safe_load(path.read_text())['Interferometers']['IntA']['V']
+
+
+def test_many_moves_are_written_once_on_flush(tmp_path, monkeypatch):
+    path = tmp_path / 'intf.yaml'
+    write_config(path)
+    intf = make_interferometer(path, flush_interval=3600, flush_every=1000)
+    writes = []
+    real_replace = os.replace
+    monkeypatch.setattr(interferometer_module.os, 'replace', lambda src, dst: (writes.append(dst), real_replace(src, dst)))
+
+    for voltage in (0.1, 0.2, 0.3, 0.4, 0.5):
+        intf.SetIntPhase(intf.IntA, voltage=voltage, sleep_time=0)
+    assert writes == [] and saved_voltage(path) == 0.0
+
+    assert intf.flush() is True
+    assert writes == [str(path)]
+    assert saved_voltage(path) == pytest.approx(0.5)
+    assert os.stat(path).st_mode & 0o777 == 0o664   # permissions of the replaced file kept
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_last_change_reaches_disk_without_another_change(tmp_path):
+    path = tmp_path / 'intf.yaml'
+    write_config(path)
+    intf = make_interferometer(path, flush_interval=0.2, flush_every=1000)
+    intf.SetIntPhase(intf.IntA, voltage=0.1, sleep_time=0)
+    intf.SetIntPhase(intf.IntA, voltage=0.7, sleep_time=0)
+    deadline = time.monotonic() + 5
+    while saved_voltage(path) != pytest.approx(0.7) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert saved_voltage(path) == pytest.approx(0.7)
+    assert not intf._dirty
+
+
+def test_failed_save_keeps_changes_pending(tmp_path, monkeypatch):
+    path = tmp_path / 'intf.yaml'
+    write_config(path)
+    intf = make_interferometer(path, flush_interval=3600, flush_every=1000)
+    intf.SetIntPhase(intf.IntA, voltage=0.3, sleep_time=0)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(interferometer_module.yaml, 'dump', fail)
+    assert intf.flush() is False
+    assert intf._dirty and saved_voltage(path) == 0.0
+    monkeypatch.undo()
+    assert intf.flush() is True
+    assert saved_voltage(path) == pytest.approx(0.3)
+
+
+def test_exit_hook_does_not_keep_interferometer_alive(tmp_path):
+    import gc
+    import weakref
+    path = tmp_path / 'intf.yaml'
+    write_config(path)
+    ref = weakref.ref(Interferometer(str(path)))
+    gc.collect()
+    assert ref() is None
+
+
+def write_shared_config(path, phase90=1.0):
+    config = {'Alice': {'Interferometer': {
+        'Interferometers': {'IntA': {'IntName': 'IntA', 'VSrcCh': 0, 'V': 0.0,
+                                     'Phase0Voltage': 0.0, 'Phase90Voltage': phase90, 'Phase180Voltage': 2.0,
+                                     'Phase270Voltage': 3.0, 'Phase0power': 0.0, 'Phase90power': 0.0,
+                                     'Phase180power': 0.0, 'Phase270power': 0.0}},
+        'LADAqs': {'LADAq1': {'com_port': None}},
+    }}}
+    path.write_text(yaml.safe_dump(config))
+
+
+def shared_interferometer(path):
+    import ConfigService
+    ConfigService.clear_cache()
+    return Interferometer(ConfigService.load_config(str(path))['Alice']['Interferometer'])
+
+
+def test_hand_edit_of_config_wins_over_older_calibration(tmp_path):
+    path = tmp_path / 'config.yaml'
+    write_shared_config(path)
+    original = path.read_bytes()
+    intf = shared_interferometer(path)
+    intf.IntA.V = 0.8
+    intf.IntA.Phase180Voltage = 2.2
+    intf.mark_dirty()
+    assert intf.flush()
+    assert path.read_bytes() == original                 # the shared config is never rewritten
+
+    reloaded = shared_interferometer(path)
+    assert (reloaded.IntA.V, reloaded.IntA.Phase180Voltage, reloaded.IntA.Phase90Voltage) == (0.8, 2.2, 1.0)
+
+    write_shared_config(path, phase90=1.5)               # edited by hand while offline
+    reloaded = shared_interferometer(path)
+    assert (reloaded.IntA.V, reloaded.IntA.Phase180Voltage, reloaded.IntA.Phase90Voltage) == (0.8, 2.2, 1.5)
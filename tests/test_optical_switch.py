@@ -0,0 +1,50 @@
+from collections import deque
+
+from OpticalSwitch import OpticalSwitchDriver
+
+
+class ScriptedSerial:
+    """Serial port stand-in replying with pre-loaded lines; b'' is a read timeout."""
+    def __init__(self, *replies):
+        self.replies = deque(replies)
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def readline(self):
+        return self.replies.popleft() if self.replies else b''
+
+    def reset_input_buffer(self):
+        self.replies.clear()
+
+
+def make_driver(device):
+    driver = OpticalSwitchDriver(None, settle_time=0)
+    driver.device = device
+    driver.device_connected = True
+    return driver
+
+
+def test_err_reply_is_kept_with_its_command():
+    driver = make_driver(ScriptedSerial(b'+ok\n', b'+err\n'))
+    batch = driver.OSWAll([1, 0])
+    assert batch.done and not batch.ok
+    assert batch.responses == ['+ok', '+err']
+    assert batch.ack_at[1] is not None
+
+
+def test_timeout_drops_outstanding_commands_and_late_replies():
+    # the reply to the second command of a times out; its late "+ok" must not be taken for b's
+    device = ScriptedSerial(b'+ok\n', b'', b'+ok\n')
+    driver = make_driver(device)
+    a = driver.OSWAll([1, 1], wait=False)
+    b = driver.OSWch(2, 1, wait=False)
+    assert not a.wait()
+    assert a.responses == ['+ok', None]
+    assert b.done and b.responses == [None] and not b.ok
+    assert not driver._outstanding and not device.replies
+
+    device.replies.append(b'+ok\n')
+    c = driver.OSWch(3, 0)
+    assert c.ok and c.responses == ['+ok']
@@ -0,0 +1,76 @@
+import pytest
+
+from SimulatedInstruments import SimulatedLab
+from ThorlabsPMFunctions import PowerMeter
+
+
+@pytest.fixture
+def lab():
+    return SimulatedLab(latency=0)
+
+
+def test_meters_sharing_a_session_keep_their_own_wavelength(lab):
+    pm_a = PowerMeter(wavelength=1536, simulator=lab)
+    pm_b = PowerMeter(wavelength=1550, simulator=lab)
+    assert pm_a.session is pm_b.session
+    device = pm_a.session.device
+    assert device.wavelength == 1550
+
+    pm_a.measure_power()
+    assert device.wavelength == 1536
+    pm_b.measure_power(read_mode='array', N=3)
+    assert device.wavelength == 1550
+    assert not pm_b.set_wavelength(1550)   # already set, nothing written
+
+
+def count_queries(device):
+    queries = []
+    query = device.query
+    device.query = lambda command: queries.append(command) or query(command)
+    return queries
+
+
+def test_sample_count_per_read_mode(lab):
+    pm = PowerMeter(wavelength=1536, simulator=lab, batch_size=20)
+    device = pm.session.device
+    queries = count_queries(device)
+
+    assert len(pm.measure_power(N=4, read_mode='single')) == 4
+    assert len(queries) == 4
+
+    del queries[:]
+    assert len(pm.measure_power(N=4, read_mode='average')) == 1
+    assert device.averaging == 4 and len(queries) == 1
+
+    del queries[:]
+    assert len(pm.measure_power(N=45, read_mode='array')) == 45
+    assert len(queries) == 3                                    # 20 + 20 + 5 READ? per round-trip
+    assert device.averaging == 1                                # restored after 'average'
+
+    pm.measure_power(N=4, read_mode='average')
+    pm.measure_power(N=2, read_mode='single')
+    assert device.averaging == 1 and pm.averaging == 1
+
+
+def test_streaming_buffer(lab):
+    pm = PowerMeter(wavelength=1536, simulator=lab)
+    pm.start_streaming(capacity=50, read_mode='average', batch_size=5)
+    try:
+        assert pm.streaming
+        times, powers = pm.wait_for_samples(10)
+        assert times.size == powers.size == 10
+        assert (times[1:] >= times[:-1]).all()
+        assert len(pm.measure_power(N=3)) == 3                  # served from the buffer
+        while pm._stream_count <= 60:                           # let the ring buffer wrap
+            pm.wait_for_samples(5)
+    finally:
+        pm.stop_streaming()
+    assert not pm.streaming
+    times, powers = pm.window(60)
+    assert times.size == 50 and (times[1:] >= times[:-1]).all()
+    assert pm.latest() == (times[-1], powers[-1])
+    assert pm.mean_since(times[0]) == pytest.approx(powers.mean())
+    assert pm.session.device.averaging == 5                     # meter-averaged batches
+
+    assert len(pm.measure_power(N=2, read_mode='array')) == 2   # queries the meter again
+    assert pm.session.device.averaging == 1
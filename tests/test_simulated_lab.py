@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+import yaml
+
+from SimulatedInstruments import SimulatedLab
+from Interferometer_v4_20250425 import Interferometer
+from ThorlabsPMFunctions import PowerMeter
+
+COM_PORT = 'SIM0'
+CHANNEL = 0
+PERIOD = 2.0
+
+
+class Extrema:
+    """Minimal stand-in for supportingfunctions.SupportFunc (only find_extrema is used)."""
+    def find_extrema(self, voltage_power_data, tolerance):
+        voltages, powers = np.array(voltage_power_data, dtype=float).T
+        return [voltages[np.argmin(powers)]], [voltages[np.argmax(powers)]]
+
+
+@pytest.fixture
+def lab_setup(tmp_path):
+    config = {
+        'Interferometers': {'IntA': {'IntName': 'IntA', 'Out1': 1, 'Out2': 2, 'VSrcCh': CHANNEL, 'V': 0.0,
+                                     'Phase0Voltage': 0.0, 'Phase90Voltage': 0.0, 'Phase180Voltage': 0.0,
+                                     'Phase270Voltage': 0.0, 'Phase0power': 0.0, 'Phase90power': 0.0,
+                                     'Phase180power': 0.0, 'Phase270power': 0.0}},
+        'LADAqs': {'LADAq1': {'com_port': COM_PORT}},
+        'Connection': {'LADAq1': ['IntA']},
+    }
+    path = tmp_path / 'interferometer.yaml'
+    path.write_text(yaml.safe_dump(config))
+
+    lab = SimulatedLab(latency=0, noise=0.002, seed=1)
+    fringe = lab.add_fringe(COM_PORT, CHANNEL, period=PERIOD, phase=40.0, visibility=0.9,
+                            drift_rate=0.0, drift_noise=0.0)
+    intf = Interferometer(str(path), simulator=lab, max_slew_rate=1000.0)
+    intf.connect_LADAqs()
+    pm = PowerMeter(wavelength=1536, simulator=lab)
+    return lab, fringe, intf, pm
+
+
+def test_sweep_and_optimise_against_simulated_lab(lab_setup):
+    lab, fringe, intf, pm = lab_setup
+    board = intf.LADAqs['LADAq1']['device']
+
+    intf.CharaterizeInterferometers(Extrema(), [intf.IntA], voltage_range=(0, 4), voltage_source=board,
+                                    Measurement_Inst=pm, step_size=0.05, plotVoltagePower=False,
+                                    measurement_function='measure_power', N=1, sleep_time=0, settle_time=0)
+    assert intf.IntA.Fit is not None
+    assert intf.IntA.Fit['period'] == pytest.approx(PERIOD, rel=0.02)
+    assert intf.IntA.Fit['r_squared'] > 0.99
+
+    for mode, best in (('minimum', min), ('maximum', max)):
+        voltage = intf.OptimizeIntPhase(mode, board, intf.IntA, Measurement_Inst=pm, method='model',
+                                        max_iterations=25, measurement_function='measure_power',
+                                        settle_time=0, stable_timeout=1, N=1)
+        fringe.voltage = fringe.effective_voltage = voltage
+        reached = fringe.transmission()
+        extreme = 0.5 * (1 + (-1 if mode == 'minimum' else 1) * fringe.visibility)
+        assert reached == pytest.approx(extreme, abs=0.02), mode
+
+
+def test_phase_lock_cycle_marks_dirty_once(lab_setup, monkeypatch):
+    lab, fringe, intf, pm = lab_setup
+    board = intf.LADAqs['LADAq1']['device']
+    intf.CharaterizeInterferometers(Extrema(), [intf.IntA], voltage_range=(0, 4), voltage_source=board,
+                                    Measurement_Inst=pm, step_size=0.05, plotVoltagePower=False,
+                                    measurement_function='measure_power', N=1, sleep_time=0, settle_time=0)
+    from Interferometer_v4_20250425 import PhaseLock
+    lock = PhaseLock(intf, intf.IntA, pm, phase=180, settle_time=0, N=1)
+    intf.SetIntPhase(intf.IntA, board, intf.IntA.Phase180Voltage + 0.05, sleep_time=0)
+
+    marks = []
+    monkeypatch.setattr(intf, 'mark_dirty', lambda: marks.append(intf.IntA.V))
+    for _ in range(3):
+        lock.step()
+    assert len(marks) == 3      # one per correction step, none for the dither moves
+
+
+def test_zero_delta_move_sends_nothing(lab_setup, monkeypatch):
+    lab, fringe, intf, pm = lab_setup
+    board = intf.LADAqs['LADAq1']['device']
+    intf.SetIntPhase(intf.IntA, board, 1.0, sleep_time=0)
+    writes = []
+    monkeypatch.setattr(board, 'VsetCh', lambda *args: writes.append(args))
+    monkeypatch.setattr('time.sleep', lambda seconds: writes.append(('sleep', seconds)))
+    assert intf.SetIntPhase(intf.IntA, board, 1.0, sleep_time=1)
+    assert intf.SetPhases({'IntA': 1.0}, sleep_time=1) == {'IntA': True}
+    assert writes == []
+
+
+def test_switch_batch_returned_failed_when_not_sent():
+    from OpticalSwitch import OpticalSwitchDriver
+    driver = OpticalSwitchDriver(None, simulator=SimulatedLab(latency=0))
+    batch = driver.OSWAll([1, 0, 1, 0], wait=False)
+    assert batch.wait() is False
+    assert batch.error is not None and batch.done
+
+
+def test_monitor_stability_saves_npz_without_loading_matplotlib(lab_setup, tmp_path, monkeypatch):
+    import sys
+    lab, fringe, intf, pm = lab_setup
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delitem(sys.modules, 'matplotlib.pyplot', raising=False)
+    monkeypatch.setitem(sys.modules, 'matplotlib', None)     # any import of it fails
+    intf.monitor_stability(intf.IntA, pm, duration_minutes=0.001, interval_seconds=0, N=1,
+                           save_data=True, plot_live=False, save_chunk=3)
+    saved, = tmp_path.glob('stability_IntA_*')
+    assert saved.suffix == '.npz'
+    data = np.load(saved)
+    assert data['time'].size == data['power'].size > 3
+    assert (np.diff(data['time']) >= 0).all()
+
+
+def test_model_lock_on_quadratic_response(lab_setup):
+    lab, fringe, intf, pm = lab_setup
+    board = intf.LADAqs['LADAq1']['device']
+    # thermal shifter: phase proportional to V^2, 0.6 V^2 per fringe period (0.1 V per period near 3 V)
+    fringe = lab.add_fringe(COM_PORT, CHANNEL, period=0.6, phase=40.0, visibility=0.9, response='quadratic',
+                            drift_rate=0.0, drift_noise=0.0)
+    intf.CharaterizeInterferometers(Extrema(), [intf.IntA], voltage_range=(2, 4), voltage_source=board,
+                                    Measurement_Inst=pm, step_size=0.01, plotVoltagePower=False,
+                                    measurement_function='measure_power', N=1, sleep_time=0, settle_time=0,
+                                    phase_response='quadratic')
+    assert intf.IntA.Fit['response'] == 'quadratic'
+    intf.SetIntPhase(intf.IntA, board, 3.0, sleep_time=0)
+    voltage = intf.OptimizeIntPhase('minimum', board, intf.IntA, Measurement_Inst=pm, method='model',
+                                    max_iterations=25, measurement_function='measure_power',
+                                    settle_time=0, stable_timeout=1, N=1)
+    assert abs(voltage - 3.0) < 0.1          # a minimum on the fringe next to 3 V
+    fringe.voltage = fringe.effective_voltage = voltage
+    assert fringe.transmission() == pytest.approx(0.5 * (1 - fringe.visibility), abs=0.02)
@@ -0,0 +1,31 @@
+import numpy as np
+
+import SimulatedTimeTagger
+
+
+def test_counter_bins_delayed_tags():
+    # A negative delay puts tags before the start of their block, a positive
+    # one past its end; both must land in (not crash or vanish from) the bins.
+    tagger = SimulatedTimeTagger.createTimeTagger(seed=1)
+    tagger.setDelaySoftware(2, -int(1e8))
+    counter = SimulatedTimeTagger.Counter(tagger, [1, 2], binwidth=int(1e9), n_values=10)
+    counter.startFor(int(1e10))
+    assert counter.getData()[1].min() > 0
+
+    tagger.setDelaySoftware(2, int(3e9))
+    counter = SimulatedTimeTagger.Counter(tagger, [1, 2], binwidth=int(1e9), n_values=10)
+    counter.startFor(int(1e10))
+    assert (counter.getData()[1][:3] == 0).all() and counter.getData()[1][3:].min() > 0
+    counter.startFor(int(1e10), clear=False)
+    assert counter.getData()[1].min() > 0
+
+
+def test_stream_stays_ordered_across_blocks():
+    pairs = [{'channels': (1, 2), 'rate': 1e6, 'delay': 0, 'jitter': 50}]
+    for delay in (int(3e5), -int(3e5)):
+        tagger = SimulatedTimeTagger.createTimeTagger(singles_rate=1e5, pairs=pairs, seed=3)
+        tagger.setDelaySoftware(2, delay)
+        blocks = [tagger.generate(int(1e6))[1] for _ in range(500)]
+        stream = np.concatenate(blocks)
+        assert stream.size > 1000
+        assert (np.diff(stream) >= 0).all()
@@ -11,14 +11,12 @@ An ethernet based instrument subclass for the Yokogawa AQ2212 mainframe and its
 
 
 import os, time, traceback
-from pkg_resources import resource_filename
 import numpy as np
-import matplotlib.pyplot as plt
 # import snspd_measure.config
 from visaInst import visaInst
 from datetime import datetime
-from scipy.constants import c
-from tqdm import tqdm
+
+c = 299792458.0  # speed of light in m/s (scipy.constants.c, without importing scipy)
 
 class yoAQ2212_frame_controller(visaInst):
     def __init__(self, ipAddress, port, **kwargs):
@@ -108,6 +106,7 @@ class yoAQ2212_laser(visaInst):
                 except:
                     print('Error enabling laser')
                 finally:
+                    from tqdm import tqdm  # deferred: only needed while warming up
                     for a in tqdm(range(10),
                                   desc='Warming Up...',
                                   ncols=10,
@@ -152,6 +151,7 @@ class yoAQ2212_laser(visaInst):
             except:
                 print('Error enabling laser')
             finally:
+                from tqdm import tqdm  # deferred: only needed while warming up
                 for a in tqdm(range(10),
                               desc='Warming Up...',
                               ncols=10,